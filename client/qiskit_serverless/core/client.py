@@ -28,11 +28,12 @@ Qiskit Serverless provider
 """
 # pylint: disable=duplicate-code
 import logging
+import time
 import warnings
 import os.path
 import os
 from dataclasses import dataclass
-from typing import Optional, List, Dict, Any, Union
+from typing import Optional, List, Dict, Any, Iterator, Union
 
 import ray
 import requests
@@ -50,6 +51,7 @@ from qiskit_serverless.core.constants import (
 )
 from qiskit_serverless.core.files import GatewayFilesClient
 from qiskit_serverless.core.job import (
+    TERMINAL_STATES,
     Job,
     RayJobClient,
     GatewayJobClient,
@@ -328,8 +330,17 @@ class BaseClient(JsonSerializable):
         file: str,
         target_name: Optional[str] = None,
         download_location: str = "./",
+        workers: int = 1,
     ):
-        """Download file."""
+        """Download file.
+
+        Args:
+            file: name of file
+            target_name: name of downloaded file, interrupted download
+                of the same target is resumed
+            download_location: directory to download file to
+            workers: number of parallel range requests
+        """
         raise NotImplementedError
 
     def file_delete(self, file: str):
@@ -475,6 +486,95 @@ class ServerlessClient(BaseClient):
     def get_jobs(self, **kwargs) -> List[Job]:
         return self._job_client.list(**kwargs)
 
+    def iter_jobs(self, limit: int = 100, prefetch: bool = False) -> Iterator[Job]:
+        """Yields all jobs of user, newest first, requesting pages lazily.
+
+        Example:
+            >>> for job in client.iter_jobs(prefetch=True):
+            >>>     print(job.job_id, job.status())
+
+        Args:
+            limit: number of jobs in single page request
+            prefetch: request next page in background while current
+                page is being consumed
+
+        Returns:
+            iterator of jobs
+        """
+        return self._job_client.iter_jobs(limit=limit, prefetch=prefetch)
+
+    def as_completed(
+        self, jobs: List[Job], cadence: float = 1, timeout: Optional[float] = None
+    ) -> Iterator[Job]:
+        """Yields jobs as they finish.
+
+        Statuses of all unfinished jobs are requested at once on each check.
+
+        Example:
+            >>> jobs = [function.run(x=x) for x in range(100)]
+            >>> for job in client.as_completed(jobs):
+            >>>     print(job.result())
+
+        Args:
+            jobs: jobs to wait for
+            cadence: time in seconds between checks of job statuses
+            timeout: max time in seconds to wait, waits until all jobs finish if not set
+
+        Raises:
+            TimeoutError: if jobs did not finish in time
+
+        Returns:
+            jobs in order of completion
+        """
+        deadline = None if timeout is None else time.monotonic() + timeout
+        pending = {}
+        for job in jobs:
+            # pylint: disable=protected-access
+            if job._terminal_status is not None:
+                yield job
+            else:
+                pending[job.job_id] = job
+        while pending:
+            statuses = self._job_client.statuses(list(pending.keys()))
+            missing = set(pending.keys()) - set(statuses.keys())
+            if missing:
+                raise QiskitServerlessException(f"Jobs {sorted(missing)} not found.")
+            for job_id, status in statuses.items():
+                job = pending.get(job_id)
+                # pylint: disable=protected-access
+                if job is not None and job._update_status(status) in TERMINAL_STATES:
+                    yield pending.pop(job_id)
+
+            if not pending:
+                break
+            if deadline is not None and time.monotonic() >= deadline:
+                raise TimeoutError(f"{len(pending)} jobs did not finish in time.")
+            time.sleep(cadence)
+
+    def wait_all(
+        self, jobs: List[Job], cadence: float = 1, timeout: Optional[float] = None
+    ) -> List[Job]:
+        """Waits until all jobs finish.
+
+        Example:
+            >>> jobs = [function.run(x=x) for x in range(100)]
+            >>> results = [job.result() for job in client.wait_all(jobs)]
+
+        Args:
+            jobs: jobs to wait for
+            cadence: time in seconds between checks of job statuses
+            timeout: max time in seconds to wait, waits until all jobs finish if not set
+
+        Raises:
+            TimeoutError: if jobs did not finish in time
+
+        Returns:
+            jobs in the same order they were passed
+        """
+        for _ in self.as_completed(jobs, cadence=cadence, timeout=timeout):
+            pass
+        return list(jobs)
+
     def files(self) -> List[str]:
         return self._files_client.list()
 
@@ -483,8 +583,11 @@ class ServerlessClient(BaseClient):
         file: str,
         target_name: Optional[str] = None,
         download_location: str = "./",
+        workers: int = 1,
     ):
-        return self._files_client.download(file, download_location, target_name)
+        return self._files_client.download(
+            file, download_location, target_name, workers=workers
+        )
 
     def file_delete(self, file: str):
         return self._files_client.delete(file)
@@ -723,6 +826,7 @@ class LocalClient(BaseClient):
         file: str,
         target_name: Optional[str] = None,
         download_location: str = "./",
+        workers: int = 1,
     ):
         if self.in_test:
             logging.warning("file_download method is not implemented in LocalProvider.")
@@ -24,6 +24,8 @@ OT_LABEL_CALL_LOCATION = "qs.location"
 # request timeout
 REQUESTS_TIMEOUT: int = 30
 REQUESTS_TIMEOUT_OVERRIDE = "REQUESTS_TIMEOUT_OVERRIDE"
+# max time in seconds of single request waiting for job completion
+JOB_WAIT_TIMEOUT: int = 30
 
 # gateway
 ENV_GATEWAY_PROVIDER_HOST = "ENV_GATEWAY_PROVIDER_HOST"
@@ -40,6 +42,8 @@ ENV_JOB_ARGUMENTS = "ENV_JOB_ARGUMENTS"
 # artifact
 MAX_ARTIFACT_FILE_SIZE_MB = 50
 MAX_ARTIFACT_FILE_SIZE_MB_OVERRIDE = "MAX_ARTIFACT_FILE_SIZE_MB_OVERRIDE"
+# file of working_dir with patterns of files not uploaded with function
+ARTIFACT_IGNORE_FILE = ".serverlessignore"
 
 # IBM urls
 IBM_SERVERLESS_HOST_URL = "https://middleware.quantum-computing.ibm.com"
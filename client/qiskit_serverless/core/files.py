@@ -25,17 +25,27 @@ Qiskit Serverless files
     :toctree: ../stubs/
 
 """
+import json
 import os.path
+import re
+import threading
 import uuid
-from typing import List, Optional
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, List, Optional
 
 import requests
 from opentelemetry import trace
 from tqdm import tqdm
 
 from qiskit_serverless.core.constants import REQUESTS_TIMEOUT
+from qiskit_serverless.exception import QiskitServerlessException
 from qiskit_serverless.utils.json import safe_json_request
 
+# size in bytes of ranges of parallel downloads
+DOWNLOAD_PART_SIZE = 8 * 1024**2
+# attempts to continue download of range after connection errors
+DOWNLOAD_PART_RETRIES = 3
+
 
 class GatewayFilesClient:
     """GatewayFilesClient."""
@@ -53,32 +63,70 @@ class GatewayFilesClient:
         self._token = token
 
     def download(
-        self, file: str, download_location: str, target_name: Optional[str] = None
+        self,
+        file: str,
+        download_location: str,
+        target_name: Optional[str] = None,
+        workers: int = 1,
     ) -> Optional[str]:
-        """Downloads file."""
+        """Downloads file.
+
+        File is downloaded in byte ranges by `workers` parallel requests
+        into preallocated `.part` file next to target. Interrupted download
+        of the same `target_name` is resumed from downloaded ranges.
+        Gateways without range support send whole file in single request.
+
+        Args:
+            file: name of file
+            download_location: directory to download file to
+            target_name: name of downloaded file
+            workers: number of parallel range requests
+
+        Returns:
+            name of downloaded file
+        """
         tracer = trace.get_tracer("client.tracer")
         with tracer.start_as_current_span("files.download"):
+            file_name = target_name or f"downloaded_{str(uuid.uuid4())[:8]}_{file}"
+            file_path = os.path.join(download_location, file_name)
             with requests.get(
                 f"{self.host}/api/{self.version}/files/download/",
                 params={"file": file},
                 stream=True,
-                headers={"Authorization": f"Bearer {self._token}"},
+                headers={
+                    "Authorization": f"Bearer {self._token}",
+                    "Range": "bytes=0-0",
+                },
                 timeout=REQUESTS_TIMEOUT,
             ) as req:
-                req.raise_for_status()
+                size = _range_total_size(req)
+                if size is None:
+                    # gateway does not support ranges and sends whole file
+                    req.raise_for_status()
+                    self._write_response(req, file_path)
+                    return file_name
+                etag = req.headers.get("etag")
 
-                total_size_in_bytes = int(req.headers.get("content-length", 0))
-                chunk_size = 8192
-                progress_bar = tqdm(
-                    total=total_size_in_bytes, unit="iB", unit_scale=True
-                )
-                file_name = target_name or f"downloaded_{str(uuid.uuid4())[:8]}_{file}"
-                with open(os.path.join(download_location, file_name), "wb") as f:
-                    for chunk in req.iter_content(chunk_size=chunk_size):
-                        progress_bar.update(len(chunk))
-                        f.write(chunk)
-                progress_bar.close()
-                return file_name
+            _RangeDownload(
+                url=f"{self.host}/api/{self.version}/files/download/",
+                params={"file": file},
+                token=self._token,
+                file_path=file_path,
+                size=size,
+                etag=etag,
+            ).run(workers)
+            return file_name
+
+    @staticmethod
+    def _write_response(req: requests.Response, file_path: str) -> None:
+        total_size_in_bytes = int(req.headers.get("content-length", 0))
+        chunk_size = 8192
+        progress_bar = tqdm(total=total_size_in_bytes, unit="iB", unit_scale=True)
+        with open(file_path, "wb") as f:
+            for chunk in req.iter_content(chunk_size=chunk_size):
+                progress_bar.update(len(chunk))
+                f.write(chunk)
+        progress_bar.close()
 
     def upload(self, file: str) -> Optional[str]:
         """Uploads file."""
@@ -126,3 +174,164 @@ class GatewayFilesClient:
                 )
             )
         return response_data.get("message", "")
+
+
+def _range_total_size(response: requests.Response) -> Optional[int]:
+    """Returns size of file from partial response, None if ranges are not supported."""
+    if response.status_code not in (206, 416):
+        return None
+    match = re.fullmatch(
+        r"bytes (\d+-\d+|\*)/(\d+)", response.headers.get("content-range", "")
+    )
+    if match is None:
+        return None
+    return int(match.group(2))
+
+
+class _RangeDownload:  # pylint: disable=too-few-public-methods
+    """Resumable download of file in parallel byte ranges.
+
+    File is written into preallocated `.part` file and numbers of
+    completed ranges are stored in `.part.json` state file, so download
+    continues with missing ranges when it is restarted. Download starts
+    over if file changed on gateway.
+    """
+
+    def __init__(
+        self,
+        *,
+        url: str,
+        params: Dict[str, Any],
+        token: str,
+        file_path: str,
+        size: int,
+        etag: Optional[str],
+    ):
+        self.url = url
+        self.params = params
+        self.token = token
+        self.file_path = file_path
+        self.size = size
+        self.etag = etag
+        self.completed: List[int] = []
+        self._lock = threading.Lock()
+
+    @property
+    def part_path(self) -> str:
+        """Path of file being downloaded."""
+        return f"{self.file_path}.part"
+
+    @property
+    def state_path(self) -> str:
+        """Path of download state file."""
+        return f"{self.file_path}.part.json"
+
+    def run(self, workers: int) -> None:
+        """Downloads missing ranges of file."""
+        self._prepare()
+        parts = [
+            part
+            for part in range(-(-self.size // DOWNLOAD_PART_SIZE))
+            if part not in self.completed
+        ]
+        progress_bar = tqdm(
+            total=self.size,
+            initial=self.size - sum(self._part_length(part) for part in parts),
+            unit="iB",
+            unit_scale=True,
+        )
+        with ThreadPoolExecutor(max_workers=max(workers, 1)) as executor:
+            for _ in executor.map(
+                lambda part: self._download_part(part, progress_bar), parts
+            ):
+                pass
+        progress_bar.close()
+
+        os.replace(self.part_path, self.file_path)
+        os.remove(self.state_path)
+
+    def _prepare(self) -> None:
+        state = {}
+        if os.path.exists(self.state_path) and os.path.exists(self.part_path):
+            with open(self.state_path, "r", encoding="utf-8") as state_file:
+                state = json.load(state_file)
+        if (
+            self.etag is not None
+            and state.get("etag") == self.etag
+            and state.get("size") == self.size
+            and state.get("part_size") == DOWNLOAD_PART_SIZE
+        ):
+            self.completed = state.get("completed", [])
+            return
+
+        with open(self.part_path, "wb") as part_file:
+            part_file.truncate(self.size)
+        self.completed = []
+        self._save_state()
+
+    def _save_state(self) -> None:
+        tmp_path = f"{self.state_path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as state_file:
+            json.dump(
+                {
+                    "etag": self.etag,
+                    "size": self.size,
+                    "part_size": DOWNLOAD_PART_SIZE,
+                    "completed": sorted(self.completed),
+                },
+                state_file,
+            )
+        os.replace(tmp_path, self.state_path)
+
+    def _part_length(self, part: int) -> int:
+        return min(DOWNLOAD_PART_SIZE, self.size - part * DOWNLOAD_PART_SIZE)
+
+    def _download_part(self, part: int, progress_bar: tqdm) -> None:
+        start = part * DOWNLOAD_PART_SIZE
+        end = start + self._part_length(part) - 1
+        position = start
+        with open(self.part_path, "r+b") as part_file:
+            for attempt in range(DOWNLOAD_PART_RETRIES + 1):
+                headers = {
+                    "Authorization": f"Bearer {self.token}",
+                    "Range": f"bytes={position}-{end}",
+                }
+                if self.etag is not None:
+                    headers["If-Range"] = self.etag
+                try:
+                    with requests.get(
+                        self.url,
+                        params=self.params,
+                        stream=True,
+                        headers=headers,
+                        timeout=REQUESTS_TIMEOUT,
+                    ) as req:
+                        if req.status_code != 206:
+                            req.raise_for_status()
+                            raise QiskitServerlessException(
+                                f"File changed during download of [{self.file_path}]."
+                            )
+                        part_file.seek(position)
+                        for chunk in req.iter_content(chunk_size=64 * 1024):
+                            chunk = chunk[: end - position + 1]
+                            part_file.write(chunk)
+                            position += len(chunk)
+                            progress_bar.update(len(chunk))
+                except (
+                    requests.exceptions.ConnectionError,
+                    requests.exceptions.ChunkedEncodingError,
+                    requests.exceptions.Timeout,
+                ):
+                    # continues from last written byte
+                    if attempt == DOWNLOAD_PART_RETRIES:
+                        raise
+                if position > end:
+                    break
+            else:
+                raise QiskitServerlessException(
+                    f"Download of [{self.file_path}] was interrupted."
+                )
+
+        with self._lock:
+            self.completed.append(part)
+            self._save_state()
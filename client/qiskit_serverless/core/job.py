@@ -27,17 +27,22 @@ Qiskit Serverless job
     RuntimeEnv
     Job
 """
-# pylint: disable=duplicate-code
+# pylint: disable=duplicate-code,too-many-lines
+import fnmatch
+import hashlib
 import json
 import logging
 import os
 import re
 import tarfile
+import queue
+import threading
 import time
 import sys
 import warnings
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
-from typing import Dict, Any, Optional, List, Union
+from typing import Dict, Any, Iterator, Optional, List, Union
 from uuid import uuid4
 from dataclasses import asdict, dataclass
 
@@ -54,12 +59,14 @@ from qiskit_ibm_runtime import QiskitRuntimeService
 from qiskit_serverless.core.constants import (
     OT_PROGRAM_NAME,
     REQUESTS_TIMEOUT,
+    JOB_WAIT_TIMEOUT,
     ENV_JOB_GATEWAY_TOKEN,
     ENV_JOB_GATEWAY_HOST,
     ENV_JOB_ID_GATEWAY,
     ENV_GATEWAY_PROVIDER_VERSION,
     GATEWAY_PROVIDER_VERSION_DEFAULT,
     MAX_ARTIFACT_FILE_SIZE_MB,
+    ARTIFACT_IGNORE_FILE,
     ENV_JOB_ARGUMENTS,
 )
 
@@ -74,6 +81,10 @@ from qiskit_serverless.utils.formatting import format_provider_name_and_title
 
 RuntimeEnv = ray.runtime_env.RuntimeEnv
 
+TERMINAL_STATES = ["CANCELED", "DONE", "ERROR"]
+# max number of jobs in single bulk status request
+JOBS_STATUS_BATCH_SIZE = 1000
+
 
 @dataclass
 class Configuration:  # pylint: disable=too-many-instance-attributes
@@ -125,6 +136,10 @@ class BaseJobClient:
         """Check status."""
         raise NotImplementedError
 
+    def statuses(self, job_ids: List[str]) -> Dict[str, str]:
+        """Returns statuses of multiple jobs by job id."""
+        return {job_id: self.status(job_id) for job_id in job_ids}
+
     def stop(self, job_id: str, service: Optional[QiskitRuntimeService] = None):
         """Stops job/program."""
         raise NotImplementedError
@@ -137,6 +152,14 @@ class BaseJobClient:
         """Return filtered logs."""
         raise NotImplementedError
 
+    def stream_logs(self, job_id: str, offset: int = 0) -> Iterator[str]:
+        """Stream logs."""
+        raise NotImplementedError
+
+    def wait(self, job_id: str, timeout: Optional[float] = None) -> bool:
+        """Waits for job to finish, returns true if job is in terminal state."""
+        raise NotImplementedError
+
     def result(self, job_id: str):
         """Return results."""
         raise NotImplementedError
@@ -247,6 +270,9 @@ class LocalJobClient(BaseJobClient):
     def logs(self, job_id: str):
         return self._jobs[job_id]["logs"]
 
+    def stream_logs(self, job_id: str, offset: int = 0) -> Iterator[str]:
+        yield self._jobs[job_id]["logs"][offset:]
+
     def result(self, job_id: str):
         return self._jobs[job_id]["result"]
 
@@ -455,6 +481,24 @@ class GatewayJobClient(BaseJobClient):
 
         return response_data.get("status", default_status)
 
+    def statuses(self, job_ids: List[str]) -> Dict[str, str]:
+        tracer = trace.get_tracer("client.tracer")
+        with tracer.start_as_current_span("job.statuses"):
+            statuses = {}
+            for start in range(0, len(job_ids), JOBS_STATUS_BATCH_SIZE):
+                batch = job_ids[start : start + JOBS_STATUS_BATCH_SIZE]
+                response_data = safe_json_request(
+                    request=lambda batch=batch: requests.post(
+                        f"{self.host}/api/{self.version}/jobs/status/",
+                        headers={"Authorization": f"Bearer {self._token}"},
+                        json={"ids": batch},
+                        timeout=REQUESTS_TIMEOUT,
+                    )
+                )
+                for job in response_data.get("jobs", []):
+                    statuses[job.get("id")] = job.get("status")
+        return statuses
+
     def stop(self, job_id: str, service: Optional[QiskitRuntimeService] = None):
         tracer = trace.get_tracer("client.tracer")
         with tracer.start_as_current_span("job.stop"):
@@ -489,6 +533,38 @@ class GatewayJobClient(BaseJobClient):
             )
         return response_data.get("logs")
 
+    def stream_logs(self, job_id: str, offset: int = 0) -> Iterator[str]:
+        tracer = trace.get_tracer("client.tracer")
+        with tracer.start_as_current_span("job.stream_logs"):
+            finished = False
+            while not finished:
+                # gateway closes streams periodically, reconnect from last offset
+                with requests.get(
+                    f"{self.host}/api/{self.version}/jobs/{job_id}/logs/stream/",
+                    headers={
+                        "Authorization": f"Bearer {self._token}",
+                        "Accept": "text/event-stream",
+                    },
+                    params={"offset": offset},
+                    stream=True,
+                    timeout=REQUESTS_TIMEOUT,
+                ) as response:
+                    if not response.ok:
+                        raise QiskitServerlessException(
+                            f"Logs of job [{job_id}] can not be streamed: "
+                            f"{response.status_code} {response.reason}"
+                        )
+                    # event streams are always utf-8 encoded
+                    response.encoding = "utf-8"
+                    for event, event_id, data in _parse_server_sent_events(
+                        response.iter_content(chunk_size=None, decode_unicode=True)
+                    ):
+                        if event == "logs":
+                            offset = int(event_id)
+                            yield data
+                        elif event == "end":
+                            finished = True
+
     def filtered_logs(self, job_id: str, **kwargs):
         all_logs = self.logs(job_id=job_id)
         included = ""
@@ -510,6 +586,24 @@ class GatewayJobClient(BaseJobClient):
             excluded = included
         return excluded
 
+    def wait(self, job_id: str, timeout: Optional[float] = None) -> bool:
+        tracer = trace.get_tracer("client.tracer")
+        with tracer.start_as_current_span("job.wait"):
+            wait_timeout = JOB_WAIT_TIMEOUT
+            if timeout is not None:
+                wait_timeout = max(0, min(timeout, JOB_WAIT_TIMEOUT))
+            response = requests.get(
+                f"{self.host}/api/{self.version}/jobs/{job_id}/wait/",
+                headers={"Authorization": f"Bearer {self._token}"},
+                params={"timeout": wait_timeout},
+                timeout=wait_timeout + REQUESTS_TIMEOUT,
+            )
+            if _is_endpoint_missing(response):
+                # gateway does not support waiting for jobs
+                raise NotImplementedError
+            response_data = safe_json_request(request=lambda: response)
+        return response_data.get("terminal", False)
+
     def result(self, job_id: str):
         tracer = trace.get_tracer("client.tracer")
         with tracer.start_as_current_span("job.result"):
@@ -547,21 +641,64 @@ class GatewayJobClient(BaseJobClient):
         return job
 
     def list(self, **kwargs) -> List["Job"]:
+        limit = kwargs.get("limit", 10)
+        offset = kwargs.get("offset", 0)
+        response_data = self._jobs_page(
+            f"{self.host}/api/{self.version}/jobs/?limit={limit}&offset={offset}"
+        )
+        return [
+            Job(job.get("id"), job_client=self, raw_data=job)
+            for job in response_data.get("results", [])
+        ]
+
+    def iter_jobs(self, limit: int = 100, prefetch: bool = False) -> Iterator["Job"]:
+        """Yields jobs, newest first, requesting pages of jobs lazily.
+
+        Pages are read with cursor pagination, so jobs created during
+        iteration do not shift pages. Older gateways return offset pages.
+
+        Args:
+            limit: number of jobs in single page request
+            prefetch: request next page in background while current
+                page is being consumed
+
+        Returns:
+            iterator of jobs
+        """
+        executor = ThreadPoolExecutor(max_workers=1) if prefetch else None
+        try:
+            page = self._jobs_page(
+                f"{self.host}/api/{self.version}/jobs/?cursor=&limit={limit}"
+            )
+            while True:
+                next_url = page.get("next")
+                next_page = None
+                if executor is not None and next_url:
+                    next_page = executor.submit(self._jobs_page, next_url)
+                for job in page.get("results", []):
+                    yield Job(job.get("id"), job_client=self, raw_data=job)
+                if not next_url:
+                    return
+                page = (
+                    next_page.result()
+                    if next_page is not None
+                    else self._jobs_page(next_url)
+                )
+        finally:
+            if executor is not None:
+                executor.shutdown(wait=False, cancel_futures=True)
+
+    def _jobs_page(self, url: str) -> Dict[str, Any]:
+        """Returns page of jobs from url."""
         tracer = trace.get_tracer("client.tracer")
         with tracer.start_as_current_span("job.list"):
-            limit = kwargs.get("limit", 10)
-            offset = kwargs.get("offset", 0)
-            response_data = safe_json_request(
+            return safe_json_request(
                 request=lambda: requests.get(
-                    f"{self.host}/api/{self.version}/jobs/?limit={limit}&offset={offset}",
+                    url,
                     headers={"Authorization": f"Bearer {self._token}"},
                     timeout=REQUESTS_TIMEOUT,
                 )
             )
-        return [
-            Job(job.get("id"), job_client=self, raw_data=job)
-            for job in response_data.get("results", [])
-        ]
 
     def get_programs(self, **kwargs):
         tracer = trace.get_tracer("client.tracer")
@@ -629,10 +766,21 @@ class Job:
         self.job_id = job_id
         self._job_client = job_client
         self.raw_data = raw_data or {}
+        # terminal status never changes, so it is not requested again
+        self._terminal_status: Optional[str] = None
 
     def status(self):
         """Returns status of the job."""
-        return _map_status_to_serverless(self._job_client.status(self.job_id))
+        if self._terminal_status is not None:
+            return self._terminal_status
+        return self._update_status(self._job_client.status(self.job_id))
+
+    def _update_status(self, status: str) -> str:
+        """Maps job client status and remembers it if it is terminal."""
+        status = _map_status_to_serverless(status)
+        if status in TERMINAL_STATES:
+            self._terminal_status = status
+        return status
 
     def stop(self, service: Optional[QiskitRuntimeService] = None):
         """Stops the job from running."""
@@ -642,6 +790,23 @@ class Job:
         """Returns logs of the job."""
         return self._job_client.logs(self.job_id)
 
+    def stream_logs(self, offset: int = 0) -> Iterator[str]:
+        """Streams logs of the job line by line until the job is finished.
+
+        Example:
+            >>> for line in job.stream_logs():
+            >>>     print(line)
+
+        Args:
+            offset: position in logs to start streaming from
+        """
+        buffer = ""
+        for logs in self._job_client.stream_logs(self.job_id, offset=offset):
+            *lines, buffer = (buffer + logs).split("\n")
+            yield from lines
+        if buffer:
+            yield buffer
+
     def filtered_logs(self, **kwargs) -> str:
         """Returns logs of the job.
         Args:
@@ -656,19 +821,27 @@ class Job:
             wait: flag denoting whether to wait for the
                 job result to be populated before returning
             cadence: time to wait between checking if job has
-                been terminated
+                been terminated, when job client can not wait for
+                job completion notifications
             verbose: flag denoting whether to log a heartbeat
                 while waiting for job result to populate
+            maxwait: max number of cadences to wait for, 0 waits
+                until job is terminated
         """
         if wait:
             if verbose:
                 logging.info("Waiting for job result.")
-            count = 0
-            while not self.in_terminal_state() and (maxwait == 0 or count < maxwait):
-                count += 1
-                time.sleep(cadence)
-                if verbose:
-                    logging.info(count)
+            timeout = cadence * maxwait if maxwait else None
+            if not self._wait_for_terminal_state(timeout=timeout, verbose=verbose):
+                # job client can not wait for jobs, poll status instead
+                count = 0
+                while not self.in_terminal_state() and (
+                    maxwait == 0 or count < maxwait
+                ):
+                    count += 1
+                    time.sleep(cadence)
+                    if verbose:
+                        logging.info(count)
 
         # Retrieve the results. If they're string format, try to decode to a dictionary.
         results = self._job_client.result(self.job_id)
@@ -680,10 +853,32 @@ class Job:
 
         return results
 
+    def _wait_for_terminal_state(self, timeout: Optional[float], verbose: bool) -> bool:
+        """Waits for job to finish with job client.
+
+        Args:
+            timeout: max time to wait in seconds, waits until job is finished if not set
+            verbose: flag denoting whether to log a heartbeat while waiting
+
+        Returns:
+            False if job client does not support waiting for jobs
+        """
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            remaining = None if deadline is None else deadline - time.monotonic()
+            if remaining is not None and remaining <= 0:
+                return True
+            try:
+                if self._job_client.wait(self.job_id, timeout=remaining):
+                    return True
+            except NotImplementedError:
+                return False
+            if verbose:
+                logging.info("Job is not finished yet.")
+
     def in_terminal_state(self) -> bool:
         """Checks if job is in terminal state"""
-        terminal_states = ["CANCELED", "DONE", "ERROR"]
-        return self.status() in terminal_states
+        return self.status() in TERMINAL_STATES
 
     def __repr__(self):
         return f"<Job | {self.job_id}>"
@@ -757,9 +952,57 @@ def save_result(result: Dict[str, Any]):
     return response.ok
 
 
+def _parse_server_sent_events(chunks: Iterator[str]):
+    """Parses server-sent events.
+
+    Args:
+        chunks: chunks of event stream text
+
+    Returns:
+        tuples of event type, event id and data
+    """
+    event, event_id, data = "message", None, []
+    buffer = ""
+    for chunk in chunks:
+        *lines, buffer = (buffer + chunk).split("\n")
+        for line in lines:
+            if line == "":
+                if data:
+                    yield event, event_id, "\n".join(data)
+                event, data = "message", []
+            elif not line.startswith(":"):
+                # lines starting with colon are comments keeping connection alive
+                field, _, value = line.partition(":")
+                value = value[1:] if value.startswith(" ") else value
+                if field == "event":
+                    event = value
+                elif field == "id":
+                    event_id = value
+                elif field == "data":
+                    data.append(value)
+
+
+def _is_endpoint_missing(response: requests.Response) -> bool:
+    """Checks if gateway does not have endpoint of request.
+
+    Gateway answers with json also when requested object is not found,
+    while unknown urls get not found page.
+
+    Args:
+        response: response of gateway
+
+    Returns:
+        True if endpoint is not found
+    """
+    return response.status_code == 404 and "json" not in response.headers.get(
+        "Content-Type", ""
+    )
+
+
 def _map_status_to_serverless(status: str) -> str:
     """Map a status string from job client to the Qiskit terminology."""
     status_map = {
+        "PROVISIONING": "INITIALIZING",
         "PENDING": "INITIALIZING",
         "RUNNING": "RUNNING",
         "STOPPED": "CANCELED",
@@ -811,11 +1054,241 @@ def _upload_with_docker_image(
     return program_title
 
 
+def _read_ignore_patterns(working_dir: str) -> List[str]:
+    """Returns exclusion patterns of working dir ignore file."""
+    ignore_file_path = os.path.join(working_dir, ARTIFACT_IGNORE_FILE)
+    if not os.path.isfile(ignore_file_path):
+        return []
+    with open(ignore_file_path, "r", encoding="utf-8") as ignore_file:
+        lines = [line.strip() for line in ignore_file]
+    return [line for line in lines if line and not line.startswith("#")]
+
+
+def _is_ignored(path: str, is_dir: bool, patterns: List[str]) -> bool:
+    """Returns true if relative path matches any of exclusion patterns.
+
+    Patterns ending with `/` match only directories, patterns with `/`
+    match path relative to working dir, other patterns match file name.
+    """
+    for pattern in patterns:
+        if pattern.endswith("/"):
+            if not is_dir:
+                continue
+            pattern = pattern.rstrip("/")
+        if "/" in pattern:
+            if fnmatch.fnmatch(path, pattern.lstrip("/")):
+                return True
+        elif fnmatch.fnmatch(os.path.basename(path), pattern):
+            return True
+    return False
+
+
+def _artifact_files(working_dir: str) -> Dict[str, str]:
+    """Returns files of working dir not excluded by ignore file.
+
+    Args:
+        working_dir (str): function working dir
+
+    Returns:
+        Dict[str, str]: relative posix paths and full paths of files
+    """
+    patterns = _read_ignore_patterns(working_dir)
+    files = {}
+    for root, dirs, filenames in os.walk(working_dir):
+        relative_root = os.path.relpath(root, working_dir)
+        if relative_root == ".":
+            relative_root = ""
+        dirs[:] = sorted(
+            directory
+            for directory in dirs
+            if not _is_ignored(
+                Path(relative_root, directory).as_posix(), True, patterns
+            )
+        )
+        for filename in sorted(filenames):
+            path = Path(relative_root, filename).as_posix()
+            if not _is_ignored(path, False, patterns):
+                files[path] = os.path.join(root, filename)
+    return files
+
+
+def _file_sha256(path: str) -> str:
+    """Returns sha256 hex digest of file content."""
+    digest = hashlib.sha256()
+    with open(path, "rb") as file:
+        for chunk in iter(lambda: file.read(1024 * 1024), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+# size in bytes of chunks of streamed archives
+ARCHIVE_CHUNK_SIZE = 1024**2
+
+
+class _ArchiveCancelled(Exception):
+    """Archive is not read anymore."""
+
+
+class _ChunkWriter:
+    """File-like object passing written data to queue in chunks."""
+
+    def __init__(self, chunks: queue.Queue, cancelled: threading.Event):
+        self._chunks = chunks
+        self._cancelled = cancelled
+        self._buffer = bytearray()
+
+    def write(self, data: bytes) -> int:
+        """Buffers data and passes full chunks to queue."""
+        self._buffer += data
+        if len(self._buffer) >= ARCHIVE_CHUNK_SIZE:
+            self.flush()
+        return len(data)
+
+    def flush(self) -> None:
+        """Passes buffered data to queue."""
+        if not self._buffer:
+            return
+        self._put(bytes(self._buffer))
+        self._buffer.clear()
+
+    def end(self) -> None:
+        """Marks end of data in queue."""
+        self._put(None)
+
+    def _put(self, chunk: Optional[bytes]) -> None:
+        while True:
+            try:
+                self._chunks.put(chunk, timeout=0.1)
+                return
+            except queue.Full as full:
+                if self._cancelled.is_set():
+                    raise _ArchiveCancelled from full
+
+
+def _stream_archive(files: Dict[str, str]) -> Iterator[bytes]:
+    """Yields chunks of gzip compressed tar of files while it is being built.
+
+    Archive is written by background thread and only few chunks
+    of it are kept in memory at once.
+
+    Args:
+        files (Dict[str, str]): archive names and paths of files
+
+    Returns:
+        Iterator[bytes]: chunks of archive
+    """
+    chunks: queue.Queue = queue.Queue(maxsize=4)
+    cancelled = threading.Event()
+    errors: List[Exception] = []
+
+    def write_archive():
+        writer = _ChunkWriter(chunks, cancelled)
+        try:
+            with tarfile.open(fileobj=writer, mode="w|gz") as tar:
+                for name, path in files.items():
+                    tar.add(path, arcname=name)
+            writer.flush()
+        except Exception as error:  # pylint: disable=broad-exception-caught
+            errors.append(error)
+        try:
+            writer.end()
+        except _ArchiveCancelled:
+            pass
+
+    thread = threading.Thread(target=write_archive, daemon=True)
+    thread.start()
+    try:
+        while True:
+            chunk = chunks.get()
+            if chunk is None:
+                break
+            yield chunk
+    finally:
+        cancelled.set()
+        thread.join()
+    if errors:
+        raise errors[0]
+
+
+def _stream_multipart(
+    boundary: str,
+    fields: Dict[str, Any],
+    file_field: str,
+    filename: str,
+    content: Iterator[bytes],
+) -> Iterator[bytes]:
+    """Yields multipart form data body with single file streamed from content.
+
+    Args:
+        boundary (str): boundary of form parts
+        fields (Dict[str, Any]): form fields, fields with `None` value are skipped
+        file_field (str): name of file field
+        filename (str): name of file
+        content (Iterator[bytes]): chunks of file content
+
+    Returns:
+        Iterator[bytes]: chunks of body
+    """
+    for name, value in fields.items():
+        if value is None:
+            continue
+        yield (
+            f"--{boundary}\r\n"
+            f'Content-Disposition: form-data; name="{name}"\r\n\r\n'
+            f"{value}\r\n"
+        ).encode()
+    yield (
+        f"--{boundary}\r\n"
+        f'Content-Disposition: form-data; name="{file_field}"; filename="{filename}"\r\n'
+        "Content-Type: application/octet-stream\r\n\r\n"
+    ).encode()
+    yield from content
+    yield f"\r\n--{boundary}--\r\n".encode()
+
+
+def _post_archive(
+    url: str,
+    *,
+    fields: Dict[str, Any],
+    file_field: str,
+    filename: str,
+    files: Dict[str, str],
+    token: str,
+) -> requests.Response:
+    """Posts form with archive of files streamed while it is being built.
+
+    Body is sent with chunked transfer encoding, so archive is neither
+    written to disk nor kept in memory.
+    """
+    boundary = uuid4().hex
+    body = _stream_multipart(
+        boundary, fields, file_field, filename, _stream_archive(files)
+    )
+    try:
+        return requests.post(
+            url=url,
+            data=body,
+            headers={
+                "Authorization": f"Bearer {token}",
+                "Content-Type": f"multipart/form-data; boundary={boundary}",
+            },
+            timeout=REQUESTS_TIMEOUT,
+        )
+    finally:
+        # stops archive writer if request ended before reading whole body
+        body.close()
+
+
 def _upload_with_artifact(
     program: QiskitFunction, url: str, token: str, span: Any
 ) -> str:
     """Uploads function with artifact.
 
+    Client sends manifest of sha256 of working dir files and gateway answers
+    with hashes of files it does not have yet, so only changed files are uploaded
+    in compressed archive. Files matching patterns of `.serverlessignore`
+    are not uploaded. Gateways without incremental upload get whole artifact.
+
     Args:
         program (QiskitFunction): function instance
         url (str): endpoint for gateway upload
@@ -828,8 +1301,6 @@ def _upload_with_artifact(
     Returns:
         str: uploaded function name
     """
-    artifact_file_path = os.path.join(program.working_dir, "artifact.tar")
-
     # check if entrypoint exists
     if (
         not os.path.exists(os.path.join(program.working_dir, program.entrypoint))
@@ -840,47 +1311,70 @@ def _upload_with_artifact(
             f"in [{program.working_dir}] working directory."
         )
 
+    files = _artifact_files(program.working_dir)
+
+    # check size of files
+    size_in_mb = sum(os.path.getsize(path) for path in files.values()) / 1024**2
+    if size_in_mb > MAX_ARTIFACT_FILE_SIZE_MB:
+        raise QiskitServerlessException(
+            f"{program.working_dir} is {int(size_in_mb)} Mb, "
+            f"which is greater than {MAX_ARTIFACT_FILE_SIZE_MB} allowed. "
+            f"Try to reduce size of `working_dir`."
+        )
+
+    data = {
+        "title": program.title,
+        "provider": program.provider,
+        "entrypoint": program.entrypoint,
+        "arguments": json.dumps({}),
+        "dependencies": json.dumps(program.dependencies or []),
+        "env_vars": json.dumps(program.env_vars or {}),
+        "description": program.description,
+    }
+
     try:
-        with tarfile.open(artifact_file_path, "w") as tar:
-            for filename in os.listdir(program.working_dir):
-                fpath = os.path.join(program.working_dir, filename)
-                tar.add(fpath, arcname=filename)
-
-        # check file size
-        size_in_mb = Path(artifact_file_path).stat().st_size / 1024**2
-        if size_in_mb > MAX_ARTIFACT_FILE_SIZE_MB:
-            raise QiskitServerlessException(
-                f"{artifact_file_path} is {int(size_in_mb)} Mb, "
-                f"which is greater than {MAX_ARTIFACT_FILE_SIZE_MB} allowed. "
-                f"Try to reduce size of `working_dir`."
-            )
+        manifest = {name: _file_sha256(path) for name, path in files.items()}
+        incremental_data = {**data, "manifest": json.dumps(manifest)}
+        response = requests.post(
+            url=f"{url}incremental/",
+            data=incremental_data,
+            headers={"Authorization": f"Bearer {token}"},
+            timeout=REQUESTS_TIMEOUT,
+        )
 
-        with open(artifact_file_path, "rb") as file:
-            response_data = safe_json_request(
-                request=lambda: requests.post(
-                    url=url,
-                    data={
-                        "title": program.title,
-                        "provider": program.provider,
-                        "entrypoint": program.entrypoint,
-                        "arguments": json.dumps({}),
-                        "dependencies": json.dumps(program.dependencies or []),
-                        "env_vars": json.dumps(program.env_vars or {}),
-                        "description": program.description,
-                    },
-                    files={"artifact": file},
-                    headers={"Authorization": f"Bearer {token}"},
-                    timeout=REQUESTS_TIMEOUT,
-                )
+        if response.status_code == 409:
+            # upload only files gateway does not have
+            missing = set(response.json().get("missing", []))
+            blobs = {
+                file_hash: files[name]
+                for name, file_hash in manifest.items()
+                if file_hash in missing
+            }
+            span.set_attribute("program.uploaded_files", len(blobs))
+            response = _post_archive(
+                url=f"{url}incremental/",
+                fields=incremental_data,
+                file_field="blobs",
+                filename="blobs.tar.gz",
+                files=blobs,
+                token=token,
+            )
+        elif _is_endpoint_missing(response):
+            # gateway does not support incremental upload
+            response = _post_archive(
+                url=url,
+                fields=data,
+                file_field="artifact",
+                filename="artifact.tar",
+                files=files,
+                token=token,
             )
-            program_title = response_data.get("title", "na")
-            program_provider = response_data.get("provider", "na")
-            span.set_attribute("program.title", program_title)
-            span.set_attribute("program.provider", program_provider)
+
+        response_data = safe_json_request(request=lambda: response)
+        program_title = response_data.get("title", "na")
+        span.set_attribute("program.title", program_title)
+        span.set_attribute("program.provider", response_data.get("provider", "na"))
     except Exception as error:  # pylint: disable=broad-exception-caught
         raise QiskitServerlessException from error
-    finally:
-        if os.path.exists(artifact_file_path):
-            os.remove(artifact_file_path)
 
     return program_title
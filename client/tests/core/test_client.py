@@ -0,0 +1,95 @@
+"""Tests client."""
+from unittest import TestCase
+
+import requests_mock
+
+from qiskit_serverless import ServerlessClient
+from qiskit_serverless.core.job import Job
+
+
+class TestServerlessClient(TestCase):
+    """TestServerlessClient."""
+
+    def test_as_completed(self):
+        """Tests jobs are yielded as they finish with bulk status requests."""
+        with requests_mock.Mocker() as mocker:
+            mocker.get("https://host/api/v1/programs/", json=[])
+            mocker.post(
+                "https://host/api/v1/jobs/status/",
+                [
+                    {
+                        "json": {
+                            "jobs": [
+                                {"id": "job-1", "status": "RUNNING"},
+                                {"id": "job-2", "status": "SUCCEEDED"},
+                            ]
+                        }
+                    },
+                    {"json": {"jobs": [{"id": "job-1", "status": "FAILED"}]}},
+                ],
+            )
+            client = ServerlessClient(host="https://host", token="token")
+            job_client = client._job_client  # pylint: disable=protected-access
+            jobs = [Job("job-1", job_client), Job("job-2", job_client)]
+
+            completed = list(client.as_completed(jobs, cadence=0))
+
+            self.assertEqual([job.job_id for job in completed], ["job-2", "job-1"])
+            self.assertEqual(
+                [request.json() for request in mocker.request_history[1:]],
+                [{"ids": ["job-1", "job-2"]}, {"ids": ["job-1"]}],
+            )
+            # terminal statuses are remembered
+            self.assertEqual([job.status() for job in jobs], ["ERROR", "DONE"])
+            self.assertEqual(client.wait_all(jobs), jobs)
+            # finished jobs are not requested again
+            self.assertEqual(len(mocker.request_history), 3)
+
+    def test_wait_all_timeout(self):
+        """Tests waiting for jobs fails after timeout."""
+        with requests_mock.Mocker() as mocker:
+            mocker.get("https://host/api/v1/programs/", json=[])
+            mocker.post(
+                "https://host/api/v1/jobs/status/",
+                json={"jobs": [{"id": "job-1", "status": "RUNNING"}]},
+            )
+            client = ServerlessClient(host="https://host", token="token")
+            job_client = client._job_client  # pylint: disable=protected-access
+            with self.assertRaises(TimeoutError):
+                client.wait_all([Job("job-1", job_client)], cadence=0, timeout=0)
+
+    def test_iter_jobs(self):
+        """Tests jobs are iterated following cursor pages."""
+        pages = {
+            "": {
+                "next": "https://host/api/v1/jobs/?cursor=page-2&limit=2",
+                "results": [{"id": "job-4"}, {"id": "job-3"}],
+            },
+            "page-2": {
+                "next": "https://host/api/v1/jobs/?cursor=page-3&limit=2",
+                "results": [{"id": "job-2"}, {"id": "job-1"}],
+            },
+            "page-3": {"next": None, "results": [{"id": "job-0"}]},
+        }
+
+        def jobs_page(request, context):  # pylint: disable=unused-argument
+            return pages[request.qs["cursor"][0] if request.qs["cursor"] else ""]
+
+        for prefetch in [False, True]:
+            with requests_mock.Mocker() as mocker:
+                mocker.get("https://host/api/v1/programs/", json=[])
+                mocker.get("https://host/api/v1/jobs/", json=jobs_page)
+                client = ServerlessClient(host="https://host", token="token")
+
+                jobs = client.iter_jobs(limit=2, prefetch=prefetch)
+                self.assertEqual(next(jobs).job_id, "job-4")
+                self.assertEqual(
+                    [job.job_id for job in jobs], ["job-3", "job-2", "job-1", "job-0"]
+                )
+                jobs_requests = [
+                    request
+                    for request in mocker.request_history
+                    if request.path == "/api/v1/jobs/"
+                ]
+                self.assertEqual(len(jobs_requests), 3)
+                self.assertEqual(jobs_requests[0].qs, {"cursor": [""], "limit": ["2"]})
@@ -0,0 +1,92 @@
+"""Tests files client."""
+import os
+import re
+import tempfile
+from unittest import TestCase
+from unittest.mock import patch
+
+import requests
+import requests_mock
+
+from qiskit_serverless.core.files import GatewayFilesClient
+
+URL = "https://host/api/v1/files/download/"
+
+
+def ranged_file(content: bytes, etag: str = '"v1"', fail_after: int = 0):
+    """Returns response callback serving byte ranges of content."""
+    requests_served = []
+
+    def callback(request, context):
+        requests_served.append(request.headers["Range"])
+        start, end = map(
+            int, re.fullmatch(r"bytes=(\d+)-(\d+)", request.headers["Range"]).groups()
+        )
+        end = min(end, len(content) - 1)
+        if fail_after and len(requests_served) == fail_after:
+            raise requests.exceptions.ConnectionError("connection dropped")
+        context.status_code = 206
+        context.headers["Content-Range"] = f"bytes {start}-{end}/{len(content)}"
+        context.headers["ETag"] = etag
+        return content[start : end + 1]
+
+    return callback, requests_served
+
+
+class TestFiles(TestCase):
+    """Tests files client."""
+
+    def setUp(self):
+        self.location = tempfile.mkdtemp()
+        self.client = GatewayFilesClient("https://host", "token", "v1")
+
+    def read(self, name: str) -> bytes:
+        """Returns content of downloaded file."""
+        with open(os.path.join(self.location, name), "rb") as file:
+            return file.read()
+
+    @patch("qiskit_serverless.core.files.DOWNLOAD_PART_SIZE", 10)
+    def test_parallel_download(self):
+        """Tests file is downloaded in parallel ranges."""
+        content = os.urandom(95)
+        callback, served = ranged_file(content)
+        with requests_mock.Mocker() as mocker:
+            mocker.get(URL, content=callback)
+            name = self.client.download("result.h5", self.location, "result.h5", 4)
+
+        self.assertEqual(self.read(name), content)
+        # probe and 10 ranges
+        self.assertEqual(len(served), 11)
+        self.assertIn("bytes=90-94", served)
+        self.assertEqual(os.listdir(self.location), ["result.h5"])
+
+    @patch("qiskit_serverless.core.files.DOWNLOAD_PART_SIZE", 10)
+    @patch("qiskit_serverless.core.files.DOWNLOAD_PART_RETRIES", 0)
+    def test_resumed_download(self):
+        """Tests interrupted download continues with missing ranges."""
+        content = os.urandom(50)
+        callback, served = ranged_file(content, fail_after=4)
+        with requests_mock.Mocker() as mocker:
+            mocker.get(URL, content=callback)
+            with self.assertRaises(requests.exceptions.ConnectionError):
+                self.client.download("result.h5", self.location, "result.h5")
+        self.assertIn("result.h5.part", os.listdir(self.location))
+
+        callback, served = ranged_file(content)
+        with requests_mock.Mocker() as mocker:
+            mocker.get(URL, content=callback)
+            self.client.download("result.h5", self.location, "result.h5")
+
+        self.assertEqual(self.read("result.h5"), content)
+        # ranges completed before interruption are not downloaded again
+        self.assertEqual(served[:2], ["bytes=0-0", "bytes=20-29"])
+        self.assertNotIn("bytes=0-9", served)
+        self.assertNotIn("bytes=10-19", served)
+
+    def test_download_without_ranges(self):
+        """Tests gateways without range support send whole file."""
+        with requests_mock.Mocker() as mocker:
+            mocker.get(URL, content=b"content")
+            name = self.client.download("result.h5", self.location)
+
+        self.assertEqual(self.read(name), b"content")
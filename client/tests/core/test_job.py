@@ -1,7 +1,14 @@
 """Tests job."""
+import hashlib
+import io
+import json
 import os
+import tarfile
+import tempfile
+from email.parser import BytesParser
 from unittest import TestCase
-from unittest.mock import MagicMock
+from unittest.mock import MagicMock, patch
+from urllib.parse import parse_qs
 
 import numpy as np
 import requests_mock
@@ -13,7 +20,35 @@ from qiskit_serverless.core.constants import (
     ENV_JOB_ID_GATEWAY,
     ENV_JOB_GATEWAY_TOKEN,
 )
-from qiskit_serverless.core.job import save_result, GatewayJobClient
+from qiskit_serverless.core.function import QiskitFunction
+from qiskit_serverless.core.job import (
+    save_result,
+    GatewayJobClient,
+    Job,
+    _stream_archive,
+)
+from qiskit_serverless.exception import QiskitServerlessException
+
+
+def read_form(forms: list, response: dict):
+    """Returns response callback collecting fields of streamed multipart forms."""
+
+    def callback(request, context):  # pylint: disable=unused-argument
+        body = b"".join(request.body)
+        message = BytesParser().parsebytes(
+            f"Content-Type: {request.headers['Content-Type']}\r\n\r\n".encode() + body
+        )
+        forms.append(
+            {
+                part.get_param("name", header="content-disposition"): part.get_payload(
+                    decode=True
+                )
+                for part in message.get_payload()
+            }
+        )
+        return response
+
+    return callback
 
 
 class TestJob(TestCase):
@@ -55,3 +90,219 @@ class TestJob(TestCase):
         assert "This is the line 1\n" == client.filtered_logs(
             "id", include="This is the l.+", exclude="the.+a.+l"
         )
+
+    def test_stream_logs(self):
+        """Tests job logs streaming reconnects from last offset."""
+        client = GatewayJobClient("https://host", "token", "v1")
+        url = "https://host/api/v1/jobs/id/logs/stream/"
+        with requests_mock.Mocker() as mocker:
+            mocker.get(
+                url,
+                [
+                    {
+                        "text": "event: logs\nid: 13\ndata: first line\ndata: sec\n\n:\n\n"
+                    },
+                    {
+                        "text": "event: logs\nid: 31\ndata: ond line\ndata: last line\n\n"
+                        "event: end\ndata: SUCCEEDED\n\n"
+                    },
+                ],
+            )
+            job = Job("id", job_client=client)
+            self.assertEqual(
+                list(job.stream_logs()), ["first line", "second line", "last line"]
+            )
+            self.assertEqual(mocker.request_history[0].qs, {"offset": ["0"]})
+            self.assertEqual(mocker.request_history[1].qs, {"offset": ["13"]})
+
+    def test_result_waits_for_job(self):
+        """Tests job result uses wait endpoint instead of polling status."""
+        client = GatewayJobClient("https://host", "token", "v1")
+        with requests_mock.Mocker() as mocker:
+            mocker.get(
+                "https://host/api/v1/jobs/id/wait/",
+                [
+                    {"json": {"id": "id", "status": "RUNNING", "terminal": False}},
+                    {"json": {"id": "id", "status": "SUCCEEDED", "terminal": True}},
+                ],
+            )
+            mocker.get(
+                "https://host/api/v1/jobs/id/",
+                json={"id": "id", "status": "SUCCEEDED", "result": '{"answer": 42}'},
+            )
+            job = Job("id", job_client=client)
+            self.assertEqual(job.result(), {"answer": 42})
+            self.assertEqual(
+                [request.path for request in mocker.request_history],
+                ["/api/v1/jobs/id/wait/", "/api/v1/jobs/id/wait/", "/api/v1/jobs/id/"],
+            )
+
+    def test_result_polls_without_wait_endpoint(self):
+        """Tests job result falls back to polling on older gateways."""
+        client = GatewayJobClient("https://host", "token", "v1")
+        with requests_mock.Mocker() as mocker:
+            mocker.get("https://host/api/v1/jobs/id/wait/", status_code=404)
+            mocker.get(
+                "https://host/api/v1/jobs/id/",
+                json={"id": "id", "status": "SUCCEEDED", "result": '{"answer": 42}'},
+            )
+            job = Job("id", job_client=client)
+            self.assertEqual(job.result(cadence=0), {"answer": 42})
+
+    def test_result_of_missing_job(self):
+        """Tests job result raises if job is not found."""
+        client = GatewayJobClient("https://host", "token", "v1")
+        with requests_mock.Mocker() as mocker:
+            mocker.get(
+                "https://host/api/v1/jobs/id/wait/",
+                status_code=404,
+                json={"detail": "No Job matches the given query."},
+                headers={"Content-Type": "application/json"},
+            )
+            job = Job("id", job_client=client)
+            with self.assertRaises(QiskitServerlessException):
+                job.result()
+            self.assertEqual(len(mocker.request_history), 1)
+
+    def test_status_is_cached_when_terminal(self):
+        """Tests terminal status of job is not requested again."""
+        client = GatewayJobClient("https://host", "token", "v1")
+        client.status = MagicMock(side_effect=["RUNNING", "SUCCEEDED", "FAILED"])
+        job = Job("id", job_client=client)
+        self.assertFalse(job.in_terminal_state())
+        self.assertTrue(job.in_terminal_state())
+        self.assertEqual(job.status(), "DONE")
+        self.assertEqual(client.status.call_count, 2)
+
+    def test_upload_sends_only_missing_files(self):
+        """Tests function upload sends manifest and only missing files."""
+        client = GatewayJobClient("https://host", "token", "v1")
+        url = "https://host/api/v1/programs/upload/incremental/"
+        with tempfile.TemporaryDirectory() as working_dir:
+            for path, content in {
+                "main.py": "print('hello')",
+                "data/input.json": "{}",
+                "data/cache.tmp": "temporary",
+                ".venv/lib.py": "x = 1",
+                ".serverlessignore": "# local files\n*.tmp\n.venv/\n",
+            }.items():
+                os.makedirs(
+                    os.path.dirname(os.path.join(working_dir, path)), exist_ok=True
+                )
+                with open(
+                    os.path.join(working_dir, path), "w", encoding="utf-8"
+                ) as file:
+                    file.write(content)
+            main_hash = hashlib.sha256(b"print('hello')").hexdigest()
+
+            with requests_mock.Mocker() as mocker:
+                forms = []
+                mocker.post(
+                    url,
+                    [
+                        {"status_code": 409, "json": {"missing": [main_hash]}},
+                        {"json": read_form(forms, {"title": "function"})},
+                    ],
+                )
+                function = QiskitFunction(
+                    "function", entrypoint="main.py", working_dir=working_dir
+                )
+                self.assertEqual(client.upload(function), "function")
+
+                first = mocker.request_history[0]
+                manifest = json.loads(parse_qs(first.text)["manifest"][0])
+                self.assertEqual(
+                    sorted(manifest),
+                    [".serverlessignore", "data/input.json", "main.py"],
+                )
+                self.assertEqual(manifest["main.py"], main_hash)
+                self.assertEqual(json.loads(forms[0]["manifest"]), manifest)
+                with tarfile.open(fileobj=io.BytesIO(forms[0]["blobs"])) as tar:
+                    self.assertEqual(tar.getnames(), [main_hash])
+                    self.assertEqual(
+                        tar.extractfile(main_hash).read(), b"print('hello')"
+                    )
+
+            self.assertEqual(
+                sorted(os.listdir(working_dir)),
+                [".serverlessignore", ".venv", "data", "main.py"],
+            )
+
+    def test_upload_without_incremental_endpoint(self):
+        """Tests function upload sends whole artifact to older gateways."""
+        client = GatewayJobClient("https://host", "token", "v1")
+        with tempfile.TemporaryDirectory() as working_dir:
+            with open(
+                os.path.join(working_dir, "main.py"), "w", encoding="utf-8"
+            ) as file:
+                file.write("print('hello')")
+
+            with requests_mock.Mocker() as mocker:
+                mocker.post(
+                    "https://host/api/v1/programs/upload/incremental/",
+                    status_code=404,
+                )
+                forms = []
+                mocker.post(
+                    "https://host/api/v1/programs/upload/",
+                    json=read_form(forms, {"title": "function"}),
+                )
+                function = QiskitFunction(
+                    "function", entrypoint="main.py", working_dir=working_dir
+                )
+                self.assertEqual(client.upload(function), "function")
+
+                self.assertEqual(
+                    mocker.request_history[1].headers["Transfer-Encoding"], "chunked"
+                )
+                self.assertEqual(forms[0]["entrypoint"], b"main.py")
+                with tarfile.open(fileobj=io.BytesIO(forms[0]["artifact"])) as tar:
+                    self.assertEqual(tar.getnames(), ["main.py"])
+
+    def test_upload_to_missing_provider(self):
+        """Tests function upload fails if provider is not found."""
+        client = GatewayJobClient("https://host", "token", "v1")
+        with tempfile.TemporaryDirectory() as working_dir:
+            with open(
+                os.path.join(working_dir, "main.py"), "w", encoding="utf-8"
+            ) as file:
+                file.write("print('hello')")
+
+            with requests_mock.Mocker() as mocker:
+                mocker.post(
+                    "https://host/api/v1/programs/upload/incremental/",
+                    status_code=404,
+                    json={"message": "Provider [provider] was not found."},
+                    headers={"Content-Type": "application/json"},
+                )
+                function = QiskitFunction(
+                    "function",
+                    entrypoint="main.py",
+                    working_dir=working_dir,
+                    provider="provider",
+                )
+                with self.assertRaises(QiskitServerlessException):
+                    client.upload(function)
+                self.assertEqual(len(mocker.request_history), 1)
+
+    def test_stream_archive(self):
+        """Tests archive is streamed in chunks while it is being built."""
+        with tempfile.TemporaryDirectory() as working_dir:
+            files = {}
+            for index in range(3):
+                path = os.path.join(working_dir, f"data_{index}.bin")
+                with open(path, "wb") as file:
+                    file.write(os.urandom(1024))
+                files[f"data_{index}.bin"] = path
+
+            with patch("qiskit_serverless.core.job.ARCHIVE_CHUNK_SIZE", 512):
+                chunks = list(_stream_archive(files))
+
+            self.assertGreater(len(chunks), 1)
+            with tarfile.open(fileobj=io.BytesIO(b"".join(chunks))) as tar:
+                self.assertEqual(tar.getnames(), sorted(files))
+
+            # reading archive can be stopped before its end
+            archive = _stream_archive(files)
+            next(archive)
+            archive.close()
@@ -0,0 +1,173 @@
+"""Programs accessible by users.
+
+Access of users to programs through groups is materialized in
+`ProgramAccess` rows, which are refreshed when groups of programs,
+permissions of groups or memberships of users change.
+"""
+
+from typing import Iterable, Optional
+
+from django.contrib.auth import get_user_model
+from django.contrib.auth.models import Group
+from django.db import transaction
+from django.db.models import Q, QuerySet
+from django.db.models.signals import m2m_changed, post_delete, pre_delete
+from django.dispatch import receiver
+
+from api.models import (
+    RUN_PROGRAM_PERMISSION,
+    VIEW_PROGRAM_PERMISSION,
+    Program,
+    ProgramAccess,
+)
+
+User = get_user_model()
+
+# only permissions checked for programs are materialized
+PROGRAM_ACCESS_PERMISSIONS = [VIEW_PROGRAM_PERMISSION, RUN_PROGRAM_PERMISSION]
+
+
+def accessible_programs(user, permission_codename: str) -> QuerySet:
+    """Returns programs user is author of or can access through groups.
+
+    Access through groups is read from `ProgramAccess` rows of user,
+    instead of joining groups, their permissions and memberships.
+
+    Args:
+        user: user to get programs for
+        permission_codename: codename of permission groups of user
+            must have for programs, one of `PROGRAM_ACCESS_PERMISSIONS`
+
+    Returns:
+        queryset of programs
+    """
+    return Program.objects.filter(
+        Q(author=user)
+        | Q(access__user=user, access__permission__codename=permission_codename)
+    ).distinct()
+
+
+def refresh_program_access(
+    user_ids: Optional[Iterable[int]] = None,
+    program_ids: Optional[Iterable] = None,
+) -> None:
+    """Recomputes access rows of users or programs from their groups.
+
+    Args:
+        user_ids: ids of users to refresh access of
+        program_ids: ids of programs to refresh access to
+    """
+    # conditions on groups are in single filter, so they apply to the same
+    # membership and permission rows which are read
+    if user_ids is not None:
+        user_ids = list(user_ids)
+        scope = Q(user_id__in=user_ids)
+        grants = Program.instances.through.objects.filter(
+            group__permissions__codename__in=PROGRAM_ACCESS_PERMISSIONS,
+            group__user__in=user_ids,
+        )
+    else:
+        program_ids = list(program_ids or [])
+        scope = Q(program_id__in=program_ids)
+        grants = Program.instances.through.objects.filter(
+            group__permissions__codename__in=PROGRAM_ACCESS_PERMISSIONS,
+            group__user__isnull=False,
+            program_id__in=program_ids,
+        )
+
+    with transaction.atomic():
+        ProgramAccess.objects.filter(scope).delete()
+        ProgramAccess.objects.bulk_create(
+            [
+                ProgramAccess(
+                    program_id=program_id, user_id=user_id, permission_id=permission_id
+                )
+                for program_id, user_id, permission_id in grants.values_list(
+                    "program_id", "group__user", "group__permissions"
+                ).distinct()
+            ],
+            ignore_conflicts=True,
+        )
+
+
+def _changed_ids(instance, action: str, reverse: bool, pk_set, related_ids):
+    """Returns ids of forward side objects of changed many to many relation.
+
+    Related objects of cleared reverse relation are not known after clear,
+    so they are read on `pre_clear` and kept on instance.
+    """
+    if action == "pre_clear":
+        if reverse:
+            instance._access_cleared_ids = list(  # pylint: disable=protected-access
+                related_ids()
+            )
+        return None
+    if not action.startswith("post_"):
+        return None
+    if not reverse:
+        return [instance.pk]
+    if action == "post_clear":
+        return getattr(instance, "_access_cleared_ids", [])
+    return list(pk_set)
+
+
+@receiver(m2m_changed, sender=Program.instances.through)
+def _program_groups_changed(
+    sender, instance, action, reverse, pk_set, **kwargs
+):  # pylint: disable=unused-argument,too-many-arguments
+    program_ids = _changed_ids(
+        instance,
+        action,
+        reverse,
+        pk_set,
+        lambda: instance.program_set.values_list("id", flat=True),
+    )
+    if program_ids is not None:
+        refresh_program_access(program_ids=program_ids)
+
+
+@receiver(m2m_changed, sender=User.groups.through)
+def _user_groups_changed(
+    sender, instance, action, reverse, pk_set, **kwargs
+):  # pylint: disable=unused-argument,too-many-arguments
+    user_ids = _changed_ids(
+        instance,
+        action,
+        reverse,
+        pk_set,
+        lambda: instance.user_set.values_list("id", flat=True),
+    )
+    if user_ids is not None:
+        refresh_program_access(user_ids=user_ids)
+
+
+@receiver(m2m_changed, sender=Group.permissions.through)
+def _group_permissions_changed(
+    sender, instance, action, reverse, pk_set, **kwargs
+):  # pylint: disable=unused-argument,too-many-arguments
+    group_ids = _changed_ids(
+        instance,
+        action,
+        reverse,
+        pk_set,
+        lambda: instance.group_set.values_list("id", flat=True),
+    )
+    if group_ids is not None:
+        refresh_program_access(
+            user_ids=User.objects.filter(groups__in=group_ids)
+            .values_list("id", flat=True)
+            .distinct()
+        )
+
+
+@receiver(pre_delete, sender=Group)
+def _group_deleting(sender, instance, **kwargs):  # pylint: disable=unused-argument
+    # memberships are removed with group without m2m signals
+    instance._access_user_ids = list(  # pylint: disable=protected-access
+        instance.user_set.values_list("id", flat=True)
+    )
+
+
+@receiver(post_delete, sender=Group)
+def _group_deleted(sender, instance, **kwargs):  # pylint: disable=unused-argument
+    refresh_program_access(user_ids=getattr(instance, "_access_user_ids", []))
@@ -8,3 +8,12 @@ class ApiConfig(AppConfig):
 
     default_auto_field = "django.db.models.BigAutoField"
     name = "api"
+
+    def ready(self):
+        # registers system check of files serving settings and receivers
+        # of job logs notifications and program access updates
+        from api import (  # pylint: disable=import-outside-toplevel,unused-import
+            access,
+            file_serving,
+            notifications,
+        )
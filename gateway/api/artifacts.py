@@ -0,0 +1,333 @@
+"""Content addressed store of program artifacts.
+
+Artifacts are stored once per sha256 of their content. Ray working_dir
+package of an artifact is built once per hash and is uploaded to cluster
+by content addressed uri only if cluster does not have it yet, so repeated
+runs of a program skip both extraction and upload. Files are removed when
+no program references their hash.
+
+Single files of artifacts are kept as blobs of the user who uploaded them,
+so clients upload only files they did not send yet and artifact is
+assembled from a manifest. Blobs are not shared between users, so
+manifests do not reveal or pull in files of other users.
+"""
+
+import hashlib
+import json
+import logging
+import os
+import re
+import shutil
+import tarfile
+import tempfile
+import time
+import zipfile
+from functools import partial
+from typing import Dict, Iterable, List
+
+from django.conf import settings
+from django.core.files import File
+from django.core.files.storage import FileSystemStorage
+from django.core.files.uploadhandler import TemporaryFileUploadHandler
+from django.utils.deconstruct import deconstructible
+
+logger = logging.getLogger("gateway")
+
+# directory of artifacts and their packages inside of MEDIA_ROOT
+ARTIFACTS_DIR = ".artifacts"
+ARTIFACT_FILE_PATTERN = re.compile(r"^(?P<hash>[0-9a-f]{64})\.(tar|zip)$")
+# recently written or reused files can belong to programs being saved
+CLEANUP_GRACE_PERIOD = 3600
+# blobs of files are not referenced by programs and expire when not used
+BLOBS_DIR = "blobs"
+BLOB_TTL = 7 * 24 * 3600
+HASH_PATTERN = re.compile(r"^[0-9a-f]{64}$")
+# timestamp of package members, so packages do not depend on build time
+PACKAGE_DATE_TIME = (1980, 1, 1, 0, 0, 0)
+COPY_CHUNK_SIZE = 1024 * 1024
+
+
+@deconstructible
+class ArtifactStorage(FileSystemStorage):
+    """File storage keeping single copy of file with the same name.
+
+    Artifacts are named by hash of their content, so existing file
+    with the same name is the same artifact and is not written again.
+    """
+
+    def get_available_name(self, name, max_length=None):
+        return name
+
+    def _save(self, name, content):
+        if self.exists(name):
+            # protects reused file from cleanup until program is saved
+            os.utime(self.path(name))
+            return name
+        return super()._save(name, content)
+
+
+class ArtifactUploadHandler(TemporaryFileUploadHandler):
+    """Upload handler writing uploaded files to disk as they are received.
+
+    Files are never kept in memory, even when size of request is not known
+    in advance, and their sha256 is computed on the fly, so artifact
+    is not read again to find its content address.
+    """
+
+    def new_file(self, *args, **kwargs):
+        super().new_file(*args, **kwargs)
+        self.digest = hashlib.sha256()  # pylint: disable=attribute-defined-outside-init
+
+    def receive_data_chunk(self, raw_data, start):
+        self.digest.update(raw_data)
+        return super().receive_data_chunk(raw_data, start)
+
+    def file_complete(self, file_size):
+        file = super().file_complete(file_size)
+        file.sha256 = self.digest.hexdigest()
+        return file
+
+
+def file_sha256(file) -> str:
+    """Returns sha256 hex digest of file content.
+
+    Args:
+        file: django file
+
+    Returns:
+        hex digest
+    """
+    # computed while file was uploaded
+    uploaded_hash = getattr(file, "sha256", None)
+    if uploaded_hash is not None:
+        return uploaded_hash
+    digest = hashlib.sha256()
+    for chunk in file.chunks():
+        digest.update(chunk)
+    return digest.hexdigest()
+
+
+def artifacts_root() -> str:
+    """Returns absolute path of artifacts directory."""
+    return os.path.join(settings.MEDIA_ROOT, ARTIFACTS_DIR)
+
+
+def _package_artifact(artifact_path: str, package_path: str) -> None:
+    """Repacks tar artifact into ray working_dir zip package.
+
+    Members are streamed in sorted order with fixed timestamps, so the same
+    artifact always results in the same package bytes.
+    """
+    os.makedirs(os.path.dirname(package_path), exist_ok=True)
+    with tempfile.NamedTemporaryFile(
+        dir=os.path.dirname(package_path), suffix=".tmp", delete=False
+    ) as tmp_file:
+        tmp_path = tmp_file.name
+    try:
+        with tarfile.open(artifact_path) as tar, zipfile.ZipFile(
+            tmp_path, "w", compression=zipfile.ZIP_DEFLATED
+        ) as package:
+            members = {}
+            for member in tar:
+                name = os.path.normpath(member.name)
+                if not member.isfile() or os.path.isabs(name) or name.startswith(".."):
+                    continue
+                members[name] = member
+            for name in sorted(members):
+                info = zipfile.ZipInfo(name, date_time=PACKAGE_DATE_TIME)
+                info.compress_type = zipfile.ZIP_DEFLATED
+                info.external_attr = 0o644 << 16
+                info.file_size = members[name].size
+                with tar.extractfile(members[name]) as source, package.open(
+                    info, "w"
+                ) as target:
+                    shutil.copyfileobj(source, target, COPY_CHUNK_SIZE)
+        # package becomes visible to other schedulers only when complete
+        os.replace(tmp_path, package_path)
+    finally:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+
+
+def get_artifact_package(program) -> str:
+    """Returns path of ray working_dir package of program artifact.
+
+    Package is built once per artifact hash. Hash of artifacts uploaded
+    before content addressed store is computed on first use.
+
+    Args:
+        program: program with artifact
+
+    Returns:
+        path of zip package
+    """
+    artifact_hash = program.artifact_hash
+    if not artifact_hash:
+        with program.artifact.open("rb") as artifact:
+            artifact_hash = file_sha256(artifact)
+        type(program).objects.filter(id=program.id).update(artifact_hash=artifact_hash)
+        program.artifact_hash = artifact_hash
+
+    package_path = os.path.join(artifacts_root(), f"{artifact_hash}.zip")
+    if not os.path.exists(package_path):
+        logger.info("Building package of artifact [%s].", artifact_hash)
+        _package_artifact(program.artifact.path, package_path)
+    return package_path
+
+
+def blobs_root() -> str:
+    """Returns absolute path of blobs directory."""
+    return os.path.join(artifacts_root(), BLOBS_DIR)
+
+
+def user_blobs_dir(user) -> str:
+    """Returns absolute path of blobs directory of user."""
+    return os.path.join(blobs_root(), str(user.id))
+
+
+def parse_manifest(raw_manifest: str) -> Dict[str, str]:
+    """Parses manifest of artifact files.
+
+    Args:
+        raw_manifest: json object of relative file paths and sha256 of their content
+
+    Raises:
+        ValueError: if manifest is malformed
+
+    Returns:
+        manifest
+    """
+    manifest = json.loads(raw_manifest)
+    if not isinstance(manifest, dict) or not manifest:
+        raise ValueError("Manifest must be a non empty object.")
+    for path, file_hash in manifest.items():
+        name = os.path.normpath(path)
+        if (
+            os.path.isabs(name)
+            or name.startswith("..")
+            or name != path
+            or not isinstance(file_hash, str)
+            or HASH_PATTERN.match(file_hash) is None
+        ):
+            raise ValueError(f"Invalid manifest entry [{path}].")
+    return manifest
+
+
+def missing_blobs(manifest: Dict[str, str], user) -> List[str]:
+    """Returns hashes of manifest files user did not upload yet."""
+    root = user_blobs_dir(user)
+    return sorted(
+        {
+            file_hash
+            for file_hash in manifest.values()
+            if not os.path.exists(os.path.join(root, file_hash))
+        }
+    )
+
+
+def store_blobs(archive, user) -> int:
+    """Stores blobs from tar archive of files named by their sha256.
+
+    Archive can be compressed, content of each blob is verified.
+
+    Args:
+        archive: uploaded archive file
+        user: user uploading blobs
+
+    Raises:
+        ValueError: if content of blob does not match its name
+
+    Returns:
+        number of stored blobs
+    """
+    root = user_blobs_dir(user)
+    os.makedirs(root, exist_ok=True)
+    stored = 0
+    with tarfile.open(fileobj=archive, mode="r:*") as tar:
+        for member in tar:
+            if not member.isfile():
+                continue
+            if HASH_PATTERN.match(member.name) is None:
+                raise ValueError(f"Invalid blob name [{member.name}].")
+            digest = hashlib.sha256()
+            with tempfile.NamedTemporaryFile(
+                dir=root, suffix=".tmp", delete=False
+            ) as tmp_file:
+                source = tar.extractfile(member)
+                for chunk in iter(partial(source.read, COPY_CHUNK_SIZE), b""):
+                    digest.update(chunk)
+                    tmp_file.write(chunk)
+            if digest.hexdigest() != member.name:
+                os.remove(tmp_file.name)
+                raise ValueError(f"Content of blob [{member.name}] does not match.")
+            os.replace(tmp_file.name, os.path.join(root, member.name))
+            stored += 1
+    return stored
+
+
+def build_artifact(manifest: Dict[str, str], user) -> File:
+    """Assembles artifact tar from blobs of manifest.
+
+    Tar is deterministic, so the same files result in the same artifact hash.
+
+    Args:
+        manifest: manifest of artifact files
+        user: user owning blobs
+
+    Returns:
+        artifact file
+    """
+    # pylint: disable=consider-using-with
+    root = user_blobs_dir(user)
+    artifact = tempfile.TemporaryFile()
+    with tarfile.open(fileobj=artifact, mode="w") as tar:
+        for path in sorted(manifest):
+            blob_path = os.path.join(root, manifest[path])
+            # used blobs do not expire
+            os.utime(blob_path)
+            info = tarfile.TarInfo(path)
+            info.size = os.path.getsize(blob_path)
+            info.mode = 0o644
+            with open(blob_path, "rb") as blob:
+                tar.addfile(info, blob)
+    artifact.seek(0)
+    return File(artifact, name="artifact.tar")
+
+
+def _cleanup_blobs() -> int:
+    removed = 0
+    # directories of users are kept, blobs can be stored to them concurrently
+    for directory, _, filenames in os.walk(blobs_root()):
+        for filename in filenames:
+            path = os.path.join(directory, filename)
+            if time.time() - os.path.getmtime(path) > BLOB_TTL:
+                os.remove(path)
+                removed += 1
+    return removed
+
+
+def cleanup_artifacts(referenced_hashes: Iterable[str]) -> int:
+    """Removes artifacts and packages with no references.
+
+    Args:
+        referenced_hashes: artifact hashes of existing programs
+
+    Returns:
+        number of removed files
+    """
+    root = artifacts_root()
+    if not os.path.exists(root):
+        return 0
+
+    referenced = set(referenced_hashes)
+    removed = 0
+    for filename in os.listdir(root):
+        match = ARTIFACT_FILE_PATTERN.match(filename)
+        if match is None or match.group("hash") in referenced:
+            continue
+        path = os.path.join(root, filename)
+        if time.time() - os.path.getmtime(path) < CLEANUP_GRACE_PERIOD:
+            continue
+        os.remove(path)
+        removed += 1
+    return removed + _cleanup_blobs()
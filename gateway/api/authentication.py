@@ -1,22 +1,44 @@
 """CustomTokenBackend."""
 
+import hashlib
 import logging
+import threading
 from dataclasses import dataclass
+from typing import Callable, Dict, Optional
 
 import requests
 from django.conf import settings
 from django.contrib.auth import get_user_model
 from django.contrib.auth.models import Group, Permission
+from django.core.cache import caches
+from prometheus_client import Counter
 from rest_framework import authentication
 
 from api.models import VIEW_PROGRAM_PERMISSION, RUN_PROGRAM_PERMISSION, Provider
 from api.models_proxies import QuantumUserProxy
-from api.utils import safe_request
 
 
 User = get_user_model()
 logger = logging.getLogger("gateway.authentication")
 
+TOKEN_CACHE_HITS = Counter(
+    "gateway_token_cache_hits_total",
+    "Number of token verifications served from cache.",
+    ["result"],
+)
+TOKEN_CACHE_MISSES = Counter(
+    "gateway_token_cache_misses_total",
+    "Number of token verifications requested from auth service.",
+)
+TOKEN_CACHE_COALESCED = Counter(
+    "gateway_token_cache_coalesced_total",
+    "Number of token verifications shared with concurrent request.",
+)
+
+
+class TokenVerificationUnavailable(Exception):
+    """Auth service could not verify token, e.g. it is unreachable or failed."""
+
 
 @dataclass
 class CustomToken:
@@ -25,12 +47,117 @@ class CustomToken:
     token: str
 
 
+class _Flight:  # pylint: disable=too-few-public-methods
+    """Verification of token in progress shared by concurrent requests."""
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.resolved = False
+        self.user_id: Optional[str] = None
+
+
+class TokenVerificationCache:
+    """Cache of verified token identities backed by django cache framework.
+
+    Only sha256 hash of token is used as cache key. Rejected tokens are
+    cached for a shorter time. Concurrent verifications of the same token
+    in the process are coalesced, so only one of them calls auth service.
+    """
+
+    key_prefix = "gateway:token:"
+
+    def __init__(self, cache_alias: str = "default"):
+        """Token verification cache.
+
+        Args:
+            cache_alias: name of django cache to store identities in
+        """
+        self.cache_alias = cache_alias
+        self._flights: Dict[str, _Flight] = {}
+        self._lock = threading.Lock()
+
+    def _key(self, token: str) -> str:
+        return self.key_prefix + hashlib.sha256(token.encode()).hexdigest()
+
+    def _get(self, key: str) -> Optional[dict]:
+        entry = caches[self.cache_alias].get(key)
+        if entry is not None:
+            TOKEN_CACHE_HITS.labels(
+                result="valid" if entry["user_id"] else "invalid"
+            ).inc()
+        return entry
+
+    def _set(self, key: str, user_id: Optional[str]) -> None:
+        ttl = (
+            settings.SETTINGS_TOKEN_AUTH_CACHE_TTL
+            if user_id
+            else settings.SETTINGS_TOKEN_AUTH_CACHE_NEGATIVE_TTL
+        )
+        if ttl > 0:
+            caches[self.cache_alias].set(key, {"user_id": user_id}, ttl)
+
+    def get_or_verify(
+        self, token: str, verify: Callable[[], Optional[str]]
+    ) -> Optional[str]:
+        """Returns user id of token from cache or from verify callback.
+
+        Only results of verify callback are cached and shared with
+        concurrent requests. If callback raises, waiting requests verify
+        token themselves.
+
+        Args:
+            token: user token
+            verify: callback verifying token against auth service,
+                returns user id or None if token is not valid
+
+        Returns:
+            user id or None if token is not valid
+        """
+        key = self._key(token)
+        entry = self._get(key)
+        if entry is not None:
+            return entry["user_id"]
+
+        with self._lock:
+            flight = self._flights.get(key)
+            leader = flight is None
+            if leader:
+                flight = self._flights[key] = _Flight()
+        if not leader:
+            flight.done.wait()
+            if flight.resolved:
+                TOKEN_CACHE_COALESCED.inc()
+                return flight.user_id
+
+        TOKEN_CACHE_MISSES.inc()
+        try:
+            user_id = verify()
+            self._set(key, user_id)
+            flight.user_id = user_id
+            flight.resolved = True
+        finally:
+            if leader:
+                with self._lock:
+                    del self._flights[key]
+                flight.done.set()
+        return user_id
+
+    def invalidate(self, token: str) -> None:
+        """Removes cached identity of token."""
+        caches[self.cache_alias].delete(self._key(token))
+
+
+token_verification_cache = TokenVerificationCache()
+
+
 class CustomTokenBackend(authentication.BaseAuthentication):
-    """Custom token backend for authentication against 3rd party auth service."""
+    """Custom token backend for authentication against 3rd party auth service.
 
-    def authenticate(self, request):  # pylint: disable=too-many-branches
+    Identities of verified tokens are cached by `token_verification_cache`.
+    """
+
+    def authenticate(self, request):
         auth_url = settings.SETTINGS_TOKEN_AUTH_URL
-        verification_url = settings.SETTINGS_TOKEN_AUTH_VERIFICATION_URL
         auth_header = request.META.get("HTTP_AUTHORIZATION")
 
         quantum_user = None
@@ -38,71 +165,124 @@ class CustomTokenBackend(authentication.BaseAuthentication):
         if auth_header is not None and auth_url is not None:
             token = auth_header.split(" ")[-1]
 
-            auth_data = safe_request(
-                request=lambda: requests.post(
-                    auth_url,
-                    json={settings.SETTINGS_TOKEN_AUTH_TOKEN_FIELD: token},
-                    timeout=60,
+            try:
+                user_id = token_verification_cache.get_or_verify(
+                    token, lambda: self.verify_token(token)
                 )
+            except TokenVerificationUnavailable as error:
+                logger.warning("Problems authenticating: %s", error)
+                user_id = None
+            if user_id is not None:
+                quantum_user = QuantumUserProxy.objects.filter(username=user_id).first()
+
+        elif auth_header is None:
+            logger.warning(
+                "Problems authenticating: User did not provide authorization token."
             )
-            if auth_data is not None:
-                user_id = auth_data.get(settings.SETTINGS_TOKEN_AUTH_USER_FIELD)
-
-                verification_data = safe_request(
-                    request=lambda: requests.get(
-                        verification_url,
-                        headers={"Authorization": auth_data.get("id")},
-                        timeout=60,
-                    )
-                )
 
-                if verification_data is not None:
-                    verifications = []
-                    for (
-                        verification_field
-                    ) in settings.SETTINGS_TOKEN_AUTH_VERIFICATION_FIELD.split(";"):
-                        nested_field_value = verification_data
-                        for nested_field in verification_field.split(","):
-                            nested_field_value = nested_field_value.get(nested_field)
-                        verifications.append(nested_field_value)
-
-                    verified = all(verifications)
-
-                    if user_id is not None and verified:
-                        quantum_user, created = QuantumUserProxy.objects.get_or_create(
-                            username=user_id
-                        )
-                        if created:
-                            logger.info("New user created")
-                        quantum_user.update_groups(auth_data.get("id"))
+        else:  # auth_url is None
+            logger.warning(
+                "Problems authenticating: No auth url: something is broken in our settings."
+            )
 
-                    elif user_id is None:
-                        logger.warning("Problems authenticating: No user id.")
+        return quantum_user, CustomToken(token.encode()) if token else None
 
-                    else:  # not verified
-                        logger.warning("Problems authenticating: User is not verified.")
+    def verify_token(self, token: str) -> Optional[str]:
+        """Verifies token against auth service and updates user groups.
 
-                else:  # verification_data is None
-                    logger.warning(
-                        "Problems authenticating: No verification data returned from request."
-                    )
+        Args:
+            token: user token
 
-            else:  # auth_data is None
-                logger.warning(
-                    "Problems authenticating: No authorization data returned from auth url."
-                )
+        Raises:
+            TokenVerificationUnavailable: if auth service can not be reached
+                or fails, so result must not be cached
 
-        elif auth_header is None:
+        Returns:
+            user id or None if token is not valid
+        """
+        auth_data = _auth_service_request(
+            lambda: requests.post(
+                settings.SETTINGS_TOKEN_AUTH_URL,
+                json={settings.SETTINGS_TOKEN_AUTH_TOKEN_FIELD: token},
+                timeout=60,
+            )
+        )
+        if auth_data is None:
             logger.warning(
-                "Problems authenticating: User did not provide authorization token."
+                "Problems authenticating: No authorization data returned from auth url."
             )
+            return None
 
-        else:  # auth_url is None
+        user_id = auth_data.get(settings.SETTINGS_TOKEN_AUTH_USER_FIELD)
+
+        verification_data = _auth_service_request(
+            lambda: requests.get(
+                settings.SETTINGS_TOKEN_AUTH_VERIFICATION_URL,
+                headers={"Authorization": auth_data.get("id")},
+                timeout=60,
+            )
+        )
+        if verification_data is None:
             logger.warning(
-                "Problems authenticating: No auth url: something is broken in our settings."
+                "Problems authenticating: No verification data returned from request."
             )
+            return None
 
-        return quantum_user, CustomToken(token.encode()) if token else None
+        verifications = []
+        for verification_field in settings.SETTINGS_TOKEN_AUTH_VERIFICATION_FIELD.split(
+            ";"
+        ):
+            nested_field_value = verification_data
+            for nested_field in verification_field.split(","):
+                nested_field_value = nested_field_value.get(nested_field)
+            verifications.append(nested_field_value)
+
+        if user_id is None:
+            logger.warning("Problems authenticating: No user id.")
+            return None
+        if not all(verifications):
+            logger.warning("Problems authenticating: User is not verified.")
+            return None
+
+        quantum_user, created = QuantumUserProxy.objects.get_or_create(username=user_id)
+        if created:
+            logger.info("New user created")
+        quantum_user.update_groups(auth_data.get("id"))
+        return user_id
+
+
+def _auth_service_request(request: Callable) -> Optional[dict]:
+    """Makes request to auth service and parses json response.
+
+    Args:
+        request: callable for request
+
+    Raises:
+        TokenVerificationUnavailable: on connection errors, server errors
+            and invalid responses
+
+    Returns:
+        parsed json response or None if request was rejected
+    """
+    try:
+        response = request()
+    except requests.RequestException as error:
+        raise TokenVerificationUnavailable(
+            f"Auth service request failed: {error}"
+        ) from error
+    if response.status_code >= 500:
+        raise TokenVerificationUnavailable(
+            f"Auth service failed: {response.status_code}"
+        )
+    if not response.ok:
+        logger.error("%d : %s", response.status_code, response.text)
+        return None
+    try:
+        return response.json()
+    except ValueError as error:
+        raise TokenVerificationUnavailable(
+            "Auth service response is not valid json."
+        ) from error
 
 
 class MockAuthBackend(authentication.BaseAuthentication):
@@ -0,0 +1,223 @@
+"""Index of files in media directories of users.
+
+Metadata of files is kept in `UserFile` records, so listing files does
+not scan directories, which is slow on shared volumes with many files.
+"""
+
+import logging
+import os
+import time
+from datetime import datetime, timezone
+from typing import Optional, Tuple
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.files import File
+
+from utils import sanitize_file_path
+
+from .artifacts import file_sha256
+from .models import Job, UserFile
+
+logger = logging.getLogger("gateway")
+
+# only these files are available for list and download
+FILE_EXTENSIONS = (".tar", ".h5")
+
+
+def user_files_dir(username: str) -> str:
+    """Returns media directory of user."""
+    return os.path.join(
+        sanitize_file_path(settings.MEDIA_ROOT), sanitize_file_path(username)
+    )
+
+
+def _modified(file_stat: os.stat_result) -> datetime:
+    return datetime.fromtimestamp(file_stat.st_mtime, tz=timezone.utc)
+
+
+def _deadline_passed(deadline: Optional[float]) -> bool:
+    return deadline is not None and time.monotonic() >= deadline
+
+
+def index_file(user, file_path: str, checksum: bool = True) -> UserFile:
+    """Adds file of user to index or updates its metadata.
+
+    Args:
+        user: owner of file
+        file_path: path of file in media directory of user
+        checksum: compute checksum of file content, otherwise checksum
+            is left empty and computed by next `reconcile_files`
+
+    Returns:
+        indexed file
+    """
+    file_stat = os.stat(file_path)
+    file_checksum = ""
+    if checksum:
+        with open(file_path, "rb") as file:
+            file_checksum = file_sha256(File(file))
+    user_file, _ = UserFile.objects.update_or_create(
+        owner=user,
+        name=os.path.basename(file_path),
+        defaults={
+            "size": file_stat.st_size,
+            "modified": _modified(file_stat),
+            "checksum": file_checksum,
+        },
+    )
+    return user_file
+
+
+def unindex_file(user, name: str) -> None:
+    """Removes file of user from index."""
+    UserFile.objects.filter(owner=user, name=name).delete()
+
+
+def index_job_files(job: Job, deadline: Optional[float] = None) -> int:
+    """Indexes files written by finished job.
+
+    Only files modified since job was created are indexed, without
+    checksums. Files which are not indexed before deadline, checksums
+    and removed files are handled by `reconcile_files`.
+
+    Args:
+        job: finished job
+        deadline: `time.monotonic` time to stop indexing at
+
+    Returns:
+        number of indexed files
+    """
+    directory = user_files_dir(job.author.username)
+    if not os.path.isdir(directory):
+        return 0
+
+    indexed_files = {
+        name: (size, modified)
+        for name, size, modified in UserFile.objects.filter(
+            owner=job.author, modified__gte=job.created
+        ).values_list("name", "size", "modified")
+    }
+    indexed = 0
+    with os.scandir(directory) as scan:
+        for entry in scan:
+            if _deadline_passed(deadline):
+                break
+            if not entry.is_file() or not entry.name.endswith(FILE_EXTENSIONS):
+                continue
+            try:
+                file_stat = entry.stat()
+                modified = _modified(file_stat)
+                if modified < job.created or indexed_files.get(entry.name) == (
+                    file_stat.st_size,
+                    modified,
+                ):
+                    continue
+                index_file(job.author, entry.path, checksum=False)
+                indexed += 1
+            except FileNotFoundError:
+                # file was removed while it was indexed
+                continue
+    return indexed
+
+
+def reconcile_user_files(user, deadline: Optional[float] = None) -> Tuple[int, int]:
+    """Updates index of user files to match media directory of user.
+
+    Checksums are computed only for new files, files with changed
+    size or modification time and files indexed without checksum.
+
+    Args:
+        user: owner of files
+        deadline: `time.monotonic` time to stop indexing at,
+            remaining files are indexed by next reconciliation
+
+    Returns:
+        numbers of indexed and removed files
+    """
+    directory = user_files_dir(user.username)
+    entries = {}
+    if os.path.isdir(directory):
+        with os.scandir(directory) as scan:
+            entries = {
+                entry.name: entry
+                for entry in scan
+                if entry.is_file() and entry.name.endswith(FILE_EXTENSIONS)
+            }
+
+    indexed_files = {
+        user_file.name: user_file
+        for user_file in UserFile.objects.filter(owner=user).only(
+            "name", "size", "modified", "checksum"
+        )
+    }
+    removed, _ = (
+        UserFile.objects.filter(owner=user).exclude(name__in=list(entries)).delete()
+    )
+
+    indexed = 0
+    for name, entry in entries.items():
+        if _deadline_passed(deadline):
+            break
+        try:
+            file_stat = entry.stat()
+            user_file = indexed_files.get(name)
+            if (
+                user_file is not None
+                and user_file.size == file_stat.st_size
+                and user_file.modified == _modified(file_stat)
+                and user_file.checksum
+            ):
+                continue
+            index_file(user, entry.path)
+            indexed += 1
+        except FileNotFoundError:
+            # file was removed while directory was reconciled
+            unindex_file(user, name)
+    return indexed, removed
+
+
+def reconcile_files(
+    deadline: Optional[float] = None, resume_from: Optional[int] = None
+) -> Tuple[int, int, Optional[int]]:
+    """Reconciles index of files of all users with media directories.
+
+    Users are reconciled in order of their ids. Reconciliation stopped
+    at deadline is continued from the last reconciled user by passing
+    returned user id as `resume_from`.
+
+    Args:
+        deadline: `time.monotonic` time to stop reconciliation at
+        resume_from: id of user to start reconciliation from
+
+    Returns:
+        numbers of indexed and removed files and id of user to resume
+        reconciliation from, None if all users were reconciled
+    """
+    media_root = sanitize_file_path(settings.MEDIA_ROOT)
+    directories = set()
+    if os.path.isdir(media_root):
+        with os.scandir(media_root) as scan:
+            directories = {entry.name for entry in scan if entry.is_dir()}
+
+    users_with_files = set(
+        UserFile.objects.values_list("owner_id", flat=True).distinct()
+    )
+    users = get_user_model().objects.only("id", "username").order_by("id")
+    if resume_from is not None:
+        users = users.filter(id__gte=resume_from)
+    indexed, removed = 0, 0
+    for user in users.iterator():
+        # directories are named by sanitized usernames
+        if (
+            user.id not in users_with_files
+            and sanitize_file_path(user.username) not in directories
+        ):
+            continue
+        user_indexed, user_removed = reconcile_user_files(user, deadline=deadline)
+        indexed += user_indexed
+        removed += user_removed
+        if _deadline_passed(deadline):
+            # files of user could be left unindexed, so user is reconciled again
+            return indexed, removed, user.id
+    return indexed, removed, None
@@ -0,0 +1,164 @@
+"""Backends serving files to download.
+
+Django backend streams files through gateway workers. Other backends
+only authorize requests and let reverse proxy or file server transfer
+bytes, so large downloads do not occupy gateway workers.
+"""
+
+import base64
+import hashlib
+import mimetypes
+import os
+import time
+from urllib.parse import quote, urlencode, urlsplit
+
+from django.conf import settings
+from django.core.checks import Tags, Warning as CheckWarning, register
+from django.core.exceptions import ImproperlyConfigured
+from django.http import HttpResponse, HttpResponseRedirect
+
+from .utils import file_etag, file_response
+
+
+class FileServingBackend:
+    """Base class of file serving backends."""
+
+    def serve(self, request, file_path: str) -> HttpResponse:
+        """Returns response serving file.
+
+        Args:
+            request: authorized download request
+            file_path: absolute path of file inside of MEDIA_ROOT
+
+        Returns:
+            download response
+        """
+        raise NotImplementedError
+
+    @staticmethod
+    def relative_path(file_path: str) -> str:
+        """Returns path of file relative to MEDIA_ROOT."""
+        return os.path.relpath(file_path, settings.MEDIA_ROOT).replace(os.sep, "/")
+
+
+class DjangoFileServing(FileServingBackend):
+    """Streams files through gateway with byte ranges support."""
+
+    def serve(self, request, file_path: str) -> HttpResponse:
+        return file_response(request, file_path)
+
+
+class _ProxyFileServing(FileServingBackend):
+    """Delegates transfer of file to reverse proxy by response header."""
+
+    header: str
+
+    def location(self, file_path: str) -> str:
+        """Returns value of header pointing proxy to file."""
+        raise NotImplementedError
+
+    def serve(self, request, file_path: str) -> HttpResponse:
+        # proxy sends file content, ranges and conditional requests included
+        response = HttpResponse(content_type=mimetypes.guess_type(file_path)[0])
+        response[self.header] = self.location(file_path)
+        response["ETag"] = file_etag(file_path)
+        response[
+            "Content-Disposition"
+        ] = f"attachment; filename={os.path.basename(file_path)}"
+        return response
+
+
+class XAccelRedirectFileServing(_ProxyFileServing):
+    """Lets nginx serve files from internal location mapped to MEDIA_ROOT."""
+
+    header = "X-Accel-Redirect"
+
+    def location(self, file_path: str) -> str:
+        internal_location = settings.FILES_SERVING_INTERNAL_LOCATION.rstrip("/")
+        return f"{internal_location}/{quote(self.relative_path(file_path))}"
+
+
+class XSendfileFileServing(_ProxyFileServing):
+    """Lets apache or lighttpd serve files by their absolute path."""
+
+    header = "X-Sendfile"
+
+    def location(self, file_path: str) -> str:
+        return file_path
+
+
+class SignedUrlFileServing(FileServingBackend):
+    """Redirects to expiring url of file signed for nginx `secure_link`.
+
+    Signature is `secure_link_md5 "$secure_link_expires$uri <secret>"`
+    compatible, so file server checks it without calling gateway.
+    """
+
+    def __init__(self):
+        if not settings.FILES_SERVING_SIGNED_URL_SECRET:
+            raise ImproperlyConfigured(
+                "FILES_SERVING_SIGNED_URL_SECRET must be set for `signed-url` "
+                "files serving backend, otherwise signatures can be forged."
+            )
+        if not settings.FILES_SERVING_SIGNED_URL_BASE:
+            raise ImproperlyConfigured(
+                "FILES_SERVING_SIGNED_URL_BASE must be set for `signed-url` "
+                "files serving backend."
+            )
+
+    def serve(self, request, file_path: str) -> HttpResponse:
+        base_url = settings.FILES_SERVING_SIGNED_URL_BASE.rstrip("/")
+        path = self.relative_path(file_path)
+        expires = int(time.time() + settings.FILES_SERVING_SIGNED_URL_TTL)
+        # nginx signs decoded uri
+        uri = f"{urlsplit(base_url).path}/{path}"
+        digest = hashlib.md5(
+            f"{expires}{uri} {settings.FILES_SERVING_SIGNED_URL_SECRET}".encode(),
+            usedforsecurity=False,
+        ).digest()
+        signature = base64.urlsafe_b64encode(digest).decode().rstrip("=")
+        response = HttpResponseRedirect(
+            f"{base_url}/{quote(path)}?"
+            + urlencode({"md5": signature, "expires": expires})
+        )
+        response["Cache-Control"] = "no-store"
+        return response
+
+
+FILE_SERVING_BACKENDS = {
+    "django": DjangoFileServing,
+    "x-accel-redirect": XAccelRedirectFileServing,
+    "x-sendfile": XSendfileFileServing,
+    "signed-url": SignedUrlFileServing,
+}
+
+
+def get_file_serving_backend() -> FileServingBackend:
+    """Returns file serving backend configured by `FILES_SERVING_BACKEND`.
+
+    Raises:
+        ImproperlyConfigured: if backend is unknown or misses its settings
+    """
+    backend = FILE_SERVING_BACKENDS.get(settings.FILES_SERVING_BACKEND)
+    if backend is None:
+        raise ImproperlyConfigured(
+            f"Unknown files serving backend [{settings.FILES_SERVING_BACKEND}]. "
+            f"Options: {', '.join(FILE_SERVING_BACKENDS)}."
+        )
+    return backend()
+
+
+@register(Tags.security)
+def check_file_serving_backend(
+    app_configs, **kwargs
+):  # pylint: disable=unused-argument
+    """Reports misconfigured files serving backend.
+
+    Web workers refuse to start with such backend, management commands
+    only report it.
+    """
+    try:
+        get_file_serving_backend()
+    except ImproperlyConfigured as error:
+        return [CheckWarning(str(error), id="api.W001")]
+    return []
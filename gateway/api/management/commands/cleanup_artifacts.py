@@ -0,0 +1,25 @@
+"""Cleanup artifacts command."""
+
+import logging
+
+from django.core.management.base import BaseCommand
+
+from api.artifacts import cleanup_artifacts
+from api.models import Program
+
+logger = logging.getLogger("commands")
+
+
+class Command(BaseCommand):
+    """Cleanup unused artifacts."""
+
+    help = "Removes program artifacts and packages not referenced by any program."
+
+    def handle(self, *args, **options):
+        referenced_hashes = (
+            Program.objects.filter(artifact_hash__isnull=False)
+            .values_list("artifact_hash", flat=True)
+            .distinct()
+        )
+        removed = cleanup_artifacts(referenced_hashes)
+        logger.info("Removed %s unused artifact files.", removed)
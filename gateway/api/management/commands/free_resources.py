@@ -1,12 +1,14 @@
 """Cleanup resources command."""
 
 import logging
+from datetime import timedelta
 
 from django.conf import settings
 from django.core.management.base import BaseCommand
+from django.utils import timezone
 
 from api.models import ComputeResource, Job
-from api.ray import kill_ray_cluster
+from api.schedule import free_compute_resource
 from main import settings as config
 
 
@@ -19,27 +21,39 @@ class Command(BaseCommand):
     help = "Clean up resources."
 
     def handle(self, *args, **options):
-        compute_resources = ComputeResource.objects.filter(active=True)
+        # warm pool clusters wait for users without jobs
+        compute_resources = ComputeResource.objects.filter(
+            active=True, pool__isnull=True
+        )
+        now = timezone.now()
+        idle_deadline = now - timedelta(seconds=settings.RAY_CLUSTER_IDLE_TIMEOUT)
+        used_compute_resources = []
         counter = 0
 
         for compute_resource in compute_resources:
             alive_jobs = Job.objects.filter(
-                status__in=Job.RUNNING_STATES, compute_resource=compute_resource
+                status__in=Job.ACTIVE_STATES, compute_resource=compute_resource
             )
+            if alive_jobs.exists():
+                used_compute_resources.append(compute_resource.id)
+                continue
+
+            # idle cluster is kept for next jobs of user until it is
+            # evicted by scheduler or its grace period is over
+            last_used = compute_resource.last_used or compute_resource.created
+            if last_used > idle_deadline:
+                continue
 
             # only kill cluster if not in local mode and no jobs are running there
-            if len(alive_jobs) == 0 and not settings.RAY_CLUSTER_MODE.get("local"):
+            if not settings.RAY_CLUSTER_MODE.get("local"):
                 if config.RAY_CLUSTER_NO_DELETE_ON_COMPLETE:
                     logger.debug(
                         "RAY_CLUSTER_NO_DELETE_ON_COMPLETE is enabled, "
                         + "so cluster [%s] will not be removed",
                         compute_resource.title,
                     )
-                    return
-                kill_ray_cluster(compute_resource.title)
-                # deactivate
-                compute_resource.active = False
-                compute_resource.save()
+                    continue
+                free_compute_resource(compute_resource)
                 counter += 1
                 logger.info(
                     "Cluster [%s] is free after usage from [%s]",
@@ -47,4 +61,7 @@ class Command(BaseCommand):
                     compute_resource.owner,
                 )
 
+        ComputeResource.objects.filter(id__in=used_compute_resources).update(
+            last_used=now
+        )
         logger.info("Deallocated %s compute resources.", counter)
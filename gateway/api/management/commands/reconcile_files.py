@@ -0,0 +1,58 @@
+"""Reconcile files command."""
+
+import logging
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from api.file_index import reconcile_files
+
+logger = logging.getLogger("commands")
+
+
+class Command(BaseCommand):
+    """Reconcile index of user files.
+
+    Reconciliation scans media directories and hashes files, so it runs
+    in its own process instead of scheduler loop. Each run is limited by
+    time budget, next run continues from where previous one stopped.
+    """
+
+    help = "Updates index of user files to match media directories."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--interval",
+            type=float,
+            default=0,
+            help="Interval in seconds between reconciliations. 0 runs once.",
+        )
+        parser.add_argument(
+            "--time-budget",
+            type=float,
+            default=settings.FILES_RECONCILE_TIME_BUDGET,
+            help="Max duration in seconds of a single reconciliation. 0 for no limit.",
+        )
+
+    def handle(self, *args, **options):
+        resume_from = None
+        while True:
+            deadline = None
+            if options["time_budget"] > 0:
+                deadline = time.monotonic() + options["time_budget"]
+            indexed, removed, resume_from = reconcile_files(
+                deadline=deadline, resume_from=resume_from
+            )
+            logger.info(
+                "Indexed %s files, removed %s files from index.", indexed, removed
+            )
+            if resume_from is not None:
+                logger.info(
+                    "Time budget of files reconciliation is exhausted, "
+                    "next run resumes from user [%s].",
+                    resume_from,
+                )
+            if options["interval"] <= 0:
+                return
+            time.sleep(options["interval"])
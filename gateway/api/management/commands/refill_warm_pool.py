@@ -0,0 +1,23 @@
+"""Refill warm pool command."""
+
+import logging
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from api.warm_pool import refill_warm_pool
+
+logger = logging.getLogger("commands")
+
+
+class Command(BaseCommand):
+    """Refill warm pool of ray clusters."""
+
+    help = "Creates pre-provisioned ray clusters up to warm pool sizes."
+
+    def handle(self, *args, **options):
+        if settings.RAY_CLUSTER_MODE.get("local"):
+            # local mode uses single existing cluster
+            return
+        created = refill_warm_pool()
+        logger.info("%s warm pool clusters are created.", created)
@@ -0,0 +1,137 @@
+"""Run scheduler command."""
+
+import logging
+import signal
+import threading
+import time
+
+from django.conf import settings
+from django.core.management import call_command
+from django.core.management.base import BaseCommand
+from django.db import connections
+
+logger = logging.getLogger("commands")
+
+
+class Command(BaseCommand):
+    """Long running scheduler process.
+
+    Runs scheduler phases (update of job statuses, freeing of resources,
+    scheduling of queued jobs, refill of warm pool of clusters and cleanup
+    of artifacts) inside a single process, so Django setup, imports,
+    database connections and clients are reused between ticks.
+    Reconciliation of files index runs in its own process,
+    see `reconcile_files` command.
+    """
+
+    help = "Runs scheduler phases in a long running process."
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.stop_event = threading.Event()
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--update-jobs-statuses-interval",
+            type=float,
+            default=settings.SCHEDULER_UPDATE_JOBS_STATUSES_INTERVAL,
+            help="Interval in seconds between updates of job statuses.",
+        )
+        parser.add_argument(
+            "--free-resources-interval",
+            type=float,
+            default=settings.SCHEDULER_FREE_RESOURCES_INTERVAL,
+            help="Interval in seconds between cleanups of resources.",
+        )
+        parser.add_argument(
+            "--schedule-queued-jobs-interval",
+            type=float,
+            default=settings.SCHEDULER_SCHEDULE_QUEUED_JOBS_INTERVAL,
+            help="Interval in seconds between scheduling of queued jobs.",
+        )
+        parser.add_argument(
+            "--refill-warm-pool-interval",
+            type=float,
+            default=settings.SCHEDULER_REFILL_WARM_POOL_INTERVAL,
+            help="Interval in seconds between refills of warm pool of clusters.",
+        )
+        parser.add_argument(
+            "--cleanup-artifacts-interval",
+            type=float,
+            default=settings.SCHEDULER_CLEANUP_ARTIFACTS_INTERVAL,
+            help="Interval in seconds between cleanups of unused artifacts.",
+        )
+        parser.add_argument(
+            "--ticks",
+            type=int,
+            default=0,
+            help="Number of ticks to run before exit. 0 runs until stopped.",
+        )
+
+    def handle(self, *args, **options):
+        # phases are run in this order on each tick they are due
+        phases = [
+            ("update_jobs_statuses", options["update_jobs_statuses_interval"]),
+            ("free_resources", options["free_resources_interval"]),
+            ("schedule_queued_jobs", options["schedule_queued_jobs_interval"]),
+            ("refill_warm_pool", options["refill_warm_pool_interval"]),
+            ("cleanup_artifacts", options["cleanup_artifacts_interval"]),
+        ]
+        next_runs = {name: 0.0 for name, _ in phases}
+        max_ticks = options["ticks"]
+        previous_handlers = self._register_signal_handlers()
+
+        logger.info(
+            "Scheduler started with intervals: %s",
+            ", ".join(f"{name}={interval}s" for name, interval in phases),
+        )
+
+        ticks = 0
+        while not self.stop_event.is_set():
+            ticks += 1
+            for name, interval in phases:
+                if self.stop_event.is_set():
+                    break
+                if time.monotonic() >= next_runs[name]:
+                    self._run_phase(name)
+                    next_runs[name] = time.monotonic() + interval
+
+            if 0 < max_ticks <= ticks:
+                break
+
+            timeout = min(next_runs.values()) - time.monotonic()
+            self.stop_event.wait(timeout=max(0.0, timeout))
+
+        for signum, handler in previous_handlers.items():
+            signal.signal(signum, handler)
+        connections.close_all()
+        logger.info("Scheduler stopped after %s ticks.", ticks)
+
+    def _run_phase(self, name: str):
+        """Runs single scheduler phase, keeping the loop alive on failures."""
+        try:
+            call_command(name)
+        except Exception:  # pylint: disable=broad-exception-caught
+            logger.exception("Scheduler phase [%s] failed.", name)
+            # connection could be left in broken state, next phase will reconnect
+            connections.close_all()
+
+    def _register_signal_handlers(self) -> dict:
+        """Stops scheduler loop gracefully on SIGTERM and SIGINT.
+
+        Returns:
+            previously registered handlers by signal number
+        """
+
+        def _stop(signum, _frame):
+            logger.info("Received signal [%s]. Stopping scheduler.", signum)
+            self.stop_event.set()
+
+        previous_handlers = {}
+        try:
+            for signum in (signal.SIGTERM, signal.SIGINT):
+                previous_handlers[signum] = signal.signal(signum, _stop)
+        except ValueError:
+            # signals can only be registered from main thread
+            logger.debug("Signal handlers were not registered for scheduler.")
+        return previous_handlers
@@ -8,13 +8,24 @@ from concurrency.exceptions import RecordModifiedError
 from django.conf import settings
 from django.contrib.auth import get_user_model
 from django.core.management.base import BaseCommand
-from django.db.models import Model
+from django.db import transaction
+from django.db.models import Count, Model
 
 from opentelemetry import trace
 from opentelemetry.trace.propagation.tracecontext import TraceContextTextMapPropagator
 
 from api.models import ComputeResource, Job
-from api.schedule import get_jobs_to_schedule_fair_share, execute_job
+from api.notifications import notify_job_status
+from api.schedule import (
+    claim_jobs,
+    evict_idle_compute_resources,
+    get_jobs_to_schedule_fair_share,
+    execute_job,
+    release_job_claims,
+    release_stale_job_claims,
+    update_provisioning_jobs,
+)
+from api.warm_pool import warm_pool_python_version
 
 User: Model = get_user_model()
 logger = logging.getLogger("commands")
@@ -29,12 +40,37 @@ class Command(BaseCommand):
     )
 
     def handle(self, *args, **options):
+        released = release_stale_job_claims()
+        if released:
+            logger.info("%s stale job claims are released.", released)
+        self._update_provisioning_jobs()
+
+        if not (
+            settings.RAY_CLUSTER_MODE.get("local")
+            or settings.RAY_CLUSTER_NO_DELETE_ON_COMPLETE
+        ):
+            evicted = evict_idle_compute_resources()
+            if evicted:
+                logger.info("%s idle clusters are evicted.", evicted)
+
         max_ray_clusters_possible = settings.LIMITS_MAX_CLUSTERS
         number_of_clusters_running = ComputeResource.objects.filter(active=True).count()
         free_clusters_slots = max_ray_clusters_possible - number_of_clusters_running
-        logger.info("%s free cluster slots.", free_clusters_slots)
-
-        if free_clusters_slots < 1:
+        # warm pool clusters are assigned to jobs of their python version
+        # instead of new clusters
+        pool_clusters = dict(
+            ComputeResource.objects.filter(active=True, pool__isnull=False)
+            .values("pool")
+            .annotate(count=Count("id"))
+            .values_list("pool", "count")
+        )
+        logger.info(
+            "%s free cluster slots, %s warm pool clusters.",
+            free_clusters_slots,
+            sum(pool_clusters.values()),
+        )
+
+        if free_clusters_slots + sum(pool_clusters.values()) < 1:
             # no available resources
             logger.info(
                 "No clusters available. Resource consumption: %s / %s",
@@ -42,66 +78,109 @@ class Command(BaseCommand):
                 max_ray_clusters_possible,
             )
         else:
-            # we have available resources
-            jobs = get_jobs_to_schedule_fair_share(slots=free_clusters_slots)
-
+            # we have available resources, selected jobs are locked only until
+            # they are claimed, so other schedulers skip them while
+            # clusters are created outside of the transaction
+            with transaction.atomic():
+                jobs = get_jobs_to_schedule_fair_share(
+                    slots=max(free_clusters_slots, 0) + sum(pool_clusters.values())
+                )
+                claimed_jobs = []
+                for job in jobs:
+                    python_version = warm_pool_python_version(job)
+                    if pool_clusters.get(python_version, 0) > 0:
+                        pool_clusters[python_version] -= 1
+                    elif free_clusters_slots > 0:
+                        free_clusters_slots -= 1
+                    else:
+                        # no warm pool cluster for job and no slot for new one
+                        continue
+                    claimed_jobs.append(job)
+                claim_jobs(claimed_jobs)
+
+            scheduled = 0
+            for job in claimed_jobs:
+                try:
+                    self._schedule_job(job)
+                    scheduled += 1
+                except Exception:  # pylint: disable=broad-exception-caught
+                    logger.exception("Job [%s] was not scheduled.", job.id)
+                    release_job_claims([job])
+            logger.info("%s are scheduled for execution.", scheduled)
+
+    def _update_provisioning_jobs(self):
+        """Submits jobs waiting for clusters that finished provisioning."""
+        with transaction.atomic():
+            jobs = update_provisioning_jobs()
             for job in jobs:
-                # only for local mode
-                if settings.RAY_CLUSTER_MODE.get(
-                    "local"
-                ) and settings.RAY_CLUSTER_MODE.get("ray_local_host"):
-                    logger.info("Running in local mode")
-                    compute_resource = ComputeResource.objects.filter(
-                        host=settings.RAY_CLUSTER_MODE.get("ray_local_host")
-                    ).first()
-                    if compute_resource is None:
-                        compute_resource = ComputeResource(
-                            host=settings.RAY_CLUSTER_MODE.get("ray_local_host"),
-                            title="Local compute resource",
-                            owner=job.author,
-                        )
-                        compute_resource.save()
-                    job.compute_resource = compute_resource
+                try:
                     job.save()
-
-                env = json.loads(job.env_vars)
-                ctx = TraceContextTextMapPropagator().extract(carrier=env)
-
-                tracer = trace.get_tracer("scheduler.tracer")
-                with tracer.start_as_current_span("scheduler.handle", context=ctx):
-                    job = execute_job(job)
-                    job_id = job.id
-                    backup_status = job.status
-                    backup_logs = job.logs
-                    backup_resource = job.compute_resource
-                    backup_ray_job_id = job.ray_job_id
-
-                    succeed = False
-                    attempts = settings.RAY_SETUP_MAX_RETRIES
-
-                    while not succeed and attempts > 0:
-                        attempts -= 1
-
-                        try:
-                            job.save()
-                            # # remove artifact after successful submission and save
-                            # if os.path.exists(job.program.artifact.path):
-                            #     os.remove(job.program.artifact.path)
-
-                            succeed = True
-                        except RecordModifiedError:
-                            logger.warning(
-                                "Schedule: Job[%s] record has not been updated due to lock.",
-                                job.id,
-                            )
-
-                            time.sleep(1)
-
-                            job = Job.objects.get(id=job_id)
-                            job.status = backup_status
-                            job.logs = backup_logs
-                            job.compute_resource = backup_resource
-                            job.ray_job_id = backup_ray_job_id
-
-                    logger.info("Executing %s of %s", job, job.author)
-            logger.info("%s are scheduled for execution.", len(jobs))
+                    notify_job_status(job)
+                except RecordModifiedError:
+                    logger.warning(
+                        "Schedule: Job[%s] record has not been updated due to lock.",
+                        job.id,
+                    )
+        if jobs:
+            logger.info("%s provisioning jobs are updated.", len(jobs))
+
+    def _schedule_job(self, job: Job):
+        """Executes job and saves it."""
+        # only for local mode
+        if settings.RAY_CLUSTER_MODE.get("local") and settings.RAY_CLUSTER_MODE.get(
+            "ray_local_host"
+        ):
+            logger.info("Running in local mode")
+            compute_resource = ComputeResource.objects.filter(
+                host=settings.RAY_CLUSTER_MODE.get("ray_local_host")
+            ).first()
+            if compute_resource is None:
+                compute_resource = ComputeResource(
+                    host=settings.RAY_CLUSTER_MODE.get("ray_local_host"),
+                    title="Local compute resource",
+                    owner=job.author,
+                )
+                compute_resource.save()
+            job.compute_resource = compute_resource
+            job.save()
+
+        env = json.loads(job.env_vars)
+        ctx = TraceContextTextMapPropagator().extract(carrier=env)
+
+        tracer = trace.get_tracer("scheduler.tracer")
+        with tracer.start_as_current_span("scheduler.handle", context=ctx):
+            job = execute_job(job)
+            job_id = job.id
+            backup_status = job.status
+            backup_resource = job.compute_resource
+            backup_ray_job_id = job.ray_job_id
+
+            succeed = False
+            attempts = settings.RAY_SETUP_MAX_RETRIES
+
+            while not succeed and attempts > 0:
+                attempts -= 1
+
+                try:
+                    job.save()
+                    # # remove artifact after successful submission and save
+                    # if os.path.exists(job.program.artifact.path):
+                    #     os.remove(job.program.artifact.path)
+
+                    succeed = True
+                    # job fails right away if it could not be submitted
+                    notify_job_status(job)
+                except RecordModifiedError:
+                    logger.warning(
+                        "Schedule: Job[%s] record has not been updated due to lock.",
+                        job.id,
+                    )
+
+                    time.sleep(1)
+
+                    job = Job.objects.get(id=job_id)
+                    job.status = backup_status
+                    job.compute_resource = backup_resource
+                    job.ray_job_id = backup_ray_job_id
+
+            logger.info("Executing %s of %s", job, job.author)
@@ -1,74 +1,265 @@
 """Cleanup resources command."""
 
 import logging
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from functools import partial
+from typing import Dict, List, Optional, Tuple
 
-from concurrency.exceptions import RecordModifiedError
+from django.conf import settings
 from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.utils import timezone
 
-from api.models import Job
-from api.ray import get_job_handler
-from api.schedule import check_job_timeout, handle_job_status_not_available
-from api.utils import ray_job_status_to_model_job_status, check_logs
+from api.file_index import index_job_files
+from api.models import ComputeResource, Job
+from api.notifications import notify_job_status
+from api.ray import JobHandler, get_job_handler
+from api.schedule import (
+    check_job_timeout,
+    handle_job_status_not_available,
+    release_compute_resource,
+)
+from api.utils import (
+    ray_job_status_to_model_job_status,
+    check_logs,
+)
 
 logger = logging.getLogger("commands")
 
 
+@dataclass
+class JobUpdate:
+    """Changes of polled job stored outside of job record."""
+
+    status_changed: bool = False
+    # ray logs were reset, stored logs are ingested again from the beginning
+    reset_logs: bool = False
+    logs: List[str] = field(default_factory=list)
+    released_resource: Optional[ComputeResource] = None
+
+
+def poll_ray_job(
+    job_handler: Optional[JobHandler],
+    ray_job_id: str,
+    semaphore: threading.Semaphore,
+) -> Tuple[Optional[str], Optional[str]]:
+    """Fetches status and logs of ray job.
+
+    Args:
+        job_handler: handler of cluster where job is running
+        ray_job_id: ray job id
+        semaphore: limits concurrent requests to a single cluster
+
+    Returns:
+        ray job status and logs
+    """
+    if job_handler is None:
+        return None, None
+    with semaphore:
+        ray_job_status = job_handler.status(ray_job_id)
+        logs = job_handler.logs(ray_job_id)
+    return ray_job_status, logs
+
+
 class Command(BaseCommand):
     """Update status of jobs."""
 
     help = "Update running job statuses and logs."
 
+    # logs are stored in log chunks, so job record is saved without them
+    UPDATE_FIELDS = [
+        "status",
+        "env_vars",
+        "compute_resource",
+        "logs_offset",
+        "updated",
+        "version",
+    ]
+
     def handle(self, *args, **options):
-        # update job statuses
-        updated_jobs_counter = 0
-        jobs = Job.objects.filter(status__in=Job.RUNNING_STATES)
+        jobs = list(
+            Job.objects.filter(status__in=Job.RUNNING_STATES).select_related(
+                "compute_resource", "author"
+            )
+        )
         for job in jobs:
-            if job.compute_resource:
-                job_status = Job.PENDING
-                success = True
-                job_handler = get_job_handler(job.compute_resource.host)
-                if job_handler:
-                    ray_job_status = job_handler.status(job.ray_job_id)
-                    if ray_job_status:
-                        job_status = ray_job_status_to_model_job_status(ray_job_status)
-                    else:
-                        success = False
-                else:
-                    success = False
-
-                job_status = check_job_timeout(job, job_status)
-                if not success:
-                    job_status = handle_job_status_not_available(job, job_status)
-
-                if job_status != job.status:
-                    logger.info(
-                        "Job [%s] of [%s] changed from [%s] to [%s]",
-                        job.id,
-                        job.author,
-                        job.status,
-                        job_status,
-                    )
-                    updated_jobs_counter += 1
-                    job.status = job_status
-                    # cleanup env vars
-                    if job.in_terminal_state():
-                        job.env_vars = "{}"
-
-                if job_handler:
-                    logs = job_handler.logs(job.ray_job_id)
-                    job.logs = check_logs(logs, job)
-
-                try:
-                    job.save()
-                except RecordModifiedError:
-                    logger.warning(
-                        "Job[%s] record has not been updated due to lock.", job.id
-                    )
-
-            else:
+            if not job.compute_resource:
                 logger.warning(
                     "Job [%s] does not have compute resource associated with it. Skipping.",
                     job.id,
                 )
+        jobs = [job for job in jobs if job.compute_resource]
+        hosts = {job.compute_resource.host for job in jobs}
+
+        # poll all clusters at once, limiting number of requests per cluster
+        semaphores = {
+            host: threading.Semaphore(settings.RAY_JOBS_POLLING_MAX_PER_CLUSTER)
+            for host in hosts
+        }
+        with ThreadPoolExecutor(
+            max_workers=settings.RAY_JOBS_POLLING_MAX_WORKERS
+        ) as executor:
+            job_handlers: Dict[str, Optional[JobHandler]] = dict(
+                zip(hosts, executor.map(get_job_handler, hosts))
+            )
+            futures = [
+                executor.submit(
+                    poll_ray_job,
+                    job_handlers[job.compute_resource.host],
+                    job.ray_job_id,
+                    semaphores[job.compute_resource.host],
+                )
+                for job in jobs
+            ]
+            results = [future.result() for future in futures]
+
+        updates = [
+            self._update_job(
+                job, job_handlers[job.compute_resource.host], ray_job_status, logs
+            )
+            for job, (ray_job_status, logs) in zip(jobs, results)
+        ]
+
+        # logs are stored before statuses, so all logs of a job are
+        # available once it is seen in terminal state
+        for job, update in zip(jobs, updates):
+            self._store_logs(job, update)
+
+        saved_jobs = self._save_jobs(jobs, updates)
+        updated_jobs_counter = 0
+        finished_jobs = []
+        for job, update in saved_jobs:
+            if update.status_changed:
+                updated_jobs_counter += 1
+                if job.in_terminal_state():
+                    finished_jobs.append(job)
+
+        # new files written by finished jobs become available in files index,
+        # other files and checksums are handled by `reconcile_files` process
+        deadline = time.monotonic() + settings.FILES_INDEX_FINISHED_JOBS_TIME_BUDGET
+        for job in finished_jobs:
+            try:
+                index_job_files(job, deadline=deadline)
+            except OSError:
+                logger.exception("Files of job [%s] were not indexed.", job.id)
 
         logger.info("Updated %s jobs.", updated_jobs_counter)
+
+    def _save_jobs(
+        self, jobs: List[Job], updates: List[JobUpdate]
+    ) -> List[Tuple[Job, JobUpdate]]:
+        """Saves polled jobs in a single short transaction.
+
+        Jobs modified since they were read are not saved, like versioned
+        records saved with `save`. Clusters of unavailable jobs are removed
+        after the transaction is committed.
+
+        Returns:
+            saved jobs with their updates
+        """
+        with transaction.atomic():
+            versions = dict(
+                Job.objects.select_for_update()
+                .filter(id__in=[job.id for job in jobs])
+                .values_list("id", "version")
+            )
+            now = timezone.now()
+            saved_jobs = []
+            for job, update in zip(jobs, updates):
+                if versions.get(job.id) != job.version:
+                    logger.warning(
+                        "Job[%s] record has not been updated due to lock.", job.id
+                    )
+                    continue
+                job.version += 1
+                job.updated = now
+                saved_jobs.append((job, update))
+            Job.objects.bulk_update([job for job, _ in saved_jobs], self.UPDATE_FIELDS)
+
+            released_resources = {}
+            for job, update in saved_jobs:
+                if update.status_changed:
+                    notify_job_status(job)
+                if update.released_resource is not None:
+                    released_resources[
+                        update.released_resource.pk
+                    ] = update.released_resource
+            for compute_resource in released_resources.values():
+                transaction.on_commit(
+                    partial(release_compute_resource, compute_resource)
+                )
+        return saved_jobs
+
+    def _store_logs(self, job: Job, update: JobUpdate) -> None:
+        """Appends new logs of job, each chunk in its own transaction."""
+        if update.reset_logs:
+            # ray logs were reset, ingest them from the beginning
+            job.log_chunks.all().delete()
+        for logs in update.logs:
+            job.append_logs(logs)
+
+    def _update_job(
+        self,
+        job: Job,
+        job_handler: Optional[JobHandler],
+        ray_job_status: Optional[str],
+        logs: Optional[str],
+    ) -> JobUpdate:
+        """Applies polled ray job data to job without saving it.
+
+        Returns:
+            changes of job which are stored outside of job record
+        """
+        update = JobUpdate()
+        job_status = Job.PENDING
+        success = True
+        if ray_job_status:
+            job_status = ray_job_status_to_model_job_status(ray_job_status)
+        else:
+            success = False
+
+        job_status, message = check_job_timeout(job, job_status)
+        if message:
+            update.logs.append(message)
+        if not success:
+            compute_resource = job.compute_resource
+            job_status, message = handle_job_status_not_available(job, job_status)
+            if message:
+                update.logs.append(message)
+            if job.compute_resource is None:
+                update.released_resource = compute_resource
+
+        update.status_changed = job_status != job.status
+        if update.status_changed:
+            logger.info(
+                "Job [%s] of [%s] changed from [%s] to [%s]",
+                job.id,
+                job.author,
+                job.status,
+                job_status,
+            )
+            job.status = job_status
+            # cleanup env vars
+            if job.in_terminal_state():
+                job.env_vars = "{}"
+
+        if job_handler:
+            self._ingest_logs(job, logs, update)
+        return update
+
+    def _ingest_logs(self, job: Job, logs: Optional[str], update: JobUpdate) -> None:
+        """Collects only output of ray logs that was not ingested yet."""
+        if logs is not None:
+            if len(logs) < job.logs_offset:
+                update.reset_logs = True
+                job.logs_offset = 0
+            new_logs = logs[job.logs_offset :]
+            if new_logs:
+                update.logs.append(new_logs)
+                job.logs_offset = len(logs)
+
+        if job.logs_offset == 0:
+            update.logs.append(check_logs(logs, job))
@@ -0,0 +1,32 @@
+"""Middlewares."""
+
+from django.conf import settings
+from django.core.handlers.wsgi import LimitedStream
+
+
+class ChunkedRequestMiddleware:  # pylint: disable=too-few-public-methods
+    """Lets views read body of requests with chunked transfer encoding.
+
+    Django reads request body up to its content length, which chunked
+    requests do not have, so their body would be empty. When server
+    terminates input stream at the end of body (`wsgi.input_terminated`),
+    body is read until its end, up to `CHUNKED_REQUEST_MAX_SIZE` bytes.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        meta = request.META
+        if (
+            "chunked" in meta.get("HTTP_TRANSFER_ENCODING", "").lower()
+            and meta.get("wsgi.input_terminated")
+            and not meta.get("CONTENT_LENGTH")
+        ):
+            max_size = settings.CHUNKED_REQUEST_MAX_SIZE
+            # parsers of request body rely on content length
+            meta["CONTENT_LENGTH"] = str(max_size)
+            request._stream = LimitedStream(  # pylint: disable=protected-access
+                meta["wsgi.input"], max_size
+            )
+        return self.get_response(request)
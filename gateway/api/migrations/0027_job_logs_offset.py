@@ -0,0 +1,18 @@
+# Generated by Django 5.2.18 on 2026-10-18 09:36
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("api", "0026_merge_20240613_1848"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="job",
+            name="logs_offset",
+            field=models.PositiveBigIntegerField(default=0),
+        ),
+    ]
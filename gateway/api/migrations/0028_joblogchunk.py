@@ -0,0 +1,91 @@
+# Generated by Django 5.2.18 on 2026-10-18 09:38
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+DEFAULT_JOB_LOGS = "No logs yet."
+BATCH_SIZE = 1000
+
+
+def move_logs_to_chunks(apps, schema_editor):  # pylint: disable=unused-argument
+    """Moves logs stored in job records into log chunks."""
+    job_model = apps.get_model("api", "Job")
+    job_log_chunk_model = apps.get_model("api", "JobLogChunk")
+
+    chunks = []
+    jobs = (
+        job_model.objects.exclude(logs="")
+        .exclude(logs=DEFAULT_JOB_LOGS)
+        .values_list("id", "logs")
+    )
+    for job_id, logs in jobs.iterator(chunk_size=BATCH_SIZE):
+        chunks.append(
+            job_log_chunk_model(job_id=job_id, sequence=0, offset=0, content=logs)
+        )
+        if len(chunks) >= BATCH_SIZE:
+            job_log_chunk_model.objects.bulk_create(chunks)
+            chunks = []
+    job_log_chunk_model.objects.bulk_create(chunks)
+
+
+def move_chunks_to_logs(apps, schema_editor):  # pylint: disable=unused-argument
+    """Restores logs of job records from log chunks."""
+    job_model = apps.get_model("api", "Job")
+    job_log_chunk_model = apps.get_model("api", "JobLogChunk")
+
+    logs = {}
+    for chunk in job_log_chunk_model.objects.order_by("job_id", "sequence").iterator(
+        chunk_size=BATCH_SIZE
+    ):
+        logs[chunk.job_id] = logs.get(chunk.job_id, "") + chunk.content
+    for job_id, job_logs in logs.items():
+        job_model.objects.filter(id=job_id).update(logs=job_logs)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("api", "0027_job_logs_offset"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="JobLogChunk",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("sequence", models.PositiveIntegerField()),
+                ("offset", models.PositiveBigIntegerField()),
+                ("content", models.TextField()),
+                ("created", models.DateTimeField(auto_now_add=True)),
+                (
+                    "job",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="log_chunks",
+                        to="api.job",
+                    ),
+                ),
+            ],
+            options={
+                "constraints": [
+                    models.UniqueConstraint(
+                        fields=("job", "sequence"), name="unique_job_log_chunk_sequence"
+                    )
+                ],
+            },
+        ),
+        migrations.RunPython(move_logs_to_chunks, move_chunks_to_logs),
+        migrations.RemoveField(
+            model_name="job",
+            name="logs",
+        ),
+    ]
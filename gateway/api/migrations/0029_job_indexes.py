@@ -0,0 +1,36 @@
+# Generated by Django 5.2.18 on 2026-10-18 09:54
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("api", "0028_joblogchunk"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="job",
+            index=models.Index(
+                fields=["status", "author", "created"],
+                name="job_status_author_created_idx",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="job",
+            index=models.Index(
+                fields=["author", "-created"], name="job_author_created_idx"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="job",
+            index=models.Index(
+                condition=models.Q(("status__in", ["RUNNING", "PENDING"])),
+                fields=["compute_resource"],
+                name="job_running_resource_idx",
+            ),
+        ),
+    ]
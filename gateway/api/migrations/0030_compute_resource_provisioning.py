@@ -0,0 +1,55 @@
+# Generated by Django 5.2.18 on 2026-10-18 09:58
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("api", "0029_job_indexes"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name="job",
+            name="job_running_resource_idx",
+        ),
+        migrations.AddField(
+            model_name="computeresource",
+            name="status",
+            field=models.CharField(
+                choices=[("PROVISIONING", "Provisioning"), ("READY", "Ready")],
+                default="READY",
+                max_length=20,
+            ),
+        ),
+        migrations.AlterField(
+            model_name="job",
+            name="status",
+            field=models.CharField(
+                choices=[
+                    ("PENDING", "Pending"),
+                    ("RUNNING", "Running"),
+                    ("STOPPED", "Stopped"),
+                    ("SUCCEEDED", "Succeeded"),
+                    ("QUEUED", "Queued"),
+                    ("PROVISIONING", "Provisioning"),
+                    ("FAILED", "Failed"),
+                ],
+                default="QUEUED",
+                max_length=20,
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="job",
+            index=models.Index(
+                condition=models.Q(
+                    ("status__in", ["PROVISIONING", "RUNNING", "PENDING"])
+                ),
+                fields=["compute_resource"],
+                name="job_active_resource_idx",
+            ),
+        ),
+    ]
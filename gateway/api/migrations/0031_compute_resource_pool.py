@@ -0,0 +1,18 @@
+# Generated by Django 5.2.18 on 2026-10-18 10:01
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("api", "0030_compute_resource_provisioning"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="computeresource",
+            name="pool",
+            field=models.CharField(blank=True, default=None, max_length=20, null=True),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.18 on 2026-10-18 10:03
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("api", "0031_compute_resource_pool"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="computeresource",
+            name="last_used",
+            field=models.DateTimeField(blank=True, default=None, null=True),
+        ),
+    ]
@@ -0,0 +1,36 @@
+# Generated by Django 5.2.18 on 2026-10-18 10:07
+
+import api.artifacts
+import api.models
+import django.core.validators
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("api", "0032_compute_resource_last_used"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="program",
+            name="artifact_hash",
+            field=models.CharField(blank=True, db_index=True, max_length=64, null=True),
+        ),
+        migrations.AlterField(
+            model_name="program",
+            name="artifact",
+            field=models.FileField(
+                blank=True,
+                null=True,
+                storage=api.artifacts.ArtifactStorage(),
+                upload_to=api.models.get_upload_path,
+                validators=[
+                    django.core.validators.FileExtensionValidator(
+                        allowed_extensions=["tar"]
+                    )
+                ],
+            ),
+        ),
+    ]
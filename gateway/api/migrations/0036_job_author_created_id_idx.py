@@ -0,0 +1,25 @@
+# Generated by Django 5.2.18 on 2026-10-18 10:40
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("api", "0035_user_groups_sync"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name="job",
+            name="job_author_created_idx",
+        ),
+        migrations.AddIndex(
+            model_name="job",
+            index=models.Index(
+                fields=["author", "-created", "-id"], name="job_author_created_id_idx"
+            ),
+        ),
+    ]
@@ -0,0 +1,83 @@
+# Generated by Django 5.2.18 on 2026-10-18 11:41
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+def create_program_access(apps, schema_editor):  # pylint: disable=unused-argument
+    """Materializes access of users to programs through groups."""
+    program_model = apps.get_model("api", "Program")
+    program_access_model = apps.get_model("api", "ProgramAccess")
+    grants = program_model.instances.through.objects.filter(
+        group__permissions__codename__in=["view_program", "run_program"],
+        group__user__isnull=False,
+    ).values_list("program_id", "group__user", "group__permissions")
+    program_access_model.objects.bulk_create(
+        [
+            program_access_model(
+                program_id=program_id, user_id=user_id, permission_id=permission_id
+            )
+            for program_id, user_id, permission_id in grants.distinct().iterator()
+        ],
+        batch_size=1000,
+        ignore_conflicts=True,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("api", "0036_job_author_created_id_idx"),
+        ("auth", "0012_alter_user_first_name_max_length"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="ProgramAccess",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                (
+                    "permission",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        to="auth.permission",
+                    ),
+                ),
+                (
+                    "program",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="access",
+                        to="api.program",
+                    ),
+                ),
+                (
+                    "user",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="program_access",
+                        to=settings.AUTH_USER_MODEL,
+                    ),
+                ),
+            ],
+            options={
+                "constraints": [
+                    models.UniqueConstraint(
+                        fields=("user", "permission", "program"),
+                        name="unique_program_access",
+                    )
+                ],
+            },
+        ),
+        migrations.RunPython(create_program_access, migrations.RunPython.noop),
+    ]
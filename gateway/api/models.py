@@ -1,25 +1,37 @@
 """Models."""
 
 import uuid
+from typing import Optional, Tuple
 
 from concurrency.fields import IntegerVersionField
-from django.contrib.auth.models import Group
+from django.contrib.auth.models import Group, Permission
 from django.conf import settings
 from django.core.validators import FileExtensionValidator
-from django.db import models
+from django.db import IntegrityError, models, transaction
+from django.db.models import F
+from django.db.models.functions import Length
 from django_prometheus.models import ExportModelOperationsMixin
 
+from api.artifacts import ARTIFACTS_DIR, ArtifactStorage, file_sha256
+
 
 VIEW_PROGRAM_PERMISSION = "view_program"
 RUN_PROGRAM_PERMISSION = "run_program"
 
 
-def get_upload_path(instance, filename):
-    """Returns save path for artifacts."""
-    return f"{instance.author.username}/{instance.id}/{filename}"
+def get_upload_path(instance, filename):  # pylint: disable=unused-argument
+    """Returns content addressed save path for artifacts."""
+    instance.artifact_hash = file_sha256(instance.artifact.file)
+    return f"{ARTIFACTS_DIR}/{instance.artifact_hash}.tar"
 
 
 DEFAULT_PROGRAM_ENTRYPOINT = "main.py"
+DEFAULT_JOB_LOGS = "No logs yet."
+# attempts of appending log chunk when sequence conflicts with concurrent append
+JOB_LOGS_APPEND_RETRIES = 3
+# statuses of jobs using resources of user, including ones waiting for cluster,
+# module level to be used in partial index of job model
+JOB_ACTIVE_STATES = ["PROVISIONING", "RUNNING", "PENDING"]
 
 
 class JobConfig(models.Model):
@@ -90,10 +102,15 @@ class Program(ExportModelOperationsMixin("program"), models.Model):
     entrypoint = models.CharField(max_length=255, default=DEFAULT_PROGRAM_ENTRYPOINT)
     artifact = models.FileField(
         upload_to=get_upload_path,
+        storage=ArtifactStorage(),
         null=True,
         blank=True,
         validators=[FileExtensionValidator(allowed_extensions=["tar"])],
     )
+    # set when artifact is saved, so must be declared after artifact
+    artifact_hash = models.CharField(
+        max_length=64, null=True, blank=True, db_index=True
+    )
     image = models.CharField(max_length=511, null=True, blank=True)
 
     env_vars = models.TextField(null=False, blank=True, default="{}")
@@ -124,6 +141,13 @@ class Program(ExportModelOperationsMixin("program"), models.Model):
 class ComputeResource(models.Model):
     """Compute resource model."""
 
+    PROVISIONING = "PROVISIONING"
+    READY = "READY"
+    STATUSES = [
+        (PROVISIONING, "Provisioning"),
+        (READY, "Ready"),
+    ]
+
     id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
     created = models.DateTimeField(auto_now_add=True)
 
@@ -131,6 +155,12 @@ class ComputeResource(models.Model):
     host = models.CharField(max_length=100, blank=False, null=False)
 
     active = models.BooleanField(default=True, null=True)
+    # cluster is provisioning until its head node answers
+    status = models.CharField(max_length=20, choices=STATUSES, default=READY)
+    # python version of warm pool cluster waits in until assigned to user
+    pool = models.CharField(max_length=20, null=True, blank=True, default=None)
+    # last time cluster had active jobs, idle clusters are evicted by it
+    last_used = models.DateTimeField(null=True, blank=True, default=None)
 
     owner = models.ForeignKey(
         to=settings.AUTH_USER_MODEL,
@@ -153,17 +183,20 @@ class Job(models.Model):
     SUCCEEDED = "SUCCEEDED"
     FAILED = "FAILED"
     QUEUED = "QUEUED"
+    PROVISIONING = "PROVISIONING"
     JOB_STATUSES = [
         (PENDING, "Pending"),
         (RUNNING, "Running"),
         (STOPPED, "Stopped"),
         (SUCCEEDED, "Succeeded"),
         (QUEUED, "Queued"),
+        (PROVISIONING, "Provisioning"),
         (FAILED, "Failed"),
     ]
 
     TERMINAL_STATES = [SUCCEEDED, FAILED, STOPPED]
     RUNNING_STATES = [RUNNING, PENDING]
+    ACTIVE_STATES = JOB_ACTIVE_STATES
 
     id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
     created = models.DateTimeField(auto_now_add=True, editable=False)
@@ -178,7 +211,7 @@ class Job(models.Model):
         on_delete=models.CASCADE,
     )
     status = models.CharField(
-        max_length=10,
+        max_length=20,
         choices=JOB_STATUSES,
         default=QUEUED,
     )
@@ -186,7 +219,8 @@ class Job(models.Model):
         ComputeResource, on_delete=models.SET_NULL, null=True, blank=True
     )
     ray_job_id = models.CharField(max_length=255, null=True, blank=True)
-    logs = models.TextField(default="No logs yet.")
+    # number of characters of ray job logs already ingested into log chunks
+    logs_offset = models.PositiveBigIntegerField(default=0)
 
     version = IntegerVersionField()
 
@@ -198,6 +232,26 @@ class Job(models.Model):
         blank=True,
     )
 
+    class Meta:
+        indexes = [
+            # fair share scheduling and running jobs count per user
+            models.Index(
+                fields=["status", "author", "created"],
+                name="job_status_author_created_idx",
+            ),
+            # jobs list of user, keyset pagination by created and id
+            models.Index(
+                fields=["author", "-created", "-id"],
+                name="job_author_created_id_idx",
+            ),
+            # active jobs of compute resource
+            models.Index(
+                fields=["compute_resource"],
+                condition=models.Q(status__in=JOB_ACTIVE_STATES),
+                name="job_active_resource_idx",
+            ),
+        ]
+
     def __str__(self):
         return f"<Job {self.id} | {self.status}>"
 
@@ -205,6 +259,204 @@ class Job(models.Model):
         """Returns true if job is in terminal state."""
         return self.status in self.TERMINAL_STATES
 
+    @property
+    def logs(self) -> str:
+        """Returns all stored logs of the job."""
+        logs, _ = self.read_logs()
+        return logs or DEFAULT_JOB_LOGS
+
+    def append_logs(self, logs: str) -> None:
+        """Appends logs to the job as new log chunk.
+
+        Only latest `JOB_LOGS_MAX_SIZE` characters are kept,
+        older chunks are removed.
+
+        Args:
+            logs: logs to append
+        """
+        if not logs:
+            return
+        for attempt in range(1, JOB_LOGS_APPEND_RETRIES + 1):
+            try:
+                with transaction.atomic():
+                    # appends of scheduler and views are serialized by job row lock,
+                    # conflicts are retried on databases without row locks
+                    list(
+                        Job.objects.select_for_update()
+                        .filter(pk=self.pk)
+                        .values_list("pk", flat=True)
+                    )
+                    sequence, offset = self._next_log_position()
+                    JobLogChunk.objects.create(
+                        job=self, sequence=sequence, offset=offset, content=logs
+                    )
+                break
+            except IntegrityError:
+                if attempt == JOB_LOGS_APPEND_RETRIES:
+                    raise
+
+        max_size = settings.JOB_LOGS_MAX_SIZE
+        if max_size > 0:
+            JobLogChunk.objects.filter(job=self).annotate(
+                end=F("offset") + Length("content")
+            ).filter(end__lte=offset + len(logs) - max_size).delete()
+
+    def _next_log_position(self) -> Tuple[int, int]:
+        """Returns sequence and offset of next log chunk of the job."""
+        last_chunk = (
+            JobLogChunk.objects.filter(job=self)
+            .annotate(size=Length("content"))
+            .only("sequence", "offset")
+            .order_by("-sequence")
+            .first()
+        )
+        if last_chunk is None:
+            return 0, 0
+        return last_chunk.sequence + 1, last_chunk.offset + last_chunk.size
+
+    def read_logs(self, offset: int = 0, limit: Optional[int] = None):
+        """Reads range of job logs.
+
+        Args:
+            offset: position of first character to read
+            limit: max number of characters to read, all if not set
+
+        Returns:
+            logs and offset of the first returned character,
+            which is later than requested if older logs were removed
+        """
+        chunks = JobLogChunk.objects.filter(job=self)
+        first_chunk = (
+            chunks.filter(offset__lte=offset).only("offset").order_by("-offset").first()
+        )
+        if first_chunk is not None:
+            chunks = chunks.filter(offset__gte=first_chunk.offset)
+        else:
+            # logs before offset were removed, read from first retained chunk
+            retained_offset = (
+                chunks.order_by("offset").values_list("offset", flat=True).first()
+            )
+            if retained_offset is not None:
+                offset = max(offset, retained_offset)
+        if limit is not None:
+            chunks = chunks.filter(offset__lt=offset + limit)
+        chunks = list(chunks.only("offset", "content").order_by("sequence"))
+        if not chunks:
+            return "", offset
+
+        start = max(offset, chunks[0].offset)
+        logs = "".join(chunk.content for chunk in chunks)[start - chunks[0].offset :]
+        if limit is not None:
+            logs = logs[:limit]
+        return logs, start
+
+
+class JobLogChunk(models.Model):
+    """Job logs chunk model.
+
+    Logs of a job are stored as append only sequence of chunks,
+    so job records do not carry log data.
+    """
+
+    job = models.ForeignKey(to=Job, on_delete=models.CASCADE, related_name="log_chunks")
+    sequence = models.PositiveIntegerField()
+    # position of the first character of the chunk in job logs
+    offset = models.PositiveBigIntegerField()
+    content = models.TextField()
+    created = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=["job", "sequence"], name="unique_job_log_chunk_sequence"
+            ),
+        ]
+
+    def __str__(self):
+        return f"<JobLogChunk {self.job_id} | {self.sequence}>"
+
+
+class UserFile(models.Model):
+    """Index of files in media directory of user.
+
+    Listing files reads metadata from the index instead of the
+    file system. Index is updated when files are uploaded, deleted
+    or written by jobs and is reconciled with file system periodically.
+    """
+
+    owner = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        related_name="files",
+    )
+    name = models.CharField(max_length=255)
+    size = models.PositiveBigIntegerField()
+    modified = models.DateTimeField()
+    # sha256 of file content, empty until computed by `reconcile_files`
+    checksum = models.CharField(max_length=64)
+    updated = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=["owner", "name"], name="unique_user_file_name"
+            ),
+        ]
+
+    def __str__(self):
+        return f"<UserFile {self.owner_id} | {self.name}>"
+
+
+class UserGroupsSync(models.Model):
+    """State of last synchronization of user groups with network instances.
+
+    Groups are synchronized again only when fingerprint of instances
+    changes or after sync interval.
+    """
+
+    user = models.OneToOneField(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name="groups_sync",
+    )
+    # sha256 of sorted instance names
+    fingerprint = models.CharField(max_length=64)
+    synced = models.DateTimeField()
+
+    def __str__(self):
+        return f"<UserGroupsSync {self.user_id} | {self.synced}>"
+
+
+class ProgramAccess(models.Model):
+    """Access of user to program granted by permission of program group.
+
+    Rows materialize join of program groups, group permissions and group
+    memberships of users, so programs accessible by user are read without
+    it. Rows are kept up to date by `api.access` when any of them changes.
+    """
+
+    user = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        related_name="program_access",
+    )
+    program = models.ForeignKey(
+        to=Program, on_delete=models.CASCADE, related_name="access"
+    )
+    permission = models.ForeignKey(to=Permission, on_delete=models.CASCADE)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=["user", "permission", "program"],
+                name="unique_program_access",
+            ),
+        ]
+
+    def __str__(self):
+        return f"<ProgramAccess {self.user_id} | {self.program_id}>"
+
 
 class RuntimeJob(models.Model):
     """Runtime Job model."""
@@ -1,14 +1,20 @@
 """Proxies for database models"""
 
+from datetime import timedelta
 from typing import List
+import hashlib
+import json
 import logging
 import requests
 
 from django.conf import settings
 from django.contrib.auth import get_user_model
 from django.contrib.auth.models import Group, Permission
+from django.db import transaction
+from django.utils import timezone
 
-from api.models import VIEW_PROGRAM_PERMISSION
+from api.access import refresh_program_access
+from api.models import VIEW_PROGRAM_PERMISSION, UserGroupsSync
 from api.utils import safe_request, remove_duplicates_from_list
 
 
@@ -86,10 +92,72 @@ class QuantumUserProxy(get_user_model()):  # pylint: disable=too-few-public-meth
                                 )
         return instances
 
+    def _sync_groups(self, instances: List[str]) -> None:
+        """
+        Applies difference between current groups of user and instances.
+        New groups are created with view program permission.
+        Args:
+            instances: names of groups user must belong to
+        """
+        user_groups = self.groups.through
+        current = dict(self.groups.values_list("name", "id"))
+
+        stale = [
+            group_id for name, group_id in current.items() if name not in instances
+        ]
+        if stale:
+            logger.info("Remove user from [%s] groups", len(stale))
+            user_groups.objects.filter(user_id=self.pk, group_id__in=stale).delete()
+
+        missing = [instance for instance in instances if instance not in current]
+        if missing:
+            self._join_groups(missing)
+
+        # bulk operations on memberships do not send m2m_changed signals
+        if stale or missing:
+            refresh_program_access(user_ids=[self.pk])
+
+    def _join_groups(self, missing: List[str]) -> None:
+        """
+        Adds user to groups, creating missing ones with view program permission.
+        Args:
+            missing: names of groups user does not belong to yet
+        """
+        user_groups = self.groups.through
+        groups = dict(Group.objects.filter(name__in=missing).values_list("name", "id"))
+        new_groups = [name for name in missing if name not in groups]
+        if new_groups:
+            logger.info("Create [%s] new groups", len(new_groups))
+            Group.objects.bulk_create(
+                [Group(name=name) for name in new_groups], ignore_conflicts=True
+            )
+            created = dict(
+                Group.objects.filter(name__in=new_groups).values_list("name", "id")
+            )
+            view_program = Permission.objects.get(codename=VIEW_PROGRAM_PERMISSION)
+            group_permissions = Group.permissions.through
+            group_permissions.objects.bulk_create(
+                [
+                    group_permissions(group_id=group_id, permission_id=view_program.id)
+                    for group_id in created.values()
+                ],
+                ignore_conflicts=True,
+            )
+            groups.update(created)
+
+        logger.info("Add user to [%s] groups", len(missing))
+        user_groups.objects.bulk_create(
+            [user_groups(user_id=self.pk, group_id=groups[name]) for name in missing],
+            ignore_conflicts=True,
+        )
+
     def update_groups(self, access_token) -> None:
         """
         This method obtains the instances of a user from IQP Network User information
         and update Django Groups with that information.
+
+        Groups are synchronized only if instances changed since last
+        synchronization or `SETTINGS_GROUPS_SYNC_INTERVAL` elapsed.
         Args:
             access_token: IQP user token
         """
@@ -101,14 +169,23 @@ class QuantumUserProxy(get_user_model()):  # pylint: disable=too-few-public-meth
         logger.info("Remove duplicates from instances")
         unique_instances = remove_duplicates_from_list(instances)
 
-        logger.info("Clean user groups before update them")
-        self.groups.clear()
-
-        logger.info("Update [%s] groups", len(unique_instances))
-        view_program = Permission.objects.get(codename=VIEW_PROGRAM_PERMISSION)
-        for instance in unique_instances:
-            group, created = Group.objects.get_or_create(name=instance)
-            if created:
-                logger.info("New group created")
-                group.permissions.add(view_program)
-            group.user_set.add(self)
+        fingerprint = hashlib.sha256(
+            json.dumps(sorted(unique_instances)).encode()
+        ).hexdigest()
+        now = timezone.now()
+        sync = UserGroupsSync.objects.filter(user_id=self.pk).first()
+        if (
+            sync is not None
+            and sync.fingerprint == fingerprint
+            and now - sync.synced
+            < timedelta(seconds=settings.SETTINGS_GROUPS_SYNC_INTERVAL)
+        ):
+            logger.info("Groups are up to date")
+            return
+
+        logger.info("Sync [%s] groups", len(unique_instances))
+        with transaction.atomic():
+            self._sync_groups(unique_instances)
+            UserGroupsSync.objects.update_or_create(
+                user_id=self.pk, defaults={"fingerprint": fingerprint, "synced": now}
+            )
@@ -0,0 +1,213 @@
+"""Job notifications.
+
+Terminal job status transitions and appended job logs are published
+with postgres NOTIFY, so requests waiting for jobs to finish and logs
+streams are woken up right away instead of polling. Other database
+backends fall back to periodic checks.
+"""
+
+import logging
+import select
+import sys
+import threading
+import time
+from typing import Dict, Optional, Sequence, Set, Tuple
+
+from django.conf import settings
+from django.db import connection, connections
+from django.db.models.signals import post_save
+from django.dispatch import receiver
+
+from .models import Job, JobLogChunk
+
+logger = logging.getLogger("gateway")
+
+JOB_STATUS_CHANNEL = "job_status"
+JOB_LOGS_CHANNEL = "job_logs"
+
+
+def notifications_supported() -> bool:
+    """Returns true if database supports LISTEN/NOTIFY."""
+    return connection.vendor == "postgresql"
+
+
+def notify_job_status(job: Job) -> None:
+    """Publishes terminal status of job.
+
+    Notification is delivered when current transaction is committed.
+
+    Args:
+        job: job that changed status
+    """
+    if not notifications_supported() or not job.in_terminal_state():
+        return
+    with connection.cursor() as cursor:
+        cursor.execute("SELECT pg_notify(%s, %s)", [JOB_STATUS_CHANNEL, str(job.id)])
+
+
+@receiver(post_save, sender=JobLogChunk)
+def notify_job_logs(
+    sender, instance: JobLogChunk, created: bool, **kwargs
+):  # pylint: disable=unused-argument
+    """Publishes that logs were appended to job.
+
+    Notification is delivered when current transaction is committed.
+    """
+    if not created or not notifications_supported():
+        return
+    with connection.cursor() as cursor:
+        cursor.execute(
+            "SELECT pg_notify(%s, %s)", [JOB_LOGS_CHANNEL, str(instance.job_id)]
+        )
+
+
+def release_database_connection() -> None:
+    """Closes database connection of current request while it waits.
+
+    Long lived requests served concurrently by gevent workers reconnect
+    on next query instead of holding connection while waiting. Sync workers
+    serve single request at a time, so they keep their connection.
+    Connection is kept inside transaction.
+    """
+    if connection.in_atomic_block or not _cooperative_worker():
+        return
+    connection.close()
+
+
+def _cooperative_worker() -> bool:
+    monkey = sys.modules.get("gevent.monkey")
+    return monkey is not None and monkey.is_module_patched("socket")
+
+
+class JobNotificationListener:  # pylint: disable=too-few-public-methods
+    """Listens to job notifications.
+
+    Single background thread per process listens on dedicated database
+    connection and wakes up waiters of notified jobs.
+    """
+
+    def __init__(self):
+        self._waiters: Dict[Tuple[str, str], Set[threading.Event]] = {}
+        self._lock = threading.Lock()
+        self._thread: Optional[threading.Thread] = None
+
+    def wait(
+        self,
+        job_id: str,
+        timeout: float,
+        channels: Sequence[str] = (JOB_STATUS_CHANNEL,),
+    ) -> bool:
+        """Waits for notification about job.
+
+        Args:
+            job_id: job id
+            timeout: max time to wait in seconds
+            channels: channels of notifications to wait for
+
+        Returns:
+            True if notification was received
+        """
+        event = threading.Event()
+        keys = [(channel, str(job_id)) for channel in channels]
+        with self._lock:
+            self._ensure_started()
+            for key in keys:
+                self._waiters.setdefault(key, set()).add(event)
+        try:
+            return event.wait(timeout=timeout)
+        finally:
+            with self._lock:
+                for key in keys:
+                    waiters = self._waiters.get(key, set())
+                    waiters.discard(event)
+                    if not waiters:
+                        self._waiters.pop(key, None)
+
+    def _ensure_started(self):
+        if not notifications_supported():
+            return
+        if self._thread is None or not self._thread.is_alive():
+            self._thread = threading.Thread(
+                target=self._listen, name="job-status-listener", daemon=True
+            )
+            self._thread.start()
+
+    def _wake_up(self, channel: str, job_id: str):
+        with self._lock:
+            for event in self._waiters.get((channel, job_id), set()):
+                event.set()
+
+    def _listen(self):
+        import psycopg2  # pylint: disable=import-outside-toplevel
+        from psycopg2.extensions import (  # pylint: disable=import-outside-toplevel
+            ISOLATION_LEVEL_AUTOCOMMIT,
+        )
+
+        while True:
+            listen_connection = None
+            try:
+                connection_params = connections["default"].get_connection_params()
+                connection_params.pop("cursor_factory", None)
+                listen_connection = psycopg2.connect(**connection_params)
+                listen_connection.set_isolation_level(ISOLATION_LEVEL_AUTOCOMMIT)
+                with listen_connection.cursor() as cursor:
+                    cursor.execute(f"LISTEN {JOB_STATUS_CHANNEL};")
+                    cursor.execute(f"LISTEN {JOB_LOGS_CHANNEL};")
+                logger.info("Listening to job notifications.")
+
+                while True:
+                    if select.select([listen_connection], [], [], 60) == ([], [], []):
+                        continue
+                    listen_connection.poll()
+                    while listen_connection.notifies:
+                        notification = listen_connection.notifies.pop(0)
+                        self._wake_up(notification.channel, notification.payload)
+            except Exception:  # pylint: disable=broad-exception-caught
+                logger.exception("Job status listener failed. Reconnecting.")
+                time.sleep(settings.JOB_WAIT_POLL_INTERVAL)
+            finally:
+                if listen_connection is not None:
+                    listen_connection.close()
+
+
+job_notification_listener = JobNotificationListener()
+
+
+def wait_for_job_terminal_state(job: Job, timeout: float) -> Optional[str]:
+    """Waits until job is in terminal state.
+
+    Status is checked again on each notification and at least every
+    `JOB_WAIT_POLL_INTERVAL` seconds in case notification was missed.
+
+    Args:
+        job: job to wait for
+        timeout: max time to wait in seconds
+
+    Returns:
+        latest status of job
+    """
+    deadline = time.monotonic() + timeout
+    while True:
+        job_status = (
+            Job.objects.filter(id=job.id).values_list("status", flat=True).first()
+        )
+        remaining = deadline - time.monotonic()
+        if job_status is None or job_status in Job.TERMINAL_STATES or remaining <= 0:
+            return job_status
+        release_database_connection()
+        job_notification_listener.wait(
+            str(job.id), timeout=min(remaining, settings.JOB_WAIT_POLL_INTERVAL)
+        )
+
+
+def wait_for_job_logs(job: Job, timeout: float) -> None:
+    """Waits until logs are appended to job or job changes terminal status.
+
+    Args:
+        job: job to wait for
+        timeout: max time to wait in seconds
+    """
+    release_database_connection()
+    job_notification_listener.wait(
+        str(job.id), timeout=timeout, channels=(JOB_STATUS_CHANNEL, JOB_LOGS_CHANNEL)
+    )
@@ -0,0 +1,141 @@
+"""Pagination classes for api views."""
+
+import base64
+import json
+from typing import List, Optional
+
+from django.core.exceptions import ValidationError
+from django.db.models import Q
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination
+from rest_framework.response import Response
+from rest_framework.settings import api_settings
+from rest_framework.utils.urls import replace_query_param
+
+
+class KeysetPagination(BasePagination):  # pylint: disable=abstract-method
+    """Cursor pagination by values of unique ordering fields.
+
+    Page controls of browsable api are not displayed, so `to_html`
+    is not implemented.
+
+    Cursor holds ordering values of last item of page and next page
+    starts after them, so pages are read with index range scan instead of
+    offset and do not shift when new items are created.
+    """
+
+    cursor_query_param = "cursor"
+    limit_query_param = "limit"
+    # last field must be unique
+    ordering = ("-created", "-id")
+    max_limit = 1000
+
+    def __init__(self):
+        self.request = None
+        self.limit = api_settings.PAGE_SIZE
+        self.page: List = []
+        self.has_next = False
+
+    def get_limit(self, request) -> int:
+        """Returns page size from request."""
+        try:
+            limit = int(request.query_params[self.limit_query_param])
+        except (KeyError, ValueError):
+            return self.limit
+        if limit <= 0:
+            return self.limit
+        return min(limit, self.max_limit)
+
+    def decode_cursor(self, request) -> Optional[List[str]]:
+        """Returns ordering values of cursor from request.
+
+        Empty cursor starts from the first page.
+        """
+        encoded = request.query_params.get(self.cursor_query_param)
+        if not encoded:
+            return None
+        try:
+            values = json.loads(base64.urlsafe_b64decode(encoded.encode()))
+        except (TypeError, ValueError) as error:
+            raise NotFound("Invalid cursor.") from error
+        if not isinstance(values, list) or len(values) != len(self.ordering):
+            raise NotFound("Invalid cursor.")
+        return values
+
+    def encode_cursor(self, item) -> str:
+        """Returns cursor pointing after item."""
+        values = [str(getattr(item, field.lstrip("-"))) for field in self.ordering]
+        return base64.urlsafe_b64encode(json.dumps(values).encode()).decode()
+
+    def _after(self, values: List[str]) -> Q:
+        """Returns filter of items ordered after ordering values."""
+        after = Q()
+        equal = Q()
+        for field, value in zip(self.ordering, values):
+            name = field.lstrip("-")
+            lookup = "lt" if field.startswith("-") else "gt"
+            after |= equal & Q(**{f"{name}__{lookup}": value})
+            equal &= Q(**{name: value})
+        return after
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        self.limit = self.get_limit(request)
+        cursor = self.decode_cursor(request)
+
+        queryset = queryset.order_by(*self.ordering)
+        if cursor is not None:
+            try:
+                queryset = queryset.filter(self._after(cursor))
+            except (TypeError, ValueError, ValidationError) as error:
+                raise NotFound("Invalid cursor.") from error
+
+        items = list(queryset[: self.limit + 1])
+        self.has_next = len(items) > self.limit
+        self.page = items[: self.limit]
+        return self.page
+
+    def get_next_link(self) -> Optional[str]:
+        """Returns url of next page."""
+        if not self.has_next:
+            return None
+        return replace_query_param(
+            self.request.build_absolute_uri(),
+            self.cursor_query_param,
+            self.encode_cursor(self.page[-1]),
+        )
+
+    def get_paginated_response(self, data):
+        return Response({"next": self.get_next_link(), "results": data})
+
+    def get_paginated_response_schema(self, schema):
+        return {
+            "type": "object",
+            "required": ["results"],
+            "properties": {
+                "next": {"type": "string", "nullable": True, "format": "uri"},
+                "results": schema,
+            },
+        }
+
+
+class KeysetPaginationMixin:  # pylint: disable=too-few-public-methods
+    """View mixin using keyset pagination if `cursor` parameter is in request.
+
+    Requests without cursor are paginated by `pagination_class` of view.
+    """
+
+    keyset_pagination_class = KeysetPagination
+
+    @property
+    def paginator(self):
+        """Returns paginator instance of request."""
+        if not hasattr(self, "_paginator"):
+            cursor_query_param = self.keyset_pagination_class.cursor_query_param
+            if cursor_query_param in self.request.query_params:
+                self._paginator = (  # pylint: disable=attribute-defined-outside-init
+                    self.keyset_pagination_class()
+                )
+            else:
+                return super().paginator
+        return self._paginator
@@ -4,10 +4,10 @@ import json
 import logging
 import os
 import shutil
-import tarfile
+import threading
 import time
 import uuid
-from typing import Optional
+from typing import Dict, Optional, Tuple
 
 import requests
 import yaml
@@ -16,11 +16,13 @@ from kubernetes import client as kubernetes_client, config
 from kubernetes.client.exceptions import ApiException
 from kubernetes.dynamic.client import DynamicClient
 from kubernetes.dynamic.exceptions import ResourceNotFoundError, NotFoundError
+from prometheus_client import Counter
 from ray.dashboard.modules.job.sdk import JobSubmissionClient
 
 from opentelemetry import trace
 from opentelemetry.trace.propagation.tracecontext import TraceContextTextMapPropagator
 
+from api.artifacts import get_artifact_package
 from api.models import ComputeResource, Job, JobConfig, DEFAULT_PROGRAM_ENTRYPOINT
 from api.utils import (
     try_json_loads,
@@ -33,6 +35,25 @@ from main import settings
 
 logger = logging.getLogger("commands")
 
+_DYNAMIC_CLIENT: Optional[DynamicClient] = None
+_DYNAMIC_CLIENT_LOCK = threading.Lock()
+
+# user id warm pool clusters are rendered with
+WARM_POOL_USER_ID = "warm-pool"
+
+JOB_HANDLER_CACHE_HITS = Counter(
+    "gateway_job_handler_cache_hits_total",
+    "Number of job handlers served from cache.",
+)
+JOB_HANDLER_CACHE_MISSES = Counter(
+    "gateway_job_handler_cache_misses_total",
+    "Number of job handlers not found in cache.",
+)
+JOB_HANDLER_CACHE_EVICTIONS = Counter(
+    "gateway_job_handler_cache_evictions_total",
+    "Number of job handlers evicted from cache by idle ttl or invalidation.",
+)
+
 
 class JobHandler:
     """JobHandler."""
@@ -50,6 +71,7 @@ class JobHandler:
         return retry_function(
             callback=lambda: self.client.get_job_status(ray_job_id),
             error_message=f"Runtime error during status fetching from ray job [{ray_job_id}]",
+            deadline=settings.RAY_API_RETRY_DEADLINE,
         )
 
     def logs(self, ray_job_id: str) -> Optional[str]:
@@ -57,6 +79,7 @@ class JobHandler:
         return retry_function(
             callback=lambda: self.client.get_job_logs(ray_job_id),
             error_message=f"Runtime error during logs fetching from ray job [{ray_job_id}]",
+            deadline=settings.RAY_API_RETRY_DEADLINE,
         )
 
     def stop(self, ray_job_id) -> bool:
@@ -64,6 +87,7 @@ class JobHandler:
         return retry_function(
             callback=lambda: self.client.stop_job(ray_job_id),
             error_message=f"Runtime error during stopping of ray job [{ray_job_id}]",
+            deadline=settings.RAY_API_RETRY_DEADLINE,
         )
 
     def submit(self, job: Job) -> Optional[str]:
@@ -84,13 +108,14 @@ class JobHandler:
             _, dependencies = try_json_loads(program.dependencies)
 
             # get artifact
-            working_directory_for_upload = os.path.join(
-                sanitize_file_path(str(settings.MEDIA_ROOT)),
-                "tmp",
-                str(uuid.uuid4()),
-            )
+            working_directory_for_upload = None
             if program.image is not None:
                 # load default artifact
+                working_directory_for_upload = os.path.join(
+                    sanitize_file_path(str(settings.MEDIA_ROOT)),
+                    "tmp",
+                    str(uuid.uuid4()),
+                )
                 os.makedirs(working_directory_for_upload, exist_ok=True)
                 default_entrypoint_template = get_template("main.tmpl")
                 default_entrypoint_content = default_entrypoint_template.render(
@@ -107,9 +132,11 @@ class JobHandler:
                     encoding="utf-8",
                 ) as entrypoint_file:
                     entrypoint_file.write(default_entrypoint_content)
+                working_dir = working_directory_for_upload
             elif bool(program.artifact):
-                with tarfile.open(program.artifact.path) as file:
-                    file.extractall(working_directory_for_upload)
+                # package is cached per artifact hash, ray uploads it by
+                # content addressed uri only if cluster does not have it yet
+                working_dir = get_artifact_package(program)
             else:
                 raise ResourceNotFoundError(
                     f"Program [{program.title}] has no image or artifact associated."
@@ -136,22 +163,107 @@ class JobHandler:
                 callback=lambda: self.client.submit_job(
                     entrypoint=entrypoint,
                     runtime_env={
-                        "working_dir": working_directory_for_upload,
+                        "working_dir": working_dir,
                         "env_vars": env,
                         "pip": dependencies or [],
                     },
                 ),
                 num_retries=settings.RAY_SETUP_MAX_RETRIES,
+                deadline=settings.RAY_CLUSTER_MAX_READINESS_TIME,
                 error_message=f"Ray job [{job.id}] submission failed.",
             )
 
-            if os.path.exists(working_directory_for_upload):
+            if working_directory_for_upload and os.path.exists(
+                working_directory_for_upload
+            ):
                 shutil.rmtree(working_directory_for_upload)
             span.set_attribute("job.rayjobid", job.ray_job_id)
 
         return ray_job_id
 
 
+class JobHandlerCache:
+    """Process wide thread safe cache of job handlers by ray cluster host.
+
+    Entries not used for longer than ttl seconds are evicted.
+    """
+
+    def __init__(self, ttl: float):
+        """Job handler cache.
+
+        Args:
+            ttl: idle time in seconds after which handler is evicted,
+                0 disables caching
+        """
+        self.ttl = ttl
+        self._handlers: Dict[str, Tuple[JobHandler, float]] = {}
+        self._lock = threading.Lock()
+
+    def get(self, host: str) -> Optional[JobHandler]:
+        """Returns cached job handler for host if it is not expired."""
+        with self._lock:
+            entry = self._handlers.get(host)
+            now = time.monotonic()
+            if entry is not None and now - entry[1] > self.ttl:
+                del self._handlers[host]
+                JOB_HANDLER_CACHE_EVICTIONS.inc()
+                entry = None
+            if entry is None:
+                JOB_HANDLER_CACHE_MISSES.inc()
+                return None
+            self._handlers[host] = (entry[0], now)
+        JOB_HANDLER_CACHE_HITS.inc()
+        return entry[0]
+
+    def put(self, host: str, job_handler: JobHandler) -> None:
+        """Stores job handler for host and evicts expired entries."""
+        if self.ttl <= 0:
+            return
+        with self._lock:
+            now = time.monotonic()
+            expired = [
+                cached_host
+                for cached_host, (_, last_used) in self._handlers.items()
+                if now - last_used > self.ttl
+            ]
+            for cached_host in expired:
+                del self._handlers[cached_host]
+            JOB_HANDLER_CACHE_EVICTIONS.inc(len(expired))
+            self._handlers[host] = (job_handler, now)
+
+    def invalidate(self, host: str) -> None:
+        """Removes job handler of host from cache."""
+        with self._lock:
+            if self._handlers.pop(host, None) is not None:
+                JOB_HANDLER_CACHE_EVICTIONS.inc()
+
+    def clear(self) -> None:
+        """Removes all job handlers from cache."""
+        with self._lock:
+            self._handlers.clear()
+
+
+job_handler_cache = JobHandlerCache(ttl=settings.RAY_JOB_HANDLER_CACHE_TTL)
+
+
+def get_dynamic_client() -> DynamicClient:
+    """Returns kubernetes dynamic client.
+
+    Client is created once and reused by the process, so long running
+    scheduler does not load configuration and open connections on each call.
+
+    Returns:
+        kubernetes dynamic client
+    """
+    global _DYNAMIC_CLIENT  # pylint: disable=global-statement
+    with _DYNAMIC_CLIENT_LOCK:
+        if _DYNAMIC_CLIENT is None:
+            config.load_incluster_config()
+            k8s_client = kubernetes_client.api_client.ApiClient()
+            _DYNAMIC_CLIENT = DynamicClient(k8s_client)
+        return _DYNAMIC_CLIENT
+
+
 def get_job_handler(host: str) -> Optional[JobHandler]:
     """Establishes connection of job client with ray cluster.
 
@@ -164,11 +276,22 @@ def get_job_handler(host: str) -> Optional[JobHandler]:
     Raises:
         connection error exception
     """
-    return retry_function(
-        callback=lambda: JobHandler(JobSubmissionClient(host)),
-        num_retries=settings.RAY_SETUP_MAX_RETRIES,
-        error_message=f"Ray JobClientSubmission setup failed for host [{host}].",
-    )
+    job_handler = job_handler_cache.get(host)
+    if job_handler is None:
+        job_handler = retry_function(
+            callback=lambda: JobHandler(JobSubmissionClient(host)),
+            num_retries=settings.RAY_SETUP_MAX_RETRIES,
+            deadline=settings.RAY_JOB_HANDLER_SETUP_DEADLINE,
+            error_message=f"Ray JobClientSubmission setup failed for host [{host}].",
+        )
+        if job_handler is not None:
+            job_handler_cache.put(host, job_handler)
+    return job_handler
+
+
+def get_cluster_host(cluster_name: str) -> str:
+    """Returns host of ray cluster head node dashboard."""
+    return f"http://{cluster_name}-head-svc:8265/"
 
 
 def submit_job(job: Job) -> Job:
@@ -201,42 +324,40 @@ def submit_job(job: Job) -> Job:
     return job
 
 
-def create_ray_cluster(
-    job: Job,
-    cluster_name: Optional[str] = None,
-    cluster_data: Optional[str] = None,
-) -> Optional[ComputeResource]:
-    """Creates ray cluster.
+def render_cluster_data(
+    cluster_name: str,
+    user_id: str,
+    job_config: Optional[JobConfig] = None,
+    node_image: Optional[str] = None,
+    user: Optional[str] = None,
+) -> dict:
+    """Renders ray cluster manifest from `rayclustertemplate.yaml`.
 
     Args:
-        user: user cluster belongs to
-        cluster_name: optional cluster name.
-            by default username+uuid will be used
-        cluster_data: optional cluster data
+        cluster_name: cluster name
+        user_id: user cluster belongs to
+        job_config: optional job config, defaults from settings are used
+        node_image: optional node image, by default image
+            of configured python version is used
+        user: optional user annotation of cluster, `user_id` by default
 
     Returns:
-        returns compute resource associated with ray cluster
-        or None if something went wrong with cluster creation.
+        ray cluster manifest
     """
-    user = job.author
-    job_config = job.config
-
-    namespace = settings.RAY_KUBERAY_NAMESPACE
-    cluster_name = cluster_name or generate_cluster_name(user.username)
-    if not cluster_data:
-        if not job_config:
-            job_config = JobConfig()
-        if not job_config.workers:
-            job_config.workers = settings.RAY_CLUSTER_WORKER_REPLICAS
-        if not job_config.min_workers:
-            job_config.min_workers = settings.RAY_CLUSTER_WORKER_MIN_REPLICAS
-        if not job_config.max_workers:
-            job_config.max_workers = settings.RAY_CLUSTER_WORKER_MAX_REPLICAS
-        if not job_config.auto_scaling:
-            job_config.auto_scaling = settings.RAY_CLUSTER_WORKER_AUTO_SCALING
-        if not job_config.python_version:
-            job_config.python_version = "default"
-
+    if not job_config:
+        job_config = JobConfig()
+    if not job_config.workers:
+        job_config.workers = settings.RAY_CLUSTER_WORKER_REPLICAS
+    if not job_config.min_workers:
+        job_config.min_workers = settings.RAY_CLUSTER_WORKER_MIN_REPLICAS
+    if not job_config.max_workers:
+        job_config.max_workers = settings.RAY_CLUSTER_WORKER_MAX_REPLICAS
+    if not job_config.auto_scaling:
+        job_config.auto_scaling = settings.RAY_CLUSTER_WORKER_AUTO_SCALING
+    if not job_config.python_version:
+        job_config.python_version = "default"
+
+    if node_image is None:
         if job_config.python_version in settings.RAY_NODE_IMAGES_MAP:
             node_image = settings.RAY_NODE_IMAGES_MAP[job_config.python_version]
         else:
@@ -249,28 +370,46 @@ def create_ray_cluster(
             logger.warning(message)
             node_image = settings.RAY_NODE_IMAGE
 
-        # if user specified image use specified image
-        if job.program.image is not None:
-            node_image = job.program.image
-
-        cluster = get_template("rayclustertemplate.yaml")
-        manifest = cluster.render(
-            {
-                "cluster_name": cluster_name,
-                "user_id": user.username,
-                "node_image": node_image,
-                "workers": job_config.workers,
-                "min_workers": job_config.min_workers,
-                "max_workers": job_config.max_workers,
-                "auto_scaling": job_config.auto_scaling,
-                "user": user.username,
-            }
+    cluster = get_template("rayclustertemplate.yaml")
+    manifest = cluster.render(
+        {
+            "cluster_name": cluster_name,
+            "user_id": user_id,
+            "node_image": node_image,
+            "workers": job_config.workers,
+            "min_workers": job_config.min_workers,
+            "max_workers": job_config.max_workers,
+            "auto_scaling": job_config.auto_scaling,
+            "user": user or user_id,
+        }
+    )
+    return yaml.safe_load(manifest)
+
+
+def cluster_template_is_user_specific() -> bool:
+    """Returns true if clusters of different users differ in more than annotation.
+
+    Template using `user_id`, e.g. as `subPath` of user storage volume,
+    renders per user pods, which can not be changed once cluster is created.
+
+    Returns:
+        True if clusters of template can not be shared by users
+    """
+    manifests = [
+        render_cluster_data(
+            WARM_POOL_USER_ID,
+            f"{WARM_POOL_USER_ID}-{index}",
+            user=WARM_POOL_USER_ID,
         )
-        cluster_data = yaml.safe_load(manifest)
+        for index in range(2)
+    ]
+    return manifests[0] != manifests[1]
+
 
-    config.load_incluster_config()
-    k8s_client = kubernetes_client.api_client.ApiClient()
-    dyn_client = DynamicClient(k8s_client)
+def _create_cluster(cluster_name: str, cluster_data: dict) -> ComputeResource:
+    """Creates ray cluster in kuberay and its provisioning compute resource."""
+    namespace = settings.RAY_KUBERAY_NAMESPACE
+    dyn_client = get_dynamic_client()
     raycluster_client = dyn_client.resources.get(api_version="v1", kind="RayCluster")
     response = raycluster_client.create(body=cluster_data, namespace=namespace)
     if response.metadata.name != cluster_name:
@@ -279,40 +418,94 @@ def create_ray_cluster(
         )
         raise RuntimeError("Something went wrong during cluster creation")
 
-    # wait for cluster to be up and running
-    host, cluster_is_ready = wait_for_cluster_ready(cluster_name)
+    # cluster is provisioned in background,
+    # readiness of head node is checked by scheduler
+    resource = ComputeResource()
+    resource.title = cluster_name
+    resource.host = get_cluster_host(cluster_name)
+    resource.status = ComputeResource.PROVISIONING
+    return resource
+
+
+def create_ray_cluster(
+    job: Job,
+    cluster_name: Optional[str] = None,
+    cluster_data: Optional[str] = None,
+) -> ComputeResource:
+    """Creates ray cluster.
 
-    resource = None
-    if cluster_is_ready:
-        resource = ComputeResource()
-        resource.owner = user
-        resource.title = cluster_name
-        resource.host = host
-        resource.save()
+    Args:
+        user: user cluster belongs to
+        cluster_name: optional cluster name.
+            by default username+uuid will be used
+        cluster_data: optional cluster data
+
+    Returns:
+        returns compute resource associated with ray cluster
+        in provisioning status, cluster is not waited for.
+    """
+    user = job.author
+    cluster_name = cluster_name or generate_cluster_name(user.username)
+    if not cluster_data:
+        cluster_data = render_cluster_data(
+            cluster_name,
+            user.username,
+            job_config=job.config,
+            # if user specified image use specified image
+            node_image=job.program.image,
+        )
+
+    resource = _create_cluster(cluster_name, cluster_data)
+    resource.owner = user
+    resource.save()
     return resource
 
 
-def wait_for_cluster_ready(cluster_name: str):
-    """Waits for cluster to became available."""
-    url = f"http://{cluster_name}-head-svc:8265/"
-    success = False
-    attempts = 0
-    max_attempts = settings.RAY_CLUSTER_MAX_READINESS_TIME
-    while not success:
-        attempts += 1
+def create_warm_ray_cluster(
+    python_version: str, cluster_name: Optional[str] = None
+) -> ComputeResource:
+    """Creates generic ray cluster for warm pool.
 
-        if attempts <= max_attempts:
-            try:
-                response = requests.get(url, timeout=5)
-                if response.ok:
-                    success = True
-            except Exception:  # pylint: disable=broad-exception-caught
-                logger.debug("Head node %s is not ready yet.", url)
-            time.sleep(1)
-        else:
-            logger.warning("Waiting too long for cluster [%s] creation", cluster_name)
-            break
-    return url, success
+    Cluster is rendered with default settings and is not owned by any user
+    until it is assigned to one.
+
+    Args:
+        python_version: python version of node image, key of `RAY_NODE_IMAGES_MAP`
+        cluster_name: optional cluster name
+
+    Returns:
+        provisioning compute resource of warm pool
+    """
+    cluster_name = cluster_name or generate_cluster_name(WARM_POOL_USER_ID)
+    cluster_data = render_cluster_data(
+        cluster_name,
+        WARM_POOL_USER_ID,
+        node_image=settings.RAY_NODE_IMAGES_MAP[python_version],
+    )
+    resource = _create_cluster(cluster_name, cluster_data)
+    resource.pool = python_version
+    resource.save()
+    return resource
+
+
+def cluster_is_ready(host: str) -> bool:
+    """Checks once if head node of cluster answers.
+
+    Args:
+        host: head node dashboard address
+
+    Returns:
+        True if cluster is ready to accept jobs
+    """
+    try:
+        response = requests.get(
+            host, timeout=settings.RAY_CLUSTER_READINESS_CHECK_TIMEOUT
+        )
+        response.raise_for_status()
+    except requests.RequestException:
+        logger.debug("Head node %s is not ready yet.", host)
+        return False
+    return True
 
 
 def kill_ray_cluster(cluster_name: str) -> bool:
@@ -326,10 +519,9 @@ def kill_ray_cluster(cluster_name: str) -> bool:
     """
     success = False
     namespace = settings.RAY_KUBERAY_NAMESPACE
+    job_handler_cache.invalidate(get_cluster_host(cluster_name))
 
-    config.load_incluster_config()
-    k8s_client = kubernetes_client.api_client.ApiClient()
-    dyn_client = DynamicClient(k8s_client)
+    dyn_client = get_dynamic_client()
     raycluster_client = dyn_client.resources.get(api_version="v1", kind="RayCluster")
     try:
         delete_response = raycluster_client.delete(
@@ -1,36 +1,52 @@
 """Scheduling related functions."""
 
 import logging
-import random
-from typing import List
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Optional, Tuple
 from datetime import datetime, timedelta
 
 from django.conf import settings
 from django.contrib.auth import get_user_model
-from django.db.models import Model
-from django.db.models import Q
-from django.db.models.aggregates import Count, Min
+from django.db.models import Exists, F, Model, OuterRef, QuerySet, Subquery, Window
+from django.db.models.aggregates import Count
+from django.db.models.functions import Coalesce, RowNumber
+from django.utils import timezone
 
 from opentelemetry import trace
+from prometheus_client import Counter
 
 from api.models import Job, ComputeResource
-from api.ray import submit_job, create_ray_cluster, kill_ray_cluster
+from api.ray import (
+    cluster_is_ready,
+    submit_job,
+    create_ray_cluster,
+    kill_ray_cluster,
+    job_handler_cache,
+)
 from api.utils import generate_cluster_name
+from api.warm_pool import assign_warm_cluster, observe_assignment_latency
 from main import settings as config
 
 
 User: Model = get_user_model()
 logger = logging.getLogger("commands")
 
+COMPUTE_RESOURCE_ASSIGNMENTS = Counter(
+    "gateway_compute_resource_assignments_total",
+    "Number of jobs assigned to compute resources by source of resource.",
+    ["source"],
+)
+
 
 def execute_job(job: Job) -> Job:
     """Executes program.
 
     1. check if cluster exists
-       1.1 if not: create cluster
-    2. connect to cluster
-    3. run a job
-    4. set status to pending
+       1.1 if not: take cluster from warm pool
+       1.2 if pool is empty: start cluster provisioning
+    2. if cluster is provisioning: set status to provisioning,
+       job is submitted by `update_provisioning_jobs` once cluster is ready
+    3. otherwise run a job and set status to pending
 
     Args:
         job: job to execute
@@ -44,12 +60,22 @@ def execute_job(job: Job) -> Job:
         compute_resource = ComputeResource.objects.filter(
             owner=job.author, active=True
         ).first()
+        if compute_resource:
+            COMPUTE_RESOURCE_ASSIGNMENTS.labels("reused").inc()
+
+        if not compute_resource:
+            compute_resource = assign_warm_cluster(job)
+            span.set_attribute("job.warm_pool", compute_resource is not None)
+            if compute_resource:
+                COMPUTE_RESOURCE_ASSIGNMENTS.labels("warm_pool").inc()
 
         if not compute_resource:
             cluster_name = generate_cluster_name(job.author.username)
             span.set_attribute("job.clustername", cluster_name)
             try:
                 compute_resource = create_ray_cluster(job, cluster_name=cluster_name)
+                observe_assignment_latency(job, "new_cluster")
+                COMPUTE_RESOURCE_ASSIGNMENTS.labels("new_cluster").inc()
             except Exception:  # pylint: disable=broad-exception-caught
                 # if something went wrong
                 #   try to kill resource if it was allocated
@@ -61,97 +87,313 @@ def execute_job(job: Job) -> Job:
                 )
                 kill_ray_cluster(cluster_name)
                 job.status = Job.FAILED
-                job.logs += "\nCompute resource was not created properly."
+                job.append_logs("\nCompute resource was not created properly.")
 
         if compute_resource:
-            try:
-                job.compute_resource = compute_resource
-                job = submit_job(job)
-                job.status = Job.PENDING
-            except Exception:  # pylint: disable=broad-exception-caught:
-                logger.error(
-                    "Exception was caught during scheduling job on user [%s] resource.\n"
-                    "Resource [%s] was in DB records, but address is not reachable.\n"
-                    "Cleaning up db record and setting job [%s] to failed",
-                    job.author,
-                    compute_resource.title,
-                    job.id,
-                )
-                kill_ray_cluster(compute_resource.title)
-                compute_resource.delete()
-                job.status = Job.FAILED
-                job.logs += "\nCompute resource was not found."
+            job.compute_resource = compute_resource
+            if compute_resource.status == ComputeResource.PROVISIONING:
+                job.status = Job.PROVISIONING
+            else:
+                job = submit_job_to_compute_resource(job, compute_resource)
 
         span.set_attribute("job.status", job.status)
     return job
 
 
+def submit_job_to_compute_resource(job: Job, compute_resource: ComputeResource) -> Job:
+    """Submits job to ready compute resource.
+
+    Compute resource is removed and job fails if submission is not possible.
+
+    Args:
+        job: job to submit
+        compute_resource: compute resource to run job on
+
+    Returns:
+        submitted or failed job
+    """
+    try:
+        job.compute_resource = compute_resource
+        job = submit_job(job)
+        job.status = Job.PENDING
+        compute_resource.last_used = timezone.now()
+        compute_resource.save(update_fields=["last_used"])
+    except Exception:  # pylint: disable=broad-exception-caught:
+        logger.error(
+            "Exception was caught during scheduling job on user [%s] resource.\n"
+            "Resource [%s] was in DB records, but address is not reachable.\n"
+            "Cleaning up db record and setting job [%s] to failed",
+            job.author,
+            compute_resource.title,
+            job.id,
+        )
+        kill_ray_cluster(compute_resource.title)
+        job_handler_cache.invalidate(compute_resource.host)
+        compute_resource.delete()
+        job.compute_resource = None
+        job.status = Job.FAILED
+        job.append_logs("\nCompute resource was not found.")
+    return job
+
+
+def update_provisioning_jobs() -> List[Job]:
+    """Submits jobs waiting for provisioning clusters which became ready.
+
+    Head node of each provisioning cluster is checked once, checks are done
+    concurrently, so scheduler tick is not blocked by slow clusters.
+    Jobs of clusters not ready in `RAY_CLUSTER_MAX_READINESS_TIME`
+    seconds fail. Selected jobs are locked, so the function must be called
+    inside of a transaction.
+
+    Returns:
+        list of submitted or failed jobs to save
+    """
+    jobs = list(
+        Job.objects.select_for_update(skip_locked=True, of=("self",))
+        .filter(status=Job.PROVISIONING, compute_resource__isnull=False)
+        .select_related("author", "compute_resource")
+        .order_by("created")
+    )
+    compute_resources = {job.compute_resource_id: job.compute_resource for job in jobs}
+    provisioning_resources = [
+        compute_resource
+        for compute_resource in compute_resources.values()
+        if compute_resource.status == ComputeResource.PROVISIONING
+    ]
+    if provisioning_resources:
+        with ThreadPoolExecutor(
+            max_workers=settings.RAY_JOBS_POLLING_MAX_WORKERS
+        ) as executor:
+            readiness = executor.map(
+                cluster_is_ready,
+                [compute_resource.host for compute_resource in provisioning_resources],
+            )
+            for compute_resource, is_ready in zip(provisioning_resources, readiness):
+                if is_ready:
+                    compute_resource.status = ComputeResource.READY
+                    compute_resource.save(update_fields=["status"])
+                    logger.info("Cluster [%s] is ready.", compute_resource.title)
+
+    deadline = timezone.now() - timedelta(
+        seconds=settings.RAY_CLUSTER_MAX_READINESS_TIME
+    )
+    updated_jobs = []
+    for job in jobs:
+        compute_resource = compute_resources[job.compute_resource_id]
+        if compute_resource.pk is None:
+            # removed while other job of the same cluster was handled
+            job.compute_resource = None
+            job.status = Job.FAILED
+            job.append_logs("\nCompute resource was not found.")
+        elif compute_resource.status == ComputeResource.READY:
+            job = submit_job_to_compute_resource(job, compute_resource)
+        elif compute_resource.created < deadline:
+            logger.warning(
+                "Waiting too long for cluster [%s] creation", compute_resource.title
+            )
+            kill_ray_cluster(compute_resource.title)
+            job_handler_cache.invalidate(compute_resource.host)
+            compute_resource.delete()
+            job.compute_resource = None
+            job.status = Job.FAILED
+            job.append_logs("\nCompute resource was not ready in time.")
+        else:
+            continue
+        updated_jobs.append(job)
+    return updated_jobs
+
+
 def get_jobs_to_schedule_fair_share(slots: int) -> List[Job]:
     """Returns jobs for execution based on fair share distribution of resources.
 
+    Oldest queued job of each user below running jobs limit is a candidate,
+    candidates are taken in order they were queued. Selected jobs are locked
+    and jobs locked by other schedulers are skipped, so the function
+    must be called inside of a transaction.
+
     Args:
         slots: max number of users to query
 
     Returns:
         list of jobs for execution
     """
+    running_jobs_count = (
+        Job.objects.filter(author=OuterRef("author"), status__in=Job.ACTIVE_STATES)
+        .values("author")
+        .annotate(count=Count("id"))
+        .values("count")
+    )
+    candidates = (
+        Job.objects.filter(status=Job.QUEUED)
+        .annotate(
+            author_position=Window(
+                expression=RowNumber(),
+                partition_by=[F("author")],
+                order_by=[F("created").asc(), F("id").asc()],
+            ),
+            running_jobs_count=Coalesce(Subquery(running_jobs_count), 0),
+        )
+        .filter(
+            author_position=1,
+            running_jobs_count__lt=settings.LIMITS_JOBS_PER_USER,
+        )
+        .values("id")
+    )
 
-    # maybe refactor this using big SQL query :thinking:
+    return list(
+        Job.objects.select_for_update(skip_locked=True, of=("self",))
+        .filter(id__in=candidates)
+        .select_related("author")
+        .order_by("created")[:slots]
+    )
 
-    running_jobs_per_user = (
-        Job.objects.filter(status__in=Job.RUNNING_STATES)
-        .values("author")
-        .annotate(running_jobs_count=Count("id"))
+
+def claim_jobs(jobs: List[Job]) -> None:
+    """Claims queued jobs for scheduling.
+
+    Claimed jobs are provisioning without compute resource until they are
+    executed, so other schedulers do not select them once their row locks
+    are released and they count towards running jobs limit of the user.
+
+    Args:
+        jobs: locked jobs to claim
+    """
+    if not jobs:
+        return
+    Job.objects.filter(id__in=[job.id for job in jobs], status=Job.QUEUED).update(
+        status=Job.PROVISIONING, updated=timezone.now()
     )
+    for job in jobs:
+        job.status = Job.PROVISIONING
 
-    users_at_max_capacity = [
-        entry["author"]
-        for entry in running_jobs_per_user
-        if entry["running_jobs_count"] >= settings.LIMITS_JOBS_PER_USER
-    ]
 
-    max_limit = 100  # not to kill db in case we will have a lot of jobs
-    author_date_pull = (
-        Job.objects.filter(status=Job.QUEUED)
-        .exclude(author__in=users_at_max_capacity)
-        .values("author")
-        .annotate(job_date=Min("created"))[:max_limit]
+def release_job_claims(jobs: List[Job]) -> int:
+    """Returns claimed jobs which were not executed back to queue.
+
+    Args:
+        jobs: claimed jobs
+
+    Returns:
+        number of released jobs
+    """
+    return Job.objects.filter(
+        id__in=[job.id for job in jobs],
+        status=Job.PROVISIONING,
+        compute_resource__isnull=True,
+    ).update(status=Job.QUEUED)
+
+
+def release_stale_job_claims() -> int:
+    """Returns jobs claimed by schedulers which stopped before executing them back to queue.
+
+    Returns:
+        number of released jobs
+    """
+    deadline = timezone.now() - timedelta(
+        seconds=settings.RAY_CLUSTER_MAX_READINESS_TIME
+    )
+    return Job.objects.filter(
+        status=Job.PROVISIONING, compute_resource__isnull=True, updated__lt=deadline
+    ).update(status=Job.QUEUED)
+
+
+def get_idle_compute_resources() -> QuerySet:
+    """Returns user clusters without active jobs, least recently used first."""
+    active_jobs = Job.objects.filter(
+        compute_resource=OuterRef("pk"), status__in=Job.ACTIVE_STATES
     )
+    return (
+        ComputeResource.objects.filter(active=True, pool__isnull=True)
+        .exclude(Exists(active_jobs))
+        .order_by(F("last_used").asc(nulls_first=True), "created")
+    )
+
+
+def free_compute_resource(compute_resource: ComputeResource) -> None:
+    """Kills cluster of compute resource and deactivates it."""
+    kill_ray_cluster(compute_resource.title)
+    job_handler_cache.invalidate(compute_resource.host)
+    compute_resource.active = False
+    compute_resource.save()
 
-    if len(author_date_pull) == 0:
-        return []
 
-    author_date_list = list(author_date_pull)
-    if len(author_date_pull) >= slots:
-        author_date_list = random.sample(author_date_list, k=slots)
+def evict_idle_compute_resources() -> int:
+    """Evicts idle clusters whose slots are needed by queued jobs.
 
-    job_filter = Q()
-    for entry in author_date_list:
-        job_filter |= Q(author=entry["author"]) & Q(created=entry["job_date"])
+    Queued jobs of users without cluster need new clusters, warm pool
+    clusters and free slots are used first. Idle clusters of users
+    with queued jobs are kept, as they are going to be reused.
 
-    return Job.objects.filter(job_filter)
+    Returns:
+        number of evicted clusters
+    """
+    active_compute_resources = ComputeResource.objects.filter(active=True)
+    free_clusters_slots = (
+        settings.LIMITS_MAX_CLUSTERS - active_compute_resources.count()
+    )
+    queued_jobs_authors = Job.objects.filter(status=Job.QUEUED).values("author")
+    needed_clusters = (
+        queued_jobs_authors.exclude(
+            author__in=active_compute_resources.filter(owner__isnull=False).values(
+                "owner"
+            )
+        )
+        .distinct()
+        .count()
+        - active_compute_resources.filter(pool__isnull=False).count()
+    )
+    missing_clusters = needed_clusters - max(free_clusters_slots, 0)
+    if missing_clusters < 1:
+        return 0
+
+    compute_resources = get_idle_compute_resources().exclude(
+        owner__in=queued_jobs_authors
+    )[:missing_clusters]
+    evicted = 0
+    for compute_resource in compute_resources:
+        logger.info(
+            "Evicting idle cluster [%s] of [%s] last used at [%s].",
+            compute_resource.title,
+            compute_resource.owner,
+            compute_resource.last_used,
+        )
+        free_compute_resource(compute_resource)
+        evicted += 1
+    return evicted
 
 
-def check_job_timeout(job: Job, job_status):
-    """Check job timeout and update job status."""
+def check_job_timeout(job: Job, job_status: str) -> Tuple[str, Optional[str]]:
+    """Check job timeout and update job status.
+
+    Returns:
+        status of job and message to append to its logs
+    """
 
     timeout = config.PROGRAM_TIMEOUT
     if job.updated:
         endtime = job.updated + timedelta(days=timeout)
         now = datetime.now(tz=endtime.tzinfo)
     if job.updated and endtime < now:  # pylint: disable=possibly-used-before-assignment
-        job_status = Job.STOPPED
-        job.logs += f"{job.logs}.\nMaximum job runtime reached. Stopping the job."
         logger.warning(
             "Job [%s] reached maximum runtime [%s] days and stopped.",
             job.id,
             timeout,
         )
-    return job_status
+        return Job.STOPPED, ".\nMaximum job runtime reached. Stopping the job."
+    return job_status, None
+
 
+def handle_job_status_not_available(
+    job: Job, job_status: str
+) -> Tuple[str, Optional[str]]:
+    """Process job status not available and update job.
 
-def handle_job_status_not_available(job: Job, job_status):
-    """Process job status not available and update job"""
+    Job is detached from its compute resource, cluster is removed
+    by `release_compute_resource` once job is saved.
+
+    Returns:
+        status of job and message to append to its logs
+    """
 
     if config.RAY_CLUSTER_NO_DELETE_ON_COMPLETE:
         logger.debug(
@@ -159,10 +401,13 @@ def handle_job_status_not_available(job: Job, job_status):
             + "so cluster [%s] will not be removed",
             job.compute_resource.title,
         )
-    else:
-        kill_ray_cluster(job.compute_resource.title)
-        job.compute_resource.delete()
-        job.compute_resource = None
-        job_status = Job.FAILED
-        job.logs += f"{job.logs}\nSomething went wrong during updating job status."
-    return job_status
+        return job_status, None
+    job.compute_resource = None
+    return Job.FAILED, "\nSomething went wrong during updating job status."
+
+
+def release_compute_resource(compute_resource: ComputeResource) -> None:
+    """Kills cluster of unavailable compute resource and removes its record."""
+    kill_ray_cluster(compute_resource.title)
+    job_handler_cache.invalidate(compute_resource.host)
+    compute_resource.delete()
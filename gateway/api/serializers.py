@@ -19,12 +19,25 @@ from .models import (
     Job,
     JobConfig,
     RuntimeJob,
+    UserFile,
     DEFAULT_PROGRAM_ENTRYPOINT,
 )
 
 logger = logging.getLogger("gateway.serializers")
 
 
+class SparseFieldsMixin:  # pylint: disable=too-few-public-methods
+    """
+    Serializer mixin limiting serialized fields to names passed in `fields`.
+    """
+
+    def __init__(self, *args, fields=None, **kwargs):
+        super().__init__(*args, **kwargs)
+        if fields is not None:
+            for field_name in set(self.fields) - set(fields):
+                self.fields.pop(field_name)
+
+
 class UploadProgramSerializer(serializers.ModelSerializer):
     """
     Program serializer for the /upload end-point
@@ -163,7 +176,7 @@ class ProgramSerializer(serializers.ModelSerializer):
         model = Program
 
 
-class JobSerializer(serializers.ModelSerializer):
+class JobSerializer(SparseFieldsMixin, serializers.ModelSerializer):
     """
     Serializer for the job model.
     """
@@ -198,6 +211,25 @@ class RunProgramSerializer(serializers.Serializer):
         pass
 
 
+class JobsStatusSerializer(serializers.Serializer):
+    """
+    Serializer for the bulk jobs /status end-point
+    """
+
+    MAX_IDS = 1000
+
+    ids = serializers.ListField(
+        child=serializers.UUIDField(), allow_empty=False, max_length=MAX_IDS
+    )
+    result = serializers.BooleanField(default=False)
+
+    def update(self, instance, validated_data):
+        pass
+
+    def create(self, validated_data):
+        pass
+
+
 class RunJobSerializer(serializers.ModelSerializer):
     """
     Job serializer for the /run and /run end-point
@@ -247,3 +279,12 @@ class RuntimeJobSerializer(serializers.ModelSerializer):
 
     class Meta:
         model = RuntimeJob
+
+
+class UserFileSerializer(serializers.ModelSerializer):
+    """
+    Serializer for the user file model.
+    """
+
+    class Meta:
+        model = UserFile
@@ -2,19 +2,33 @@
 
 import base64
 from collections import OrderedDict
-import inspect
 import json
 import logging
+import mimetypes
+import os
+import random
 import re
 import time
 import uuid
-from typing import Any, Optional, Tuple, Union, Callable, Dict, List
+from typing import (
+    Any,
+    Optional,
+    Tuple,
+    Union,
+    Callable,
+    Dict,
+    Iterator,
+    List,
+)
 
 from cryptography.fernet import Fernet
 from ray.dashboard.modules.job.common import JobStatus
 from django.conf import settings
+from django.http import HttpResponse, HttpResponseNotModified, StreamingHttpResponse
+from django.utils.http import http_date, parse_etags
 
 from .models import Job
+from .notifications import wait_for_job_logs
 
 logger = logging.getLogger("commands")
 
@@ -41,43 +55,63 @@ def ray_job_status_to_model_job_status(ray_job_status):
     return mapping.get(ray_job_status, Job.FAILED)
 
 
+def _retry_delay(attempt: int, interval: float, backoff: float, max_interval: float):
+    """Returns jittered exponential delay before next attempt."""
+    delay = min(max_interval, interval * backoff ** (attempt - 1))
+    return random.uniform(delay / 2, delay)
+
+
 def retry_function(
     callback: Callable,
     num_retries: int = 10,
-    interval: int = 1,
+    interval: float = 1,
     error_message: Optional[str] = None,
     function_name: Optional[str] = None,
+    *,
+    backoff: float = 2,
+    max_interval: float = 10,
+    deadline: Optional[float] = None,
 ):
     """Retries to call callback function.
 
+    Delay between attempts grows exponentially from `interval` by `backoff`
+    factor up to `max_interval`, with random jitter. There is no delay
+    after successful call.
+
     Args:
         callback: function
         num_retries: number of tries
-        interval: interval between tries
+        interval: initial interval between tries
         error_message: error message
         function_name: name of executable function
+        backoff: multiplier of interval after each failed try
+        max_interval: maximum interval between tries
+        deadline: overall time limit in seconds for all tries
 
     Returns:
         function result of None
     """
-    success = False
-    run = 0
-    result = None
-    name = function_name or inspect.stack()[1].function
-
-    while run < num_retries and not success:
-        run += 1
+    name = function_name or getattr(callback, "__name__", "callback")
+    stop_at = time.monotonic() + deadline if deadline is not None else None
 
+    for run in range(1, num_retries + 1):
         logger.debug("[%s] attempt %d", name, run)
-
         try:
-            result = callback()
-            success = True
+            return callback()
         except Exception:  # pylint: disable=broad-exception-caught
             logger.debug("%s Retrying...", error_message)
 
-        time.sleep(interval)
-    return result
+        if run == num_retries:
+            break
+        delay = _retry_delay(run, interval, backoff, max_interval)
+        if stop_at is not None:
+            remaining = stop_at - time.monotonic()
+            if remaining <= 0:
+                logger.debug("[%s] deadline reached after %d attempts", name, run)
+                break
+            delay = min(delay, remaining)
+        time.sleep(delay)
+    return None
 
 
 def encrypt_string(string: str) -> str:
@@ -199,6 +233,175 @@ def check_logs(logs: Union[str, None], job: Job) -> str:
     return logs
 
 
+def format_server_sent_event(
+    data: str, event: Optional[str] = None, event_id: Optional[str] = None
+) -> str:
+    """Formats server-sent event.
+
+    Args:
+        data: event data, multiline data is sent as multiple data fields
+        event: event type
+        event_id: event id, sent back by clients as `Last-Event-ID` on reconnect
+
+    Returns:
+        server-sent event message
+    """
+    message = ""
+    if event is not None:
+        message += f"event: {event}\n"
+    if event_id is not None:
+        message += f"id: {event_id}\n"
+    for line in data.split("\n"):
+        message += f"data: {line}\n"
+    return message + "\n"
+
+
+def stream_job_logs(job: Job, offset: int = 0) -> Iterator[str]:
+    """Streams job logs as server-sent events.
+
+    Sends `logs` event, with offset following logs as event id, each time
+    new logs are stored and `end` event with job status once job is
+    in terminal state and all logs were sent. Between checks stream waits
+    for logs or status notification of job. Stream is closed after
+    `JOB_LOGS_STREAM_MAX_DURATION` seconds, so clients reconnect from
+    last received offset.
+
+    Args:
+        job: job to stream logs of
+        offset: position in logs to start streaming from
+
+    Returns:
+        server-sent events
+    """
+    deadline = time.monotonic() + settings.JOB_LOGS_STREAM_MAX_DURATION
+    while True:
+        # status is checked before logs read, so no logs are missed at the end
+        job_status = (
+            Job.objects.filter(id=job.id).values_list("status", flat=True).first()
+        )
+        logs, start = job.read_logs(offset=offset)
+        if logs:
+            offset = start + len(logs)
+            yield format_server_sent_event(logs, event="logs", event_id=str(offset))
+        elif job_status is None or job_status in Job.TERMINAL_STATES:
+            yield format_server_sent_event(job_status or "", event="end")
+            return
+        elif time.monotonic() >= deadline:
+            return
+        else:
+            # keep alive comment, so proxies do not close idle connection
+            yield ":\n\n"
+            wait_for_job_logs(job, timeout=settings.JOB_LOGS_STREAM_POLL_INTERVAL)
+
+
+def file_etag(file_path: str) -> str:
+    """Returns entity tag of file, which changes when file is modified."""
+    file_stat = os.stat(file_path)
+    return f'"{file_stat.st_mtime_ns:x}-{file_stat.st_size:x}"'
+
+
+def parse_range_header(header: Optional[str], size: int) -> Optional[Tuple[int, int]]:
+    """Parses byte range of `Range` header.
+
+    Only single range is supported, whole file is served for several ranges.
+
+    Args:
+        header: value of `Range` header
+        size: size of file in bytes
+
+    Raises:
+        ValueError: if range is not satisfiable
+
+    Returns:
+        positions of first and last byte of range,
+        None if header is missing or malformed
+    """
+    match = re.fullmatch(r"bytes=(\d*)-(\d*)", (header or "").strip())
+    if match is None or match.group(1) + match.group(2) == "":
+        return None
+    first, last = match.groups()
+    if first == "":
+        # suffix range of last bytes
+        suffix = int(last)
+        if suffix == 0 or size == 0:
+            raise ValueError("Range is not satisfiable.")
+        return max(size - suffix, 0), size - 1
+    start = int(first)
+    end = size - 1 if last == "" else min(int(last), size - 1)
+    if last != "" and int(last) < start:
+        return None
+    if start >= size:
+        raise ValueError("Range is not satisfiable.")
+    return start, end
+
+
+def _read_file_range(
+    file_path: str, start: int, length: int, chunk_size: int
+) -> Iterator[bytes]:
+    with open(file_path, "rb") as file:
+        file.seek(start)
+        while length > 0:
+            chunk = file.read(min(chunk_size, length))
+            if not chunk:
+                return
+            length -= len(chunk)
+            yield chunk
+
+
+def file_response(request, file_path: str, chunk_size: int = 8192) -> HttpResponse:
+    """Returns streaming response of file with byte range support.
+
+    Responses carry `ETag` and `Last-Modified` headers. Requests with
+    `Range` header get partial content, unless `If-Range` does not match
+    current version of file, and requests with matching `If-None-Match`
+    get not modified response.
+
+    Args:
+        request: download request
+        file_path: path of file to serve
+        chunk_size: size of streamed chunks in bytes
+
+    Returns:
+        file response
+    """
+    size = os.path.getsize(file_path)
+    etag = file_etag(file_path)
+    last_modified = http_date(os.path.getmtime(file_path))
+
+    if_none_match = request.headers.get("If-None-Match")
+    if if_none_match and set(parse_etags(if_none_match)) & {etag, "*"}:
+        response = HttpResponseNotModified()
+        response["ETag"] = etag
+        return response
+
+    byte_range = None
+    if_range = request.headers.get("If-Range")
+    if if_range is None or if_range in (etag, last_modified):
+        try:
+            byte_range = parse_range_header(request.headers.get("Range"), size)
+        except ValueError:
+            response = HttpResponse(status=416)
+            response["Content-Range"] = f"bytes */{size}"
+            return response
+
+    start, end = byte_range or (0, size - 1)
+    response = StreamingHttpResponse(
+        _read_file_range(file_path, start, end - start + 1, chunk_size),
+        status=200 if byte_range is None else 206,
+        content_type=mimetypes.guess_type(file_path)[0],
+    )
+    if byte_range is not None:
+        response["Content-Range"] = f"bytes {start}-{end}/{size}"
+    response["Content-Length"] = end - start + 1
+    response["Accept-Ranges"] = "bytes"
+    response["ETag"] = etag
+    response["Last-Modified"] = last_modified
+    response[
+        "Content-Disposition"
+    ] = f"attachment; filename={os.path.basename(file_path)}"
+    return response
+
+
 def safe_request(request: Callable) -> Optional[Dict[str, Any]]:
     """Makes safe request and parses json response."""
     result = None
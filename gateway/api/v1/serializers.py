@@ -110,6 +110,12 @@ class JobSerializer(serializers.JobSerializer):
         fields = ["id", "result", "status", "program", "created"]
 
 
+class JobsStatusSerializer(serializers.JobsStatusSerializer):
+    """
+    Bulk jobs status serializer first version.
+    """
+
+
 class RuntimeJobSerializer(serializers.RuntimeJobSerializer):
     """
     Runtime job serializer first version. Serializer for the runtime job model.
@@ -119,3 +125,12 @@ class RuntimeJobSerializer(serializers.RuntimeJobSerializer):
 
     class Meta(serializers.RuntimeJobSerializer.Meta):
         fields = ["job", "runtime_job"]
+
+
+class UserFileSerializer(serializers.UserFileSerializer):
+    """
+    User file serializer first version. Include metadata of file.
+    """
+
+    class Meta(serializers.UserFileSerializer.Meta):
+        fields = ["name", "size", "modified", "checksum"]
@@ -2,6 +2,7 @@
 Views api for V1.
 """
 
+from drf_yasg import openapi
 from drf_yasg.utils import swagger_auto_schema
 from rest_framework import permissions, status
 from rest_framework.decorators import action
@@ -12,6 +13,16 @@ from api import views
 from api.permissions import IsOwner
 from . import serializers as v1_serializers
 
+CURSOR_PARAMETER = openapi.Parameter(
+    "cursor",
+    openapi.IN_QUERY,
+    description=(
+        "Enables cursor pagination. Empty for first page, then cursor of "
+        "`next` page link."
+    ),
+    type=openapi.TYPE_STRING,
+)
+
 
 class ProgramViewSet(views.ProgramViewSet):
     """
@@ -40,6 +51,7 @@ class ProgramViewSet(views.ProgramViewSet):
 
     @swagger_auto_schema(
         operation_description="List author Qiskit Functions",
+        manual_parameters=[CURSOR_PARAMETER],
         responses={status.HTTP_200_OK: v1_serializers.ProgramSerializer(many=True)},
     )
     def list(self, request):
@@ -54,6 +66,18 @@ class ProgramViewSet(views.ProgramViewSet):
     def upload(self, request):
         return super().upload(request)
 
+    @swagger_auto_schema(
+        operation_description=(
+            "Upload a Qiskit Function with artifact assembled from `manifest` "
+            "of file hashes. Files missing on gateway are listed in conflict "
+            "response and are sent as `blobs` archive of files named by hash."
+        ),
+        responses={status.HTTP_200_OK: v1_serializers.UploadProgramSerializer},
+    )
+    @action(methods=["POST"], detail=False, url_path="upload/incremental")
+    def upload_incremental(self, request):
+        return super().upload_incremental(request)
+
     @swagger_auto_schema(
         operation_description="Run an existing Qiskit Function",
         request_body=v1_serializers.RunProgramSerializer,
@@ -84,12 +108,32 @@ class JobViewSet(views.JobViewSet):
         return super().retrieve(request, pk)
 
     @swagger_auto_schema(
-        operation_description="List author Jobs",
+        operation_description=(
+            "List author Jobs. Job `result` is listed only if it is requested "
+            "in `fields`."
+        ),
+        manual_parameters=[
+            openapi.Parameter(
+                "fields",
+                openapi.IN_QUERY,
+                description="Comma separated job fields to list, e.g. `id,status`.",
+                type=openapi.TYPE_STRING,
+            ),
+            CURSOR_PARAMETER,
+        ],
         responses={status.HTTP_200_OK: v1_serializers.JobSerializer(many=True)},
     )
     def list(self, request):
         return super().list(request)
 
+    @swagger_auto_schema(
+        operation_description="Get statuses of multiple author Jobs",
+        request_body=v1_serializers.JobsStatusSerializer,
+    )
+    @action(methods=["POST"], detail=False, url_path="status")
+    def statuses(self, request):
+        return super().statuses(request)
+
     @swagger_auto_schema(
         operation_description="Save the result of a job",
         responses={status.HTTP_200_OK: v1_serializers.JobSerializer(many=False)},
@@ -106,4 +150,6 @@ class FilesViewSet(views.FilesViewSet):
     Files view set.
     """
 
+    serializer_class = v1_serializers.UserFileSerializer
+    pagination_class = LimitOffsetPagination
     permission_classes = [permissions.IsAuthenticated, IsOwner]
@@ -6,18 +6,15 @@ Django Rest framework views for api application:
 Version views inherit from the different views.
 """
 
-import glob
 import json
 import logging
-import mimetypes
 import os
+import tarfile
 import time
-from typing import Optional
-from wsgiref.util import FileWrapper
+from typing import List, Optional
 
 from concurrency.exceptions import RecordModifiedError
 from django.conf import settings
-from django.contrib.auth.models import Group, Permission
 from django.db.models import Q
 from django.http import StreamingHttpResponse
 from opentelemetry import trace
@@ -28,21 +25,36 @@ from opentelemetry.sdk.trace.export import BatchSpanProcessor
 from opentelemetry.trace.propagation.tracecontext import TraceContextTextMapPropagator
 from rest_framework import viewsets, status
 from rest_framework.decorators import action
+from rest_framework.negotiation import DefaultContentNegotiation
 from rest_framework.response import Response
 
 from qiskit_ibm_runtime import RuntimeInvalidStateError, QiskitRuntimeService
 from utils import sanitize_file_path
 
+from .access import accessible_programs
+from .artifacts import (
+    ArtifactUploadHandler,
+    build_artifact,
+    missing_blobs,
+    parse_manifest,
+    store_blobs,
+)
+from .file_index import FILE_EXTENSIONS, index_file, unindex_file
+from .file_serving import get_file_serving_backend
 from .models import (
     VIEW_PROGRAM_PERMISSION,
     RUN_PROGRAM_PERMISSION,
-    Program,
     Job,
     RuntimeJob,
+    UserFile,
 )
+from .notifications import notify_job_status, wait_for_job_terminal_state
+from .pagination import KeysetPaginationMixin
 from .ray import get_job_handler
+from .utils import stream_job_logs
 from .serializers import (
     JobConfigSerializer,
+    JobsStatusSerializer,
     RunJobSerializer,
     RunProgramSerializer,
     UploadProgramSerializer,
@@ -64,7 +76,20 @@ if bool(int(os.environ.get("OTEL_ENABLED", "0"))):
     trace._set_tracer_provider(provider, log=False)  # pylint: disable=protected-access
 
 
-class ProgramViewSet(viewsets.GenericViewSet):
+class EventStreamContentNegotiation(DefaultContentNegotiation):
+    """Content negotiation accepting `text/event-stream` clients.
+
+    Event streams are returned as plain django responses, so renderer
+    is only used for errors.
+    """
+
+    def select_renderer(self, request, renderers, format_suffix=None):
+        if "text/event-stream" in request.META.get("HTTP_ACCEPT", ""):
+            return (renderers[0], renderers[0].media_type)
+        return super().select_renderer(request, renderers, format_suffix)
+
+
+class ProgramViewSet(KeysetPaginationMixin, viewsets.GenericViewSet):
     """
     Program ViewSet configuration using GenericViewSet.
     """
@@ -114,64 +139,31 @@ class ProgramViewSet(viewsets.GenericViewSet):
         title = self.request.query_params.get("title")
         provider_name = self.request.query_params.get("provider")
 
-        author_programs = self._get_program_queryset_for_title_and_provider(
+        return self._get_program_queryset_for_title_and_provider(
             author=author, title=title, provider_name=provider_name
-        ).distinct()
-
-        author_programs_count = author_programs.count()
-        logger.info(
-            "ProgramViewSet get author[%s] programs[%s]",
-            author.id,
-            author_programs_count,
         )
 
-        return author_programs
-
     def get_run_queryset(self):
         """get run queryset"""
         author = self.request.user
 
-        logger.info("ProgramViewSet get run_program permission")
-        run_program_permission = Permission.objects.get(codename=RUN_PROGRAM_PERMISSION)
-
-        # Groups logic
-        user_criteria = Q(user=author)
-        run_permission_criteria = Q(permissions=run_program_permission)
-        author_groups_with_run_permissions = Group.objects.filter(
-            user_criteria & run_permission_criteria
-        )
-        author_groups_with_run_permissions_count = (
-            author_groups_with_run_permissions.count()
-        )
-        logger.info(
-            "ProgramViewSet get author[%s] groups [%s]",
-            author.id,
-            author_groups_with_run_permissions_count,
-        )
-
-        # Programs logic
-        author_criteria = Q(author=author)
-        author_groups_with_run_permissions_criteria = Q(
-            instances__in=author_groups_with_run_permissions
-        )
-        author_programs = Program.objects.filter(
-            author_criteria | author_groups_with_run_permissions_criteria
-        ).distinct()
-        author_programs_count = author_programs.count()
-        logger.info(
-            "ProgramViewSet get author[%s] programs[%s]",
-            author.id,
-            author_programs_count,
-        )
+        logger.info("ProgramViewSet get author[%s] run programs", author.id)
 
-        return author_programs
+        return accessible_programs(author, RUN_PROGRAM_PERMISSION)
 
     def list(self, request):
         """List programs:"""
         tracer = trace.get_tracer("gateway.tracer")
         ctx = TraceContextTextMapPropagator().extract(carrier=request.headers)
         with tracer.start_as_current_span("gateway.program.list", context=ctx):
-            serializer = self.get_serializer(self.get_queryset(), many=True)
+            queryset = self.get_queryset()
+
+            page = self.paginate_queryset(queryset)
+            if page is not None:
+                serializer = self.get_serializer(page, many=True)
+                return self.get_paginated_response(serializer.data)
+
+            serializer = self.get_serializer(queryset, many=True)
 
         return Response(serializer.data)
 
@@ -181,56 +173,93 @@ class ProgramViewSet(viewsets.GenericViewSet):
         tracer = trace.get_tracer("gateway.tracer")
         ctx = TraceContextTextMapPropagator().extract(carrier=request.headers)
         with tracer.start_as_current_span("gateway.program.upload", context=ctx):
-            serializer = self.get_serializer_upload_program(data=request.data)
-            if not serializer.is_valid():
-                logger.error(
-                    "UploadProgramSerializer validation failed:\n %s",
-                    serializer.errors,
+            # artifact is written to disk while it is received
+            request.upload_handlers = [ArtifactUploadHandler(request)]
+            return self._upload(request, request.data)
+
+    @action(methods=["POST"], detail=False, url_path="upload/incremental")
+    def upload_incremental(self, request):
+        """Uploads a program with artifact assembled from file blobs.
+
+        Request contains `manifest` of file paths and their sha256
+        and optional `blobs` archive. Conflict response lists hashes of files
+        which have to be sent in `blobs` archive.
+        """
+        tracer = trace.get_tracer("gateway.tracer")
+        ctx = TraceContextTextMapPropagator().extract(carrier=request.headers)
+        with tracer.start_as_current_span(
+            "gateway.program.upload_incremental", context=ctx
+        ):
+            # blobs archive is written to disk while it is received
+            request.upload_handlers = [ArtifactUploadHandler(request)]
+            try:
+                manifest = parse_manifest(request.data.get("manifest", ""))
+                blobs = request.data.get("blobs")
+                if blobs is not None:
+                    store_blobs(blobs, request.user)
+            except (ValueError, tarfile.TarError) as error:
+                return Response(
+                    {"message": str(error)}, status=status.HTTP_400_BAD_REQUEST
                 )
-                return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
-            title = serializer.validated_data.get("title")
-            request_provider = serializer.validated_data.get("provider", None)
-            author = request.user
-            provider_name, title = serializer.get_provider_name_and_title(
-                request_provider, title
+            missing = missing_blobs(manifest, request.user)
+            if missing:
+                return Response({"missing": missing}, status=status.HTTP_409_CONFLICT)
+
+            data = {
+                key: value
+                for key, value in request.data.items()
+                if key not in ("manifest", "blobs")
+            }
+            data["artifact"] = build_artifact(manifest, request.user)
+            return self._upload(request, data)
+
+    def _upload(self, request, data):
+        """Creates or updates program of request author."""
+        serializer = self.get_serializer_upload_program(data=data)
+        if not serializer.is_valid():
+            logger.error(
+                "UploadProgramSerializer validation failed:\n %s",
+                serializer.errors,
             )
+            return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
-            if provider_name:
-                user_has_access = serializer.check_provider_access(
-                    provider_name=provider_name, author=author
-                )
-                if not user_has_access:
-                    # For security we just return a 404 not a 401
-                    return Response(
-                        {"message": f"Provider [{provider_name}] was not found."},
-                        status=status.HTTP_404_NOT_FOUND,
-                    )
-                program = serializer.retrieve_provider_function(
-                    title=title, provider_name=provider_name
-                )
-            else:
-                program = serializer.retrieve_private_function(
-                    title=title, author=author
+        title = serializer.validated_data.get("title")
+        request_provider = serializer.validated_data.get("provider", None)
+        author = request.user
+        provider_name, title = serializer.get_provider_name_and_title(
+            request_provider, title
+        )
+
+        if provider_name:
+            user_has_access = serializer.check_provider_access(
+                provider_name=provider_name, author=author
+            )
+            if not user_has_access:
+                # For security we just return a 404 not a 401
+                return Response(
+                    {"message": f"Provider [{provider_name}] was not found."},
+                    status=status.HTTP_404_NOT_FOUND,
                 )
+            program = serializer.retrieve_provider_function(
+                title=title, provider_name=provider_name
+            )
+        else:
+            program = serializer.retrieve_private_function(title=title, author=author)
 
-            if program is not None:
-                logger.info("Program found. [%s] is going to be updated", title)
-                serializer = self.get_serializer_upload_program(
-                    program, data=request.data
+        if program is not None:
+            logger.info("Program found. [%s] is going to be updated", title)
+            serializer = self.get_serializer_upload_program(program, data=data)
+            if not serializer.is_valid():
+                logger.error(
+                    "UploadProgramSerializer validation failed with program instance:\n %s",
+                    serializer.errors,
                 )
-                if not serializer.is_valid():
-                    logger.error(
-                        "UploadProgramSerializer validation failed with program instance:\n %s",
-                        serializer.errors,
-                    )
-                    return Response(
-                        serializer.errors, status=status.HTTP_400_BAD_REQUEST
-                    )
-            serializer.save(author=author, title=title, provider=provider_name)
+                return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+        serializer.save(author=author, title=title, provider=provider_name)
 
-            logger.info("Return response with Program [%s]", title)
-            return Response(serializer.data)
+        logger.info("Return response with Program [%s]", title)
+        return Response(serializer.data)
 
     @action(methods=["POST"], detail=False)
     def run(self, request):
@@ -315,30 +344,11 @@ class ProgramViewSet(viewsets.GenericViewSet):
         self, author, title: str, provider_name: Optional[str]
     ):
         """Returns queryset for program for gived request, title and provider."""
-        view_program_permission = Permission.objects.get(
-            codename=VIEW_PROGRAM_PERMISSION
-        )
-
-        # Groups logic
-        user_criteria = Q(user=author)
-        view_permission_criteria = Q(permissions=view_program_permission)
-        author_groups_with_view_permissions = Group.objects.filter(
-            user_criteria & view_permission_criteria
-        )
-        author_groups_with_view_permissions_count = (
-            author_groups_with_view_permissions.count()
-        )
-        logger.info(
-            "ProgramViewSet get author[%s] groups [%s]",
-            author.id,
-            author_groups_with_view_permissions_count,
-        )
+        logger.info("ProgramViewSet get author[%s] programs", author.id)
 
-        # Programs logic
-        author_criteria = Q(author=author)
-        author_groups_with_view_permissions_criteria = Q(
-            instances__in=author_groups_with_view_permissions
-        )
+        result_queryset = accessible_programs(
+            author, VIEW_PROGRAM_PERMISSION
+        ).select_related("provider")
         if title:
             serializer = self.get_serializer_upload_program(data=self.request.data)
             provider_name, title = serializer.get_provider_name_and_title(
@@ -347,30 +357,60 @@ class ProgramViewSet(viewsets.GenericViewSet):
             title_criteria = Q(title=title)
             if provider_name:
                 title_criteria = Q(title=title, provider__name=provider_name)
-            result_queryset = Program.objects.filter(
-                (author_criteria | author_groups_with_view_permissions_criteria)
-                & title_criteria
-            )
-        else:
-            result_queryset = Program.objects.filter(
-                author_criteria | author_groups_with_view_permissions_criteria
-            )
+            result_queryset = result_queryset.filter(title_criteria)
 
         return result_queryset
 
 
-class JobViewSet(viewsets.GenericViewSet):
+class JobViewSet(KeysetPaginationMixin, viewsets.GenericViewSet):
     """
     Job ViewSet configuration using GenericViewSet.
     """
 
     BASE_NAME = "jobs"
 
+    # fields not listed unless they are requested by `fields` parameter
+    list_excluded_fields = ["result"]
+
     def get_serializer_class(self):
         return self.serializer_class
 
     def get_queryset(self):
-        return Job.objects.filter(author=self.request.user).order_by("-created")
+        return Job.objects.filter(author=self.request.user).order_by("-created", "-id")
+
+    def get_list_fields(self) -> List[str]:
+        """Returns fields of listed jobs.
+
+        Fields are taken from comma separated `fields` query parameter,
+        by default all serializer fields except `list_excluded_fields`.
+
+        Raises:
+            ValueError: if unknown field is requested
+        """
+        serializer_fields = list(self.get_serializer().fields)
+        requested = self.request.query_params.get("fields")
+        if not requested:
+            return [
+                field
+                for field in serializer_fields
+                if field not in self.list_excluded_fields
+            ]
+
+        fields = [field.strip() for field in requested.split(",") if field.strip()]
+        unknown = [field for field in fields if field not in serializer_fields]
+        if unknown:
+            raise ValueError(f"Unknown fields: {', '.join(unknown)}.")
+        return fields
+
+    def get_list_queryset(self, fields: List[str]):
+        """Returns jobs queryset loading only columns of listed fields."""
+        model_fields = {field.name for field in Job._meta.concrete_fields}
+        queryset = self.get_queryset().only(
+            "id", *[field for field in fields if field in model_fields]
+        )
+        if "program" in fields:
+            queryset = queryset.select_related("program", "program__provider")
+        return queryset
 
     def retrieve(self, request, pk=None):  # pylint: disable=unused-argument
         """Get job:"""
@@ -386,16 +426,39 @@ class JobViewSet(viewsets.GenericViewSet):
         tracer = trace.get_tracer("gateway.tracer")
         ctx = TraceContextTextMapPropagator().extract(carrier=request.headers)
         with tracer.start_as_current_span("gateway.job.list", context=ctx):
-            queryset = self.filter_queryset(self.get_queryset())
+            try:
+                fields = self.get_list_fields()
+            except ValueError as error:
+                return Response(
+                    {"message": str(error)}, status=status.HTTP_400_BAD_REQUEST
+                )
+            queryset = self.filter_queryset(self.get_list_queryset(fields))
 
             page = self.paginate_queryset(queryset)
             if page is not None:
-                serializer = self.get_serializer(page, many=True)
+                serializer = self.get_serializer(page, many=True, fields=fields)
                 return self.get_paginated_response(serializer.data)
 
-            serializer = self.get_serializer(queryset, many=True)
+            serializer = self.get_serializer(queryset, many=True, fields=fields)
         return Response(serializer.data)
 
+    @action(methods=["POST"], detail=False, url_path="status")
+    def statuses(self, request):
+        """Returns statuses, and optionally results, of multiple jobs."""
+        tracer = trace.get_tracer("gateway.tracer")
+        ctx = TraceContextTextMapPropagator().extract(carrier=request.headers)
+        with tracer.start_as_current_span("gateway.job.statuses", context=ctx):
+            serializer = JobsStatusSerializer(data=request.data)
+            if not serializer.is_valid():
+                return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+
+            fields = ["id", "status"]
+            if serializer.validated_data["result"]:
+                fields.append("result")
+            jobs = self.get_queryset().filter(id__in=serializer.validated_data["ids"])
+            jobs_data = [{**job, "id": str(job["id"])} for job in jobs.values(*fields)]
+        return Response({"jobs": jobs_data})
+
     @action(methods=["POST"], detail=True)
     def result(self, request, pk=None):  # pylint: disable=invalid-name,unused-argument
         """Save result of a job."""
@@ -437,8 +500,90 @@ class JobViewSet(viewsets.GenericViewSet):
         ctx = TraceContextTextMapPropagator().extract(carrier=request.headers)
         with tracer.start_as_current_span("gateway.job.logs", context=ctx):
             job = self.get_object()
-            logs = job.logs
-        return Response({"logs": logs})
+            offset = request.query_params.get("offset")
+            limit = request.query_params.get("limit")
+            if offset is None and limit is None:
+                return Response({"logs": job.logs})
+
+            try:
+                offset = int(offset or 0)
+                limit = int(limit) if limit is not None else None
+            except ValueError:
+                offset = limit = -1
+            if offset < 0 or (limit is not None and limit < 0):
+                return Response(
+                    {"message": "`offset` and `limit` must be non negative integers."},
+                    status=status.HTTP_400_BAD_REQUEST,
+                )
+            logs, start = job.read_logs(offset=offset, limit=limit)
+        return Response(
+            {"logs": logs, "offset": start, "next_offset": start + len(logs)}
+        )
+
+    @action(
+        methods=["GET"],
+        detail=True,
+        url_path="logs/stream",
+        content_negotiation_class=EventStreamContentNegotiation,
+    )
+    def stream_logs(
+        self, request, pk=None
+    ):  # pylint: disable=invalid-name,unused-argument
+        """Streams logs of job as server-sent events."""
+        tracer = trace.get_tracer("gateway.tracer")
+        ctx = TraceContextTextMapPropagator().extract(carrier=request.headers)
+        with tracer.start_as_current_span("gateway.job.stream_logs", context=ctx):
+            job = self.get_object()
+            offset = request.query_params.get(
+                "offset", request.headers.get("Last-Event-ID", "0")
+            )
+            try:
+                offset = int(offset)
+            except ValueError:
+                offset = -1
+            if offset < 0:
+                return Response(
+                    {"message": "`offset` must be non negative integer."},
+                    status=status.HTTP_400_BAD_REQUEST,
+                )
+
+            response = StreamingHttpResponse(
+                stream_job_logs(job, offset=offset), content_type="text/event-stream"
+            )
+            response["Cache-Control"] = "no-cache"
+            # disable response buffering in nginx proxies
+            response["X-Accel-Buffering"] = "no"
+        return response
+
+    @action(methods=["GET"], detail=True)
+    def wait(self, request, pk=None):  # pylint: disable=invalid-name,unused-argument
+        """Waits until job is in terminal state or timeout is reached."""
+        tracer = trace.get_tracer("gateway.tracer")
+        ctx = TraceContextTextMapPropagator().extract(carrier=request.headers)
+        with tracer.start_as_current_span("gateway.job.wait", context=ctx):
+            job = self.get_object()
+            try:
+                timeout = float(
+                    request.query_params.get("timeout", settings.JOB_WAIT_MAX_TIMEOUT)
+                )
+            except ValueError:
+                timeout = -1
+            if not 0 <= timeout <= settings.JOB_WAIT_MAX_TIMEOUT:
+                return Response(
+                    {
+                        "message": "`timeout` must be number of seconds "
+                        f"between 0 and {settings.JOB_WAIT_MAX_TIMEOUT}."
+                    },
+                    status=status.HTTP_400_BAD_REQUEST,
+                )
+            job_status = wait_for_job_terminal_state(job, timeout=timeout)
+        return Response(
+            {
+                "id": str(job.id),
+                "status": job_status,
+                "terminal": job_status in Job.TERMINAL_STATES,
+            }
+        )
 
     def get_runtime_job(self, job):
         """get runtime job for job"""
@@ -454,6 +599,7 @@ class JobViewSet(viewsets.GenericViewSet):
             if not job.in_terminal_state():
                 job.status = Job.STOPPED
                 job.save(update_fields=["status"])
+                notify_job_status(job)
             message = "Job has been stopped."
             runtime_jobs = self.get_runtime_job(job)
             if runtime_jobs and len(runtime_jobs) != 0:
@@ -479,7 +625,8 @@ class JobViewSet(viewsets.GenericViewSet):
                                     jobinstance.session_id
                                 )
 
-            if job.compute_resource:
+            # job waiting for cluster provisioning is not submitted to ray yet
+            if job.compute_resource and job.ray_job_id:
                 if job.compute_resource.active:
                     job_handler = get_job_handler(job.compute_resource.host)
                     if job_handler is not None:
@@ -537,33 +684,32 @@ class JobViewSet(viewsets.GenericViewSet):
 class FilesViewSet(viewsets.ViewSet):
     """ViewSet for file operations handling.
 
-    Note: only tar files are available for list and download
+    Note: only tar and h5 files are available for list and download
     """
 
     BASE_NAME = "files"
+    serializer_class = None
+    pagination_class = None
 
     def list(self, request):
-        """List of available for user files."""
-        files = []
+        """List of available for user files.
+
+        Files are listed from index. Requests with `limit` get pages
+        of files with their metadata, other requests get names of all files.
+        """
         tracer = trace.get_tracer("gateway.tracer")
         ctx = TraceContextTextMapPropagator().extract(carrier=request.headers)
         with tracer.start_as_current_span("gateway.files.list", context=ctx):
-            user_dir = os.path.join(
-                sanitize_file_path(settings.MEDIA_ROOT),
-                sanitize_file_path(request.user.username),
+            files = UserFile.objects.filter(owner=request.user).order_by("name")
+            if self.pagination_class is None or "limit" not in request.query_params:
+                return Response({"results": list(files.values_list("name", flat=True))})
+
+            paginator = self.pagination_class()  # pylint: disable=not-callable
+            page = paginator.paginate_queryset(files, request, view=self)
+            serializer = self.serializer_class(  # pylint: disable=not-callable
+                page, many=True
             )
-            if os.path.exists(user_dir):
-                files = [
-                    os.path.basename(path)
-                    for path in glob.glob(f"{user_dir}/*.tar")
-                    + glob.glob(f"{user_dir}/*.h5")
-                ]
-            else:
-                logger.warning(
-                    "Directory %s does not exist for %s.", user_dir, request.user
-                )
-
-        return Response({"results": files})
+            return paginator.get_paginated_response(serializer.data)
 
     @action(methods=["GET"], detail=False)
     def download(self, request):  # pylint: disable=invalid-name
@@ -589,19 +735,7 @@ class FilesViewSet(viewsets.ViewSet):
                 )
 
                 if os.path.exists(user_dir) and os.path.exists(file_path) and filename:
-                    chunk_size = 8192
-                    # note: we do not use with statements as Streaming response closing file itself.
-                    response = StreamingHttpResponse(
-                        FileWrapper(
-                            open(  # pylint: disable=consider-using-with
-                                file_path, "rb"
-                            ),
-                            chunk_size,
-                        ),
-                        content_type=mimetypes.guess_type(file_path)[0],
-                    )
-                    response["Content-Length"] = os.path.getsize(file_path)
-                    response["Content-Disposition"] = f"attachment; filename={filename}"
+                    response = get_file_serving_backend().serve(request, file_path)
             return response
 
     @action(methods=["DELETE"], detail=False)
@@ -628,6 +762,7 @@ class FilesViewSet(viewsets.ViewSet):
 
                 if os.path.exists(user_dir) and os.path.exists(file_path) and filename:
                     os.remove(file_path)
+                    unindex_file(request.user, os.path.basename(file_path))
                     response = Response(
                         {"message": "Requested file was deleted."},
                         status=status.HTTP_200_OK,
@@ -652,5 +787,7 @@ class FilesViewSet(viewsets.ViewSet):
             with open(file_path, "wb+") as destination:
                 for chunk in upload_file.chunks():
                     destination.write(chunk)
+            if file_path.endswith(FILE_EXTENSIONS):
+                index_file(request.user, file_path)
             return Response({"message": file_path})
         return Response("server error", status=status.HTTP_500_INTERNAL_SERVER_ERROR)
@@ -0,0 +1,247 @@
+"""Warm pool of pre-provisioned ray clusters.
+
+Generic clusters are created in advance for each python version with
+configured pool size and assigned to users on demand, so jobs do not wait
+for cold start of a new cluster. Pods of cluster can not be changed once
+it is created, so warm pool is disabled for cluster templates with per
+user content, like storage of user mounted with `user_id` subPath.
+"""
+
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+from typing import Dict, List, Optional
+
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+from prometheus_client import Counter, Histogram
+
+from api.models import ComputeResource, Job
+from api.ray import (
+    WARM_POOL_USER_ID,
+    cluster_is_ready,
+    cluster_template_is_user_specific,
+    create_warm_ray_cluster,
+    job_handler_cache,
+    kill_ray_cluster,
+)
+from api.utils import generate_cluster_name
+
+logger = logging.getLogger("commands")
+
+# python version label of jobs which can not use warm pool
+CUSTOM_CLUSTER = "custom"
+
+WARM_POOL_HITS = Counter(
+    "gateway_warm_pool_hits_total",
+    "Number of jobs assigned to warm pool cluster.",
+    ["python_version"],
+)
+WARM_POOL_MISSES = Counter(
+    "gateway_warm_pool_misses_total",
+    "Number of jobs which needed new cluster.",
+    ["python_version"],
+)
+COMPUTE_RESOURCE_ASSIGNMENT_SECONDS = Histogram(
+    "gateway_compute_resource_assignment_seconds",
+    "Time in seconds from job creation until it got compute resource.",
+    ["source"],
+    buckets=(0.5, 1, 2.5, 5, 10, 30, 60, 120, 300, 600),
+)
+
+
+def observe_assignment_latency(job: Job, source: str) -> None:
+    """Records time from job creation until compute resource was assigned.
+
+    Args:
+        job: job compute resource was assigned to
+        source: `warm_pool` or `new_cluster`
+    """
+    if job.created:
+        COMPUTE_RESOURCE_ASSIGNMENT_SECONDS.labels(source).observe(
+            (timezone.now() - job.created).total_seconds()
+        )
+
+
+def warm_pool_python_version(job: Job) -> Optional[str]:
+    """Returns python version of warm pool clusters job can run on.
+
+    Args:
+        job: job to run
+
+    Returns:
+        python version or None if job needs custom cluster
+    """
+    if job.program is not None and job.program.image is not None:
+        return None
+    job_config = job.config
+    if job_config is not None and (
+        job_config.workers
+        or job_config.min_workers
+        or job_config.max_workers
+        or job_config.auto_scaling
+    ):
+        return None
+    python_version = (job_config.python_version if job_config else None) or "default"
+    if python_version not in settings.RAY_NODE_IMAGES_MAP:
+        return None
+    return python_version
+
+
+def assign_warm_cluster(job: Job) -> Optional[ComputeResource]:
+    """Assigns warm pool cluster to author of job.
+
+    Ready clusters are preferred to provisioning ones. Selected cluster is
+    locked until it is assigned, so concurrent schedulers skip it.
+
+    Args:
+        job: job to run
+
+    Returns:
+        assigned compute resource or None if pool has no suitable cluster
+    """
+    python_version = warm_pool_python_version(job)
+    if python_version is None:
+        WARM_POOL_MISSES.labels(CUSTOM_CLUSTER).inc()
+        return None
+
+    with transaction.atomic():
+        compute_resource = (
+            ComputeResource.objects.select_for_update(skip_locked=True)
+            .filter(active=True, pool=python_version)
+            # READY sorts after PROVISIONING
+            .order_by("-status", "created")
+            .first()
+        )
+        # clusters created before template got per user content are not shared
+        if compute_resource is None or cluster_template_is_user_specific():
+            WARM_POOL_MISSES.labels(python_version).inc()
+            return None
+
+        compute_resource.owner = job.author
+        compute_resource.pool = None
+        compute_resource.save(update_fields=["owner", "pool"])
+    WARM_POOL_HITS.labels(python_version).inc()
+    observe_assignment_latency(job, "warm_pool")
+    logger.info(
+        "Warm pool cluster [%s] is assigned to [%s].",
+        compute_resource.title,
+        job.author,
+    )
+    return compute_resource
+
+
+def _remove_cluster(compute_resource: ComputeResource) -> None:
+    kill_ray_cluster(compute_resource.title)
+    job_handler_cache.invalidate(compute_resource.host)
+    compute_resource.delete()
+
+
+def _update_pool_clusters(pool: List[ComputeResource]) -> List[ComputeResource]:
+    """Checks readiness of provisioning pool clusters.
+
+    Returns:
+        pool clusters which are not removed
+    """
+    provisioning = [
+        compute_resource
+        for compute_resource in pool
+        if compute_resource.status == ComputeResource.PROVISIONING
+    ]
+    if not provisioning:
+        return pool
+
+    with ThreadPoolExecutor(
+        max_workers=settings.RAY_JOBS_POLLING_MAX_WORKERS
+    ) as executor:
+        readiness = list(
+            executor.map(
+                cluster_is_ready,
+                [compute_resource.host for compute_resource in provisioning],
+            )
+        )
+
+    deadline = timezone.now() - timedelta(
+        seconds=settings.RAY_CLUSTER_MAX_READINESS_TIME
+    )
+    removed = set()
+    for compute_resource, is_ready in zip(provisioning, readiness):
+        if is_ready:
+            compute_resource.status = ComputeResource.READY
+            compute_resource.save(update_fields=["status"])
+        elif compute_resource.created < deadline:
+            logger.warning(
+                "Waiting too long for warm pool cluster [%s] creation",
+                compute_resource.title,
+            )
+            removed.add(compute_resource.id)
+            _remove_cluster(compute_resource)
+    return [
+        compute_resource
+        for compute_resource in pool
+        if compute_resource.id not in removed
+    ]
+
+
+def refill_warm_pool() -> int:
+    """Refills warm pool up to configured sizes.
+
+    Readiness of provisioning pool clusters is checked, clusters not ready
+    in `RAY_CLUSTER_MAX_READINESS_TIME` and clusters above pool size are
+    removed, missing clusters are created while `LIMITS_MAX_CLUSTERS` allows.
+    Pool is emptied if cluster template has per user content.
+
+    Returns:
+        number of created clusters
+    """
+    sizes = settings.RAY_CLUSTER_WARM_POOL_SIZES
+    if any(sizes.values()) and cluster_template_is_user_specific():
+        logger.warning("Warm pool is disabled, cluster template has per user content.")
+        sizes = {}
+
+    with transaction.atomic():
+        # clusters being assigned to users are locked and skipped
+        pool = _update_pool_clusters(
+            list(
+                ComputeResource.objects.select_for_update(skip_locked=True)
+                .filter(active=True, pool__isnull=False)
+                .order_by("created")
+            )
+        )
+
+        clusters_by_version: Dict[str, List[ComputeResource]] = {}
+        for compute_resource in pool:
+            clusters_by_version.setdefault(compute_resource.pool, []).append(
+                compute_resource
+            )
+        for python_version, clusters in clusters_by_version.items():
+            size = sizes.get(python_version, 0)
+            # newest clusters are least likely to be ready
+            for compute_resource in clusters[size:]:
+                logger.info(
+                    "Removing warm pool cluster [%s] above pool size.",
+                    compute_resource.title,
+                )
+                _remove_cluster(compute_resource)
+
+    free_clusters_slots = (
+        settings.LIMITS_MAX_CLUSTERS
+        - ComputeResource.objects.filter(active=True).count()
+    )
+    created = 0
+    for python_version, size in sizes.items():
+        missing = size - len(clusters_by_version.get(python_version, []))
+        while missing > 0 and free_clusters_slots > 0:
+            missing -= 1
+            free_clusters_slots -= 1
+            cluster_name = generate_cluster_name(WARM_POOL_USER_ID)
+            try:
+                create_warm_ray_cluster(python_version, cluster_name=cluster_name)
+                created += 1
+            except Exception:  # pylint: disable=broad-exception-caught
+                logger.warning(
+                    "Warm pool cluster [%s] was not created properly.", cluster_name
+                )
+                kill_ray_cluster(cluster_name)
+    return created
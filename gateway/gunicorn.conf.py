@@ -0,0 +1,35 @@
+"""Gunicorn configuration of gateway.
+
+Workers are sync by default. Job logs streams and requests waiting for
+jobs to finish are held open for a long time, so deployments serving many
+of them can set `GUNICORN_WORKER_CLASS=gevent`, where each worker handles
+many concurrent requests. Gevent workers make psycopg2 and, with tracing
+enabled, grpc of OTLP exporter cooperative.
+"""
+
+import os
+
+bind = os.environ.get("GUNICORN_BIND", "0.0.0.0:8000")
+workers = int(os.environ.get("GUNICORN_WORKERS", "4"))
+worker_class = os.environ.get("GUNICORN_WORKER_CLASS", "sync")
+worker_connections = int(os.environ.get("GUNICORN_WORKER_CONNECTIONS", "1000"))
+
+
+def post_fork(server, worker):  # pylint: disable=unused-argument
+    """Makes blocking clients cooperative in gevent workers."""
+    if "gevent" not in worker.cfg.worker_class_str:
+        return
+
+    from psycogreen.gevent import (  # pylint: disable=import-outside-toplevel
+        patch_psycopg,
+    )
+
+    patch_psycopg()
+
+    if bool(int(os.environ.get("OTEL_ENABLED", "0"))):
+        # grpc channel of span exporter is created on application load, after fork
+        from grpc.experimental import (  # pylint: disable=import-outside-toplevel
+            gevent as grpc_gevent,
+        )
+
+        grpc_gevent.init_gevent()
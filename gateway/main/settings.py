@@ -70,6 +70,7 @@ MIDDLEWARE = [
     "allow_cidr.middleware.AllowCIDRMiddleware",
     "django_prometheus.middleware.PrometheusBeforeMiddleware",
     "django.middleware.security.SecurityMiddleware",
+    "api.middleware.ChunkedRequestMiddleware",
     "django.contrib.sessions.middleware.SessionMiddleware",
     "django.middleware.common.CommonMiddleware",
     "django.middleware.csrf.CsrfViewMiddleware",
@@ -158,7 +159,8 @@ DATABASES = {
     },
 }
 
-if "test" in sys.argv:
+# tests run on sqlite unless postgres is requested, e.g. for query plan tests
+if "test" in sys.argv and not bool(int(os.environ.get("TEST_WITH_POSTGRES", "0"))):
     DATABASES["default"] = DATABASES["test"]
 
 # Password validation
@@ -301,6 +303,19 @@ SETTINGS_TOKEN_AUTH_VERIFICATION_URL = os.environ.get(
 SETTINGS_TOKEN_AUTH_VERIFICATION_FIELD = os.environ.get(
     "SETTINGS_TOKEN_AUTH_VERIFICATION_FIELD", None
 )
+# time in seconds verified token identities are cached, 0 disables caching
+SETTINGS_TOKEN_AUTH_CACHE_TTL = int(
+    os.environ.get("SETTINGS_TOKEN_AUTH_CACHE_TTL", "300")
+)
+# time in seconds rejected tokens are cached
+SETTINGS_TOKEN_AUTH_CACHE_NEGATIVE_TTL = int(
+    os.environ.get("SETTINGS_TOKEN_AUTH_CACHE_NEGATIVE_TTL", "10")
+)
+# time in seconds after which user groups are synchronized even if
+# instances of user did not change
+SETTINGS_GROUPS_SYNC_INTERVAL = int(
+    os.environ.get("SETTINGS_GROUPS_SYNC_INTERVAL", "3600")
+)
 
 # resources limitations
 LIMITS_JOBS_PER_USER = int(os.environ.get("LIMITS_JOBS_PER_USER", "2"))
@@ -322,6 +337,12 @@ RAY_NODE_IMAGES_MAP = {
     "py39": os.environ.get("RAY_NODE_IMAGE_PY39", RAY_NODE_IMAGE),
     "py310": os.environ.get("RAY_NODE_IMAGE_PY310", RAY_NODE_IMAGE),
 }
+# target number of pre-provisioned clusters per python version
+RAY_CLUSTER_WARM_POOL_SIZES = {
+    "default": int(os.environ.get("RAY_CLUSTER_WARM_POOL_SIZE", "0")),
+    "py39": int(os.environ.get("RAY_CLUSTER_WARM_POOL_SIZE_PY39", "0")),
+    "py310": int(os.environ.get("RAY_CLUSTER_WARM_POOL_SIZE_PY310", "0")),
+}
 RAY_CLUSTER_WORKER_REPLICAS = int(os.environ.get("RAY_CLUSTER_WORKER_REPLICAS", "1"))
 RAY_CLUSTER_WORKER_REPLICAS_MAX = int(
     os.environ.get("RAY_CLUSTER_WORKER_REPLICAS_MAX", "5")
@@ -344,8 +365,29 @@ RAY_CLUSTER_WORKER_AUTO_SCALING = bool(
 RAY_CLUSTER_MAX_READINESS_TIME = int(
     os.environ.get("RAY_CLUSTER_MAX_READINESS_TIME", "120")
 )
+# time in seconds idle cluster is kept for next jobs of user
+RAY_CLUSTER_IDLE_TIMEOUT = int(os.environ.get("RAY_CLUSTER_IDLE_TIMEOUT", "0"))
+# timeout in seconds of single cluster readiness check done by scheduler
+RAY_CLUSTER_READINESS_CHECK_TIMEOUT = float(
+    os.environ.get("RAY_CLUSTER_READINESS_CHECK_TIMEOUT", "2")
+)
 
 RAY_SETUP_MAX_RETRIES = int(os.environ.get("RAY_SETUP_MAX_RETRIES", 30))
+# max time in seconds spent on retries of a single ray job api request
+RAY_API_RETRY_DEADLINE = float(os.environ.get("RAY_API_RETRY_DEADLINE", "10"))
+# max time in seconds spent on retries of connecting job handler to ray cluster
+RAY_JOB_HANDLER_SETUP_DEADLINE = float(
+    os.environ.get("RAY_JOB_HANDLER_SETUP_DEADLINE", "30")
+)
+
+# idle time in seconds after which cached ray job handlers are dropped
+RAY_JOB_HANDLER_CACHE_TTL = float(os.environ.get("RAY_JOB_HANDLER_CACHE_TTL", "300"))
+
+# concurrency of job statuses and logs polling
+RAY_JOBS_POLLING_MAX_WORKERS = int(os.environ.get("RAY_JOBS_POLLING_MAX_WORKERS", "16"))
+RAY_JOBS_POLLING_MAX_PER_CLUSTER = int(
+    os.environ.get("RAY_JOBS_POLLING_MAX_PER_CLUSTER", "4")
+)
 
 RAY_CLUSTER_NO_DELETE_ON_COMPLETE = bool(
     os.environ.get("RAY_CLUSTER_NO_DELETE_ON_COMPLETE", False)
@@ -353,6 +395,65 @@ RAY_CLUSTER_NO_DELETE_ON_COMPLETE = bool(
 
 PROGRAM_TIMEOUT = int(os.environ.get("PROGRAM_TIMEOUT", "14"))
 
+# backend serving downloaded files: django, x-accel-redirect, x-sendfile or signed-url
+FILES_SERVING_BACKEND = os.environ.get("FILES_SERVING_BACKEND", "django")
+# nginx internal location serving MEDIA_ROOT for x-accel-redirect backend
+FILES_SERVING_INTERNAL_LOCATION = os.environ.get(
+    "FILES_SERVING_INTERNAL_LOCATION", "/protected-media/"
+)
+# base url of MEDIA_ROOT on file server, secret and ttl in seconds
+# of nginx secure_link signatures for signed-url backend
+FILES_SERVING_SIGNED_URL_BASE = os.environ.get("FILES_SERVING_SIGNED_URL_BASE", "")
+FILES_SERVING_SIGNED_URL_SECRET = os.environ.get("FILES_SERVING_SIGNED_URL_SECRET", "")
+FILES_SERVING_SIGNED_URL_TTL = int(
+    os.environ.get("FILES_SERVING_SIGNED_URL_TTL", "300")
+)
+
+# max size in bytes of body of requests with chunked transfer encoding
+CHUNKED_REQUEST_MAX_SIZE = int(
+    os.environ.get("CHUNKED_REQUEST_MAX_SIZE", str(1024**3))
+)
+
+# max number of characters of job logs kept in database, 0 for no limit
+JOB_LOGS_MAX_SIZE = int(os.environ.get("JOB_LOGS_MAX_SIZE", "1000000"))
+# job logs streaming: interval in seconds between checks for new logs, in case
+# logs notification is missed, and max duration in seconds of a single stream
+# before client reconnects
+JOB_LOGS_STREAM_POLL_INTERVAL = float(
+    os.environ.get("JOB_LOGS_STREAM_POLL_INTERVAL", "5")
+)
+JOB_LOGS_STREAM_MAX_DURATION = float(
+    os.environ.get("JOB_LOGS_STREAM_MAX_DURATION", "300")
+)
+# waiting for job completion: max time in seconds of a single wait request
+# and interval in seconds between status checks when no notification arrives
+JOB_WAIT_MAX_TIMEOUT = float(os.environ.get("JOB_WAIT_MAX_TIMEOUT", "30"))
+JOB_WAIT_POLL_INTERVAL = float(os.environ.get("JOB_WAIT_POLL_INTERVAL", "5"))
+
+# scheduler intervals in seconds
+SCHEDULER_UPDATE_JOBS_STATUSES_INTERVAL = float(
+    os.environ.get("SCHEDULER_UPDATE_JOBS_STATUSES_INTERVAL", "1")
+)
+SCHEDULER_FREE_RESOURCES_INTERVAL = float(
+    os.environ.get("SCHEDULER_FREE_RESOURCES_INTERVAL", "1")
+)
+SCHEDULER_SCHEDULE_QUEUED_JOBS_INTERVAL = float(
+    os.environ.get("SCHEDULER_SCHEDULE_QUEUED_JOBS_INTERVAL", "1")
+)
+SCHEDULER_REFILL_WARM_POOL_INTERVAL = float(
+    os.environ.get("SCHEDULER_REFILL_WARM_POOL_INTERVAL", "10")
+)
+SCHEDULER_CLEANUP_ARTIFACTS_INTERVAL = float(
+    os.environ.get("SCHEDULER_CLEANUP_ARTIFACTS_INTERVAL", "3600")
+)
+
+# files index: max duration in seconds of a single reconciliation run
+# and of indexing files of jobs finished in one update of job statuses
+FILES_RECONCILE_TIME_BUDGET = float(os.environ.get("FILES_RECONCILE_TIME_BUDGET", "60"))
+FILES_INDEX_FINISHED_JOBS_TIME_BUDGET = float(
+    os.environ.get("FILES_INDEX_FINISHED_JOBS_TIME_BUDGET", "1")
+)
+
 # qiskit runtime
 QISKIT_IBM_CHANNEL = os.environ.get("QISKIT_IBM_CHANNEL", "ibm_quantum")
 QISKIT_IBM_URL = os.environ.get(
@@ -14,3 +14,10 @@ from django.core.wsgi import get_wsgi_application
 os.environ.setdefault("DJANGO_SETTINGS_MODULE", "main.settings")
 
 application = get_wsgi_application()
+
+# misconfigured files serving fails web workers on startup instead of on download
+from api.file_serving import (  # pylint: disable=wrong-import-position
+    get_file_serving_backend,
+)
+
+get_file_serving_backend()
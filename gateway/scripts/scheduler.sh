@@ -1,9 +1,6 @@
 #!/bin/sh
 
-while :
-do
-  python manage.py update_jobs_statuses
-  python manage.py free_resources
-	python manage.py schedule_queued_jobs
-	sleep 1
-done
+# files index is reconciled in its own process, outside of scheduler loop
+python manage.py reconcile_files --interval "${FILES_RECONCILE_INTERVAL:-300}" &
+
+exec python manage.py run_scheduler
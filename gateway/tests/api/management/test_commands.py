@@ -1,11 +1,14 @@
 """Tests for commands."""
 
+from datetime import timedelta
+
 from allauth.socialaccount.models import SocialApp
 from django.core.management import call_command
 from ray.dashboard.modules.job.common import JobStatus
 from rest_framework.test import APITestCase
-from unittest.mock import patch, MagicMock
+from unittest.mock import call, patch, MagicMock
 from django.contrib.sites.models import Site
+from django.utils import timezone
 
 from api.models import ComputeResource, Job
 from api.ray import JobHandler
@@ -30,7 +33,32 @@ class TestCommands(APITestCase):
         num_resources = ComputeResource.objects.count()
         self.assertEqual(num_resources, 1)
 
-    @patch("api.ray.get_job_handler")
+    @patch("api.schedule.kill_ray_cluster")
+    def test_free_resources_idle_timeout(self, kill_ray_cluster):
+        """Tests idle clusters are kept for grace period."""
+        compute_resource = ComputeResource.objects.create(
+            title="test2-cluster",
+            host="test2-cluster",
+            owner_id=2,
+            last_used=timezone.now(),
+        )
+        with self.settings(RAY_CLUSTER_IDLE_TIMEOUT=300):
+            call_command("free_resources")
+            compute_resource.refresh_from_db()
+            self.assertTrue(compute_resource.active)
+            # clusters with running jobs are marked as used
+            busy_compute_resource = ComputeResource.objects.get(host="somehost")
+            self.assertIsNotNone(busy_compute_resource.last_used)
+
+            ComputeResource.objects.filter(id=compute_resource.id).update(
+                last_used=timezone.now() - timedelta(hours=1)
+            )
+            call_command("free_resources")
+        compute_resource.refresh_from_db()
+        self.assertFalse(compute_resource.active)
+        kill_ray_cluster.assert_called_once_with("test2-cluster")
+
+    @patch("api.management.commands.update_jobs_statuses.get_job_handler")
     def test_update_jobs_statuses(self, get_job_handler):
         """Tests update of job statuses."""
         # Test status change from PENDING to RUNNING
@@ -58,6 +86,97 @@ class TestCommands(APITestCase):
             "Job 1a7947f9-6ae8-4e3d-ac1e-e7d608deec84 failed due to an internal error.",
         )
 
+    @patch("api.management.commands.update_jobs_statuses.get_job_handler")
+    def test_update_jobs_statuses_single_handler_per_host(self, get_job_handler):
+        """Tests jobs on the same cluster are polled with one job handler."""
+        ray_client = MagicMock()
+        ray_client.get_job_status.return_value = JobStatus.SUCCEEDED
+        ray_client.get_job_logs.return_value = "Done."
+        get_job_handler.return_value = JobHandler(ray_client)
+
+        compute_resource = ComputeResource.objects.get(host="somehost")
+        Job.objects.filter(id="1a7947f9-6ae8-4e3d-ac1e-e7d608deec85").update(
+            compute_resource=compute_resource
+        )
+
+        call_command("update_jobs_statuses")
+
+        get_job_handler.assert_called_once_with("somehost")
+        jobs = Job.objects.filter(compute_resource=compute_resource)
+        self.assertEqual(len(jobs), 2)
+        for job in jobs:
+            self.assertEqual(job.status, Job.SUCCEEDED)
+            self.assertEqual(job.logs, "Done.")
+            self.assertEqual(job.env_vars, "{}")
+
+    @patch("api.schedule.kill_ray_cluster")
+    @patch("api.management.commands.update_jobs_statuses.get_job_handler")
+    def test_update_jobs_statuses_releases_cluster_after_commit(
+        self, get_job_handler, kill_ray_cluster
+    ):
+        """Tests cluster of unavailable job is removed after statuses are saved."""
+        get_job_handler.return_value = None
+        job = Job.objects.get(id="1a7947f9-6ae8-4e3d-ac1e-e7d608deec84")
+        compute_resource = job.compute_resource
+
+        with self.captureOnCommitCallbacks() as callbacks:
+            call_command("update_jobs_statuses")
+        kill_ray_cluster.assert_not_called()
+        job.refresh_from_db()
+        self.assertEqual(job.status, Job.FAILED)
+        self.assertIsNone(job.compute_resource)
+        self.assertIn("Something went wrong during updating job status.", job.logs)
+
+        for callback in callbacks:
+            callback()
+        kill_ray_cluster.assert_called_once_with(compute_resource.title)
+        self.assertFalse(
+            ComputeResource.objects.filter(id=compute_resource.id).exists()
+        )
+
+    @patch("api.management.commands.update_jobs_statuses.index_job_files")
+    @patch("api.management.commands.update_jobs_statuses.get_job_handler")
+    def test_update_jobs_statuses_indexes_files(self, get_job_handler, index_job_files):
+        """Tests files of finished jobs are indexed."""
+        ray_client = MagicMock()
+        ray_client.get_job_status.return_value = JobStatus.SUCCEEDED
+        ray_client.get_job_logs.return_value = "Done."
+        get_job_handler.return_value = JobHandler(ray_client)
+
+        call_command("update_jobs_statuses")
+
+        job = Job.objects.get(id__exact="1a7947f9-6ae8-4e3d-ac1e-e7d608deec84")
+        self.assertEqual(index_job_files.call_args.args, (job,))
+        self.assertIsNotNone(index_job_files.call_args.kwargs["deadline"])
+
+    @patch("api.management.commands.update_jobs_statuses.get_job_handler")
+    def test_update_jobs_statuses_incremental_logs(self, get_job_handler):
+        """Tests only new ray logs output is appended to job logs."""
+        ray_client = MagicMock()
+        ray_client.get_job_status.return_value = JobStatus.RUNNING
+        ray_client.get_job_logs.return_value = "first line\n"
+        get_job_handler.return_value = JobHandler(ray_client)
+        job_id = "1a7947f9-6ae8-4e3d-ac1e-e7d608deec84"
+
+        call_command("update_jobs_statuses")
+        job = Job.objects.get(id=job_id)
+        self.assertEqual(job.logs, "first line\n")
+        self.assertEqual(job.logs_offset, 11)
+
+        job.append_logs("saved line\n")
+        ray_client.get_job_logs.return_value = "first line\nsecond line\n"
+        call_command("update_jobs_statuses")
+        job = Job.objects.get(id=job_id)
+        self.assertEqual(job.logs, "first line\nsaved line\nsecond line\n")
+        self.assertEqual(job.logs_offset, 23)
+
+        with self.settings(JOB_LOGS_MAX_SIZE=12):
+            ray_client.get_job_logs.return_value = "first line\nsecond line\nthird\n"
+            call_command("update_jobs_statuses")
+        job = Job.objects.get(id=job_id)
+        # only whole chunks are removed when logs exceed max size
+        self.assertEqual(job.logs, "second line\nthird\n")
+
     @patch("api.schedule.execute_job")
     def test_schedule_queued_jobs(self, execute_job):
         """Tests schedule of queued jobs command."""
@@ -73,3 +192,55 @@ class TestCommands(APITestCase):
         # TODO: mock execute job to change status of job and query for QUEUED jobs  # pylint: disable=fixme
         job_count = Job.objects.count()
         self.assertEqual(job_count, 7)
+
+    @patch("api.management.commands.schedule_queued_jobs.Command._schedule_job")
+    def test_schedule_queued_jobs_claims_jobs(self, schedule_job):
+        """Tests jobs are claimed before execution and failed ones are queued again."""
+        failed = []
+
+        def schedule(job):
+            # job is claimed and no longer locked by transaction
+            self.assertEqual(Job.objects.get(id=job.id).status, Job.PROVISIONING)
+            if not failed:
+                failed.append(job.id)
+                raise RuntimeError("cluster was not created")
+
+        schedule_job.side_effect = schedule
+        with self.assertLogs("commands", level="INFO") as logs:
+            call_command("schedule_queued_jobs")
+
+        self.assertTrue(schedule_job.call_count > 1)
+        self.assertEqual(Job.objects.get(id=failed[0]).status, Job.QUEUED)
+        self.assertIn(
+            f"INFO:commands:{schedule_job.call_count - 1} are scheduled for execution.",
+            logs.output,
+        )
+
+    @patch("api.management.commands.run_scheduler.call_command")
+    def test_run_scheduler(self, scheduler_call_command):
+        """Tests scheduler runs all phases in order on each tick."""
+        call_command(
+            "run_scheduler",
+            "--ticks=2",
+            "--update-jobs-statuses-interval=0",
+            "--free-resources-interval=0",
+            "--schedule-queued-jobs-interval=0",
+            "--refill-warm-pool-interval=0",
+            "--cleanup-artifacts-interval=0",
+        )
+        phases = [
+            call("update_jobs_statuses"),
+            call("free_resources"),
+            call("schedule_queued_jobs"),
+            call("refill_warm_pool"),
+            call("cleanup_artifacts"),
+        ]
+        scheduler_call_command.assert_has_calls(phases * 2)
+        self.assertEqual(scheduler_call_command.call_count, 10)
+
+    @patch("api.management.commands.run_scheduler.call_command")
+    def test_run_scheduler_survives_phase_failure(self, scheduler_call_command):
+        """Tests scheduler keeps running other phases if one of them fails."""
+        scheduler_call_command.side_effect = [RuntimeError("boom")] + [None] * 4
+        call_command("run_scheduler", "--ticks=1")
+        self.assertEqual(scheduler_call_command.call_count, 5)
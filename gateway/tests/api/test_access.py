@@ -0,0 +1,82 @@
+"""Tests for programs accessible by users."""
+
+from unittest.mock import patch
+
+from django.contrib.auth.models import Group, Permission
+from rest_framework.test import APITestCase
+
+from api.access import accessible_programs
+from api.models import (
+    RUN_PROGRAM_PERMISSION,
+    VIEW_PROGRAM_PERMISSION,
+    Program,
+    ProgramAccess,
+)
+from api.models_proxies import QuantumUserProxy
+
+
+class TestAccess(APITestCase):
+    """Tests for programs accessible by users."""
+
+    fixtures = ["tests/fixtures/acl_fixtures.json"]
+
+    def setUp(self):
+        self.user = QuantumUserProxy.objects.get(username="test_user_2")
+        view_program = Permission.objects.get(codename=VIEW_PROGRAM_PERMISSION)
+        Group.objects.get(name="ibm-test").permissions.add(view_program)
+
+    def _titles(self, permission=VIEW_PROGRAM_PERMISSION):
+        return sorted(
+            accessible_programs(self.user, permission).values_list("title", flat=True)
+        )
+
+    def test_accessible_programs_single_query(self):
+        """Tests accessible programs are read with single query."""
+        with self.assertNumQueries(1):
+            self.assertEqual(self._titles(), ["Public program"])
+        self.assertEqual(self._titles(RUN_PROGRAM_PERMISSION), [])
+
+    def test_accessible_programs_follow_program_changes(self):
+        """Tests programs and their groups change accessible programs."""
+        self.assertEqual(self._titles(), ["Public program"])
+
+        private_program = Program.objects.get(title="Private program")
+        private_program.instances.add(Group.objects.get(name="ibm-test"))
+        self.assertEqual(self._titles(), ["Private program", "Public program"])
+
+        Program.objects.create(title="Own program", author=self.user)
+        self.assertEqual(
+            self._titles(), ["Own program", "Private program", "Public program"]
+        )
+
+        Group.objects.get(name="ibm-test").permissions.clear()
+        self.assertEqual(self._titles(), ["Own program"])
+
+    def test_accessible_programs_follow_membership_changes(self):
+        """Tests memberships of user change accessible programs."""
+        self.assertEqual(self._titles(), ["Public program"])
+
+        self.user.groups.remove(Group.objects.get(name="ibm-test"))
+        self.assertEqual(self._titles(), [])
+
+        Group.objects.get(name="ibm-test").user_set.add(self.user)
+        self.assertEqual(self._titles(), ["Public program"])
+
+        with patch.object(QuantumUserProxy, "_get_network", return_value=[]):
+            self.user.update_groups("")
+        self.assertEqual(self._titles(), [])
+
+    def test_accessible_programs_follow_group_changes(self):
+        """Tests cleared and deleted groups change accessible programs."""
+        group = Group.objects.get(name="ibm-test")
+        self.assertEqual(self._titles(), ["Public program"])
+
+        group.program_set.clear()
+        self.assertEqual(self._titles(), [])
+
+        Program.objects.get(title="Public program").instances.add(group)
+        self.assertEqual(self._titles(), ["Public program"])
+
+        group.delete()
+        self.assertEqual(self._titles(), [])
+        self.assertFalse(ProgramAccess.objects.filter(user=self.user).exists())
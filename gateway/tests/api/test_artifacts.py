@@ -0,0 +1,273 @@
+"""Tests content addressed artifact store."""
+
+import hashlib
+import io
+import json
+import os
+import shutil
+import tarfile
+import tempfile
+import time
+import zipfile
+from unittest.mock import patch
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.files.base import ContentFile
+from django.core.management import call_command
+from django.test import override_settings
+from django.test.client import BOUNDARY, MULTIPART_CONTENT, encode_multipart
+from rest_framework import status
+from rest_framework.test import APITestCase
+
+from api.artifacts import (
+    ARTIFACTS_DIR,
+    _package_artifact,
+    artifacts_root,
+    get_artifact_package,
+    user_blobs_dir,
+)
+from api.models import Program
+
+
+def make_tar(files: dict) -> bytes:
+    """Returns tar archive with files."""
+    buffer = io.BytesIO()
+    with tarfile.open(fileobj=buffer, mode="w") as tar:
+        for name, content in files.items():
+            info = tarfile.TarInfo(name)
+            info.size = len(content)
+            tar.addfile(info, io.BytesIO(content))
+    return buffer.getvalue()
+
+
+class TestArtifacts(APITestCase):
+    """Tests content addressed artifact store."""
+
+    fixtures = ["tests/fixtures/fixtures.json"]
+
+    def setUp(self):
+        media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, media_root)
+        settings_override = override_settings(MEDIA_ROOT=media_root)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+
+    def upload(self, title: str, artifact: bytes) -> Program:
+        """Uploads program with artifact."""
+        fake_file = ContentFile(artifact)
+        fake_file.name = "artifact.tar"
+        self.client.force_authenticate(
+            user=get_user_model().objects.get(username="test_user_2")
+        )
+        response = self.client.post(
+            "/api/v1/programs/upload/",
+            data={
+                "title": title,
+                "entrypoint": "main.py",
+                "dependencies": "[]",
+                "artifact": fake_file,
+            },
+        )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return Program.objects.get(title=title, author__username="test_user_2")
+
+    def test_artifacts_are_deduplicated(self):
+        """Tests artifacts with the same content are stored once."""
+        artifact = make_tar({"main.py": b"print('hello')"})
+        program = self.upload("first", artifact)
+        other_program = self.upload("second", artifact)
+
+        self.assertEqual(len(program.artifact_hash), 64)
+        self.assertEqual(program.artifact_hash, other_program.artifact_hash)
+        self.assertEqual(program.artifact.name, other_program.artifact.name)
+        self.assertEqual(
+            program.artifact.name, f"{ARTIFACTS_DIR}/{program.artifact_hash}.tar"
+        )
+        self.assertEqual(os.listdir(artifacts_root()), [f"{program.artifact_hash}.tar"])
+
+    def test_artifact_package_is_cached(self):
+        """Tests package is built once per artifact hash."""
+        program = self.upload(
+            "program",
+            make_tar({"main.py": b"print('hello')", "lib/util.py": b"x = 1"}),
+        )
+
+        package_path = get_artifact_package(program)
+        with zipfile.ZipFile(package_path) as package:
+            self.assertEqual(sorted(package.namelist()), ["lib/util.py", "main.py"])
+            self.assertEqual(package.read("main.py"), b"print('hello')")
+
+        with patch("api.artifacts._package_artifact") as package_artifact:
+            self.assertEqual(get_artifact_package(program), package_path)
+        package_artifact.assert_not_called()
+
+    def test_artifact_package_is_deterministic(self):
+        """Tests the same artifact results in the same package bytes."""
+        artifact_path = os.path.join(artifacts_root(), "artifact.tar")
+        os.makedirs(artifacts_root())
+        with open(artifact_path, "wb") as file:
+            file.write(make_tar({"main.py": b"print('hello')", "lib/util.py": b"x"}))
+
+        packages = []
+        for index in range(2):
+            package_path = os.path.join(artifacts_root(), f"package_{index}.zip")
+            with patch("api.artifacts.time.time", return_value=1000 + index):
+                _package_artifact(artifact_path, package_path)
+            with open(package_path, "rb") as package:
+                packages.append(package.read())
+        self.assertEqual(packages[0], packages[1])
+        with zipfile.ZipFile(io.BytesIO(packages[0])) as package:
+            self.assertEqual(package.namelist(), ["lib/util.py", "main.py"])
+            self.assertEqual(package.read("main.py"), b"print('hello')")
+
+    def test_legacy_artifact_hash(self):
+        """Tests hash of artifact stored before content addressing is saved."""
+        user = get_user_model().objects.get(username="test_user_2")
+        legacy_path = os.path.join("test_user_2", "legacy", "artifact.tar")
+        full_path = os.path.join(settings.MEDIA_ROOT, legacy_path)
+        os.makedirs(os.path.dirname(full_path))
+        with open(full_path, "wb") as file:
+            file.write(make_tar({"main.py": b"print('legacy')"}))
+        program = Program.objects.create(
+            title="legacy", author=user, artifact=legacy_path
+        )
+
+        package_path = get_artifact_package(program)
+
+        program.refresh_from_db()
+        self.assertEqual(os.path.basename(package_path), f"{program.artifact_hash}.zip")
+
+    def test_cleanup_artifacts(self):
+        """Tests only files of unreferenced hashes are removed."""
+        program = self.upload("program", make_tar({"main.py": b"print('hello')"}))
+        get_artifact_package(program)
+        unused = self.upload("unused", make_tar({"main.py": b"print('unused')"}))
+        unused.delete()
+
+        # recently written files are kept
+        call_command("cleanup_artifacts")
+        self.assertEqual(len(os.listdir(artifacts_root())), 3)
+
+        old = time.time() - 2 * 3600
+        for filename in os.listdir(artifacts_root()):
+            os.utime(os.path.join(artifacts_root(), filename), (old, old))
+        call_command("cleanup_artifacts")
+        self.assertEqual(
+            sorted(os.listdir(artifacts_root())),
+            [f"{program.artifact_hash}.tar", f"{program.artifact_hash}.zip"],
+        )
+
+    def upload_incremental(
+        self, manifest: dict, blobs: dict = None, username: str = "test_user_2"
+    ):
+        """Uploads program by manifest of files and blobs."""
+        self.client.force_authenticate(
+            user=get_user_model().objects.get(username=username)
+        )
+        data = {
+            "title": "incremental",
+            "entrypoint": "main.py",
+            "dependencies": "[]",
+            "manifest": json.dumps(manifest),
+        }
+        if blobs is not None:
+            buffer = io.BytesIO()
+            with tarfile.open(fileobj=buffer, mode="w:gz") as tar:
+                for name, content in blobs.items():
+                    info = tarfile.TarInfo(name)
+                    info.size = len(content)
+                    tar.addfile(info, io.BytesIO(content))
+            data["blobs"] = ContentFile(buffer.getvalue(), name="blobs.tar.gz")
+        return self.client.post("/api/v1/programs/upload/incremental/", data=data)
+
+    def test_upload_incremental(self):
+        """Tests only missing files are uploaded."""
+        files = {"main.py": b"print('hello')", "data/input.json": b"{}"}
+        hashes = {
+            path: hashlib.sha256(content).hexdigest() for path, content in files.items()
+        }
+
+        response = self.upload_incremental(hashes)
+        self.assertEqual(response.status_code, status.HTTP_409_CONFLICT)
+        self.assertEqual(response.data["missing"], sorted(hashes.values()))
+
+        blobs = {hashes[path]: content for path, content in files.items()}
+        response = self.upload_incremental(hashes, blobs)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        program = Program.objects.get(title="incremental")
+        with tarfile.open(program.artifact.path) as tar:
+            self.assertEqual(tar.getnames(), ["data/input.json", "main.py"])
+            self.assertEqual(tar.extractfile("main.py").read(), files["main.py"])
+
+        # unchanged function is uploaded by manifest only
+        response = self.upload_incremental(hashes)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            Program.objects.get(title="incremental").artifact_hash,
+            program.artifact_hash,
+        )
+
+    def test_upload_incremental_blobs_of_user(self):
+        """Tests blobs uploaded by other users are not used."""
+        files = {"main.py": b"print('secret')"}
+        hashes = {
+            path: hashlib.sha256(content).hexdigest() for path, content in files.items()
+        }
+        blobs = {hashes[path]: content for path, content in files.items()}
+        response = self.upload_incremental(hashes, blobs)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+        response = self.upload_incremental(hashes, username="test_user")
+        self.assertEqual(response.status_code, status.HTTP_409_CONFLICT)
+        self.assertEqual(response.data["missing"], sorted(hashes.values()))
+
+        # unused blobs of users expire
+        user = get_user_model().objects.get(username="test_user_2")
+        blob_path = os.path.join(user_blobs_dir(user), hashes["main.py"])
+        old = time.time() - 8 * 24 * 3600
+        os.utime(blob_path, (old, old))
+        call_command("cleanup_artifacts")
+        self.assertFalse(os.path.exists(blob_path))
+
+    def test_upload_incremental_validation(self):
+        """Tests malformed manifest and blobs are rejected."""
+        file_hash = hashlib.sha256(b"print('hello')").hexdigest()
+        response = self.upload_incremental({"../main.py": file_hash})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+        response = self.upload_incremental(
+            {"main.py": file_hash}, {file_hash: b"print('changed')"}
+        )
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_upload_chunked(self):
+        """Tests artifact streamed with chunked transfer encoding is stored."""
+        artifact = make_tar({"main.py": b"print('streamed')"})
+        body = encode_multipart(
+            BOUNDARY,
+            {
+                "title": "streamed",
+                "entrypoint": "main.py",
+                "dependencies": "[]",
+                "artifact": ContentFile(artifact, name="artifact.tar"),
+            },
+        )
+        self.client.force_authenticate(
+            user=get_user_model().objects.get(username="test_user_2")
+        )
+        response = self.client.generic(
+            "POST",
+            "/api/v1/programs/upload/",
+            content_type=MULTIPART_CONTENT,
+            # no content length, body is read until end of input stream
+            CONTENT_LENGTH="",
+            HTTP_TRANSFER_ENCODING="chunked",
+            **{"wsgi.input": io.BytesIO(body), "wsgi.input_terminated": True},
+        )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+        program = Program.objects.get(title="streamed")
+        self.assertEqual(program.artifact_hash, hashlib.sha256(artifact).hexdigest())
+        with program.artifact.open("rb") as file:
+            self.assertEqual(file.read(), artifact)
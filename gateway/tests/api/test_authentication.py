@@ -1,11 +1,20 @@
 """Tests authentication."""
 
+import threading
 from unittest.mock import MagicMock, patch
 
+import requests
 import responses
+from django.core.cache import cache
 from rest_framework.test import APITestCase
 
-from api.authentication import CustomTokenBackend, CustomToken, MockAuthBackend
+from api.authentication import (
+    CustomTokenBackend,
+    CustomToken,
+    MockAuthBackend,
+    TokenVerificationCache,
+    TokenVerificationUnavailable,
+)
 from api.models_proxies import QuantumUserProxy
 
 
@@ -23,6 +32,9 @@ class TestAuthentication(APITestCase):
         }
     ]
 
+    def setUp(self):
+        cache.clear()
+
     @responses.activate
     @patch.object(QuantumUserProxy, "_get_network")
     def test_custom_token_authentication(self, get_network_mock: MagicMock):
@@ -98,6 +110,7 @@ class TestAuthentication(APITestCase):
 
             self.assertEqual(user.username, "AwesomeUser")
 
+        cache.clear()
         with self.settings(
             SETTINGS_TOKEN_AUTH_URL="http://token_auth_url",
             SETTINGS_TOKEN_AUTH_USER_FIELD="userId",
@@ -109,6 +122,7 @@ class TestAuthentication(APITestCase):
             self.assertIsNone(user)
             self.assertEqual(token.token, b"AWESOME_TOKEN")
 
+        cache.clear()
         responses.add(
             responses.GET,
             "http://token_auth_verification_url",
@@ -127,6 +141,133 @@ class TestAuthentication(APITestCase):
             with self.assertRaises(AttributeError):
                 custom_auth.authenticate(request)
 
+    @responses.activate
+    @patch.object(QuantumUserProxy, "_get_network")
+    def test_custom_token_authentication_cache(self, get_network_mock: MagicMock):
+        """Tests verified and rejected tokens are cached."""
+        get_network_mock.return_value = self.network_configuration_without_project
+        auth = responses.add(
+            responses.POST,
+            "http://token_auth_url",
+            json={"userId": "AwesomeUser", "id": "requestId"},
+            status=200,
+        )
+        verification = responses.add(
+            responses.GET,
+            "http://token_auth_verification_url",
+            json={"is_valid": True},
+            status=200,
+        )
+        custom_auth = CustomTokenBackend()
+        request = MagicMock()
+        request.META.get.return_value = "Bearer AWESOME_TOKEN"
+
+        with self.settings(
+            SETTINGS_TOKEN_AUTH_URL="http://token_auth_url",
+            SETTINGS_TOKEN_AUTH_USER_FIELD="userId",
+            SETTINGS_TOKEN_AUTH_VERIFICATION_URL="http://token_auth_verification_url",
+            SETTINGS_TOKEN_AUTH_VERIFICATION_FIELD="is_valid",
+        ):
+            for _ in range(3):
+                user, _ = custom_auth.authenticate(request)
+                self.assertEqual(user.username, "AwesomeUser")
+            self.assertEqual(auth.call_count, 1)
+            self.assertEqual(verification.call_count, 1)
+            get_network_mock.assert_called_once()
+
+            request.META.get.return_value = "Bearer WRONG_TOKEN"
+            auth.status = 401
+            for _ in range(2):
+                user, _ = custom_auth.authenticate(request)
+                self.assertIsNone(user)
+            self.assertEqual(auth.call_count, 2)
+
+            with self.settings(SETTINGS_TOKEN_AUTH_CACHE_NEGATIVE_TTL=0):
+                cache.clear()
+                for _ in range(2):
+                    custom_auth.authenticate(request)
+            self.assertEqual(auth.call_count, 4)
+
+    @responses.activate
+    def test_custom_token_authentication_failures_not_cached(self):
+        """Tests failures of auth service are not cached."""
+        auth = responses.add(
+            responses.POST,
+            "http://token_auth_url",
+            json={"message": "unavailable"},
+            status=503,
+        )
+        custom_auth = CustomTokenBackend()
+        request = MagicMock()
+        request.META.get.return_value = "Bearer AWESOME_TOKEN"
+
+        with self.settings(
+            SETTINGS_TOKEN_AUTH_URL="http://token_auth_url",
+            SETTINGS_TOKEN_AUTH_USER_FIELD="userId",
+            SETTINGS_TOKEN_AUTH_VERIFICATION_URL="http://token_auth_verification_url",
+            SETTINGS_TOKEN_AUTH_VERIFICATION_FIELD="is_valid",
+        ):
+            for _ in range(2):
+                user, _ = custom_auth.authenticate(request)
+                self.assertIsNone(user)
+            self.assertEqual(auth.call_count, 2)
+
+            auth.body = requests.ConnectionError()
+            for _ in range(2):
+                user, _ = custom_auth.authenticate(request)
+                self.assertIsNone(user)
+            self.assertEqual(auth.call_count, 4)
+
+    def test_token_verification_cache_failure_not_cached(self):
+        """Tests failed verification is not cached."""
+        token_cache = TokenVerificationCache()
+        verify_mock = MagicMock(
+            side_effect=[TokenVerificationUnavailable("unavailable"), "AwesomeUser"]
+        )
+
+        with self.assertRaises(TokenVerificationUnavailable):
+            token_cache.get_or_verify("AWESOME_TOKEN", verify_mock)
+        self.assertEqual(
+            token_cache.get_or_verify("AWESOME_TOKEN", verify_mock), "AwesomeUser"
+        )
+        self.assertEqual(verify_mock.call_count, 2)
+
+    def test_token_verification_cache_single_flight(self):
+        """Tests concurrent verifications of the same token are coalesced."""
+        token_cache = TokenVerificationCache()
+        started = threading.Event()
+        release = threading.Event()
+
+        def verify():
+            started.set()
+            release.wait(5)
+            return "AwesomeUser"
+
+        verify_mock = MagicMock(side_effect=verify)
+        results = []
+        threads = [
+            threading.Thread(
+                target=lambda: results.append(
+                    token_cache.get_or_verify("AWESOME_TOKEN", verify_mock)
+                )
+            )
+            for _ in range(4)
+        ]
+        threads[0].start()
+        started.wait(5)
+        for thread in threads[1:]:
+            thread.start()
+        release.set()
+        for thread in threads:
+            thread.join(5)
+
+        self.assertEqual(results, ["AwesomeUser"] * 4)
+        verify_mock.assert_called_once()
+        self.assertEqual(
+            token_cache.get_or_verify("AWESOME_TOKEN", verify_mock), "AwesomeUser"
+        )
+        verify_mock.assert_called_once()
+
     def test_mock_auth(self):
         """Tests for mock authentication backend."""
         backend = MockAuthBackend()
@@ -1,13 +1,25 @@
 """Tests files api."""
 
+import base64
+import hashlib
 import os
+import shutil
+import tempfile
+from unittest.mock import patch
 from urllib.parse import quote_plus
 
+from django.core.exceptions import ImproperlyConfigured
+from django.core.files.base import ContentFile
+from django.core.management import call_command
 from django.urls import reverse
 from rest_framework import status
 from rest_framework.test import APITestCase
 from django.contrib.auth import models
 
+from api.file_index import index_job_files, reconcile_files
+from api.file_serving import check_file_serving_backend, get_file_serving_backend
+from api.models import Job, UserFile
+
 
 class TestFilesApi(APITestCase):
     """TestProgramApi."""
@@ -32,6 +44,7 @@ class TestFilesApi(APITestCase):
         media_root = os.path.normpath(os.path.join(os.getcwd(), media_root))
 
         with self.settings(MEDIA_ROOT=media_root):
+            call_command("reconcile_files")
             user = models.User.objects.get(username="test_user")
             self.client.force_authenticate(user=user)
             url = reverse("v1:files-list")
@@ -39,6 +52,106 @@ class TestFilesApi(APITestCase):
             self.assertEqual(response.status_code, status.HTTP_200_OK)
             self.assertEqual(response.data, {"results": ["artifact.tar"]})
 
+    def test_files_list_paginated(self):
+        """Tests files list with metadata of files."""
+        media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, media_root)
+        os.makedirs(os.path.join(media_root, "test_user"))
+        for name in ["b.tar", "a.h5", "c.txt"]:
+            with open(os.path.join(media_root, "test_user", name), "wb") as file:
+                file.write(name.encode())
+
+        with self.settings(MEDIA_ROOT=media_root):
+            call_command("reconcile_files")
+            user = models.User.objects.get(username="test_user")
+            self.client.force_authenticate(user=user)
+            url = reverse("v1:files-list")
+            response = self.client.get(url, data={"limit": 1})
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            self.assertEqual(response.data["count"], 2)
+            self.assertIsNotNone(response.data["next"])
+            self.assertEqual(len(response.data["results"]), 1)
+            user_file = response.data["results"][0]
+            self.assertEqual(user_file["name"], "a.h5")
+            self.assertEqual(user_file["size"], 4)
+            self.assertEqual(user_file["checksum"], hashlib.sha256(b"a.h5").hexdigest())
+            self.assertIn("modified", user_file)
+
+            # index follows changes of files on disk
+            os.remove(os.path.join(media_root, "test_user", "b.tar"))
+            call_command("reconcile_files")
+            response = self.client.get(url, format="json")
+            self.assertEqual(response.data, {"results": ["a.h5"]})
+
+    def test_files_index_job_files(self):
+        """Tests only new files of finished job are indexed, checksums later."""
+        media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, media_root)
+        os.makedirs(os.path.join(media_root, "test_user"))
+        for name in ["old.tar", "new.tar"]:
+            with open(os.path.join(media_root, "test_user", name), "wb") as file:
+                file.write(name.encode())
+        old_path = os.path.join(media_root, "test_user", "old.tar")
+        os.utime(old_path, (0, 0))
+
+        with self.settings(MEDIA_ROOT=media_root):
+            user = models.User.objects.get(username="test_user")
+            job = Job.objects.filter(author=user).first()
+            self.assertEqual(index_job_files(job), 1)
+            user_file = UserFile.objects.get(owner=user)
+            self.assertEqual(user_file.name, "new.tar")
+            self.assertEqual(user_file.checksum, "")
+            # unchanged files are not indexed again
+            self.assertEqual(index_job_files(job), 0)
+
+            call_command("reconcile_files")
+            user_file.refresh_from_db()
+            self.assertEqual(user_file.checksum, hashlib.sha256(b"new.tar").hexdigest())
+            self.assertTrue(
+                UserFile.objects.filter(owner=user, name="old.tar").exists()
+            )
+
+    def test_files_reconcile_time_budget(self):
+        """Tests reconciliation stopped at deadline is resumed by next run."""
+        media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, media_root)
+        os.makedirs(os.path.join(media_root, "test_user"))
+        with open(os.path.join(media_root, "test_user", "a.tar"), "wb") as file:
+            file.write(b"a.tar")
+
+        with self.settings(MEDIA_ROOT=media_root):
+            user = models.User.objects.get(username="test_user")
+            self.assertEqual(reconcile_files(deadline=0), (0, 0, user.id))
+            self.assertFalse(UserFile.objects.filter(owner=user).exists())
+
+            self.assertEqual(reconcile_files(resume_from=user.id), (1, 0, None))
+            self.assertTrue(UserFile.objects.filter(owner=user, name="a.tar").exists())
+
+    def test_files_index_upload_delete(self):
+        """Tests uploaded and deleted files are indexed."""
+        media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, media_root)
+        os.makedirs(os.path.join(media_root, "test_user"))
+
+        with self.settings(MEDIA_ROOT=media_root):
+            user = models.User.objects.get(username="test_user")
+            self.client.force_authenticate(user=user)
+            response = self.client.post(
+                reverse("v1:files-upload"),
+                data={"file": ContentFile(b"result", name="result.tar")},
+                format="multipart",
+            )
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            response = self.client.get(reverse("v1:files-list"), format="json")
+            self.assertEqual(response.data, {"results": ["result.tar"]})
+
+            response = self.client.delete(
+                reverse("v1:files-delete"), data={"file": "result.tar"}, format="json"
+            )
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            response = self.client.get(reverse("v1:files-list"), format="json")
+            self.assertEqual(response.data, {"results": []})
+
     def test_non_existing_file_download(self):
         """Tests downloading non-existing file."""
         user = models.User.objects.get(username="test_user")
@@ -71,6 +184,137 @@ class TestFilesApi(APITestCase):
             self.assertEqual(response.status_code, status.HTTP_200_OK)
             self.assertTrue(response.streaming)
 
+    def test_file_download_range(self):
+        """Tests downloading byte ranges of file."""
+        media_root = os.path.join(
+            os.path.dirname(os.path.abspath(__file__)),
+            "..",
+            "resources",
+            "fake_media",
+        )
+        media_root = os.path.normpath(os.path.join(os.getcwd(), media_root))
+        with open(os.path.join(media_root, "test_user", "artifact.tar"), "rb") as file:
+            content = file.read()
+
+        with self.settings(MEDIA_ROOT=media_root):
+            user = models.User.objects.get(username="test_user")
+            self.client.force_authenticate(user=user)
+            url = reverse("v1:files-download")
+            response = self.client.get(url, data={"file": "artifact.tar"})
+            etag = response["ETag"]
+            self.assertEqual(response["Accept-Ranges"], "bytes")
+            self.assertEqual(b"".join(response.streaming_content), content)
+
+            response = self.client.get(
+                url, data={"file": "artifact.tar"}, HTTP_RANGE="bytes=10-19"
+            )
+            self.assertEqual(response.status_code, status.HTTP_206_PARTIAL_CONTENT)
+            self.assertEqual(response["Content-Range"], f"bytes 10-19/{len(content)}")
+            self.assertEqual(b"".join(response.streaming_content), content[10:20])
+
+            # range of outdated version of file is ignored
+            response = self.client.get(
+                url,
+                data={"file": "artifact.tar"},
+                HTTP_RANGE="bytes=10-19",
+                HTTP_IF_RANGE='"outdated"',
+            )
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            self.assertEqual(b"".join(response.streaming_content), content)
+
+            response = self.client.get(
+                url,
+                data={"file": "artifact.tar"},
+                HTTP_RANGE=f"bytes={len(content)}-",
+                HTTP_IF_RANGE=etag,
+            )
+            self.assertEqual(
+                response.status_code, status.HTTP_416_REQUESTED_RANGE_NOT_SATISFIABLE
+            )
+
+            response = self.client.get(
+                url, data={"file": "artifact.tar"}, HTTP_IF_NONE_MATCH=etag
+            )
+            self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+
+    def test_file_download_offloaded(self):
+        """Tests file transfer is delegated to proxy or file server."""
+        media_root = os.path.join(
+            os.path.dirname(os.path.abspath(__file__)),
+            "..",
+            "resources",
+            "fake_media",
+        )
+        media_root = os.path.normpath(os.path.join(os.getcwd(), media_root))
+        user = models.User.objects.get(username="test_user")
+        self.client.force_authenticate(user=user)
+        url = reverse("v1:files-download")
+
+        with self.settings(
+            MEDIA_ROOT=media_root, FILES_SERVING_BACKEND="x-accel-redirect"
+        ):
+            response = self.client.get(url, data={"file": "artifact.tar"})
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            self.assertEqual(
+                response["X-Accel-Redirect"], "/protected-media/test_user/artifact.tar"
+            )
+            self.assertEqual(response.content, b"")
+
+        with self.settings(MEDIA_ROOT=media_root, FILES_SERVING_BACKEND="x-sendfile"):
+            response = self.client.get(url, data={"file": "artifact.tar"})
+            self.assertEqual(
+                response["X-Sendfile"],
+                os.path.join(media_root, "test_user", "artifact.tar"),
+            )
+
+        with self.settings(
+            MEDIA_ROOT=media_root,
+            FILES_SERVING_BACKEND="signed-url",
+            FILES_SERVING_SIGNED_URL_BASE="https://files.example.com/media/",
+            FILES_SERVING_SIGNED_URL_SECRET="secret",
+        ), patch("api.file_serving.time.time", return_value=1000):
+            response = self.client.get(url, data={"file": "artifact.tar"})
+            self.assertEqual(response.status_code, status.HTTP_302_FOUND)
+            signature = (
+                base64.urlsafe_b64encode(
+                    hashlib.md5(
+                        b"1300/media/test_user/artifact.tar secret",
+                        usedforsecurity=False,
+                    ).digest()
+                )
+                .decode()
+                .rstrip("=")
+            )
+            self.assertEqual(
+                response["Location"],
+                "https://files.example.com/media/test_user/artifact.tar"
+                f"?md5={signature}&expires=1300",
+            )
+
+            # files of other users are not signed
+            response = self.client.get(url, data={"file": "../test_user_2/x.tar"})
+            self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_file_serving_backend_misconfigured(self):
+        """Tests misconfigured files serving backends are refused."""
+        with self.settings(FILES_SERVING_BACKEND="x-accel"):
+            with self.assertRaises(ImproperlyConfigured):
+                get_file_serving_backend()
+            # management commands only report misconfiguration
+            self.assertEqual(
+                [warning.id for warning in check_file_serving_backend(None)],
+                ["api.W001"],
+            )
+        self.assertEqual(check_file_serving_backend(None), [])
+
+        with self.settings(
+            FILES_SERVING_BACKEND="signed-url",
+            FILES_SERVING_SIGNED_URL_BASE="https://files.example.com/media/",
+            FILES_SERVING_SIGNED_URL_SECRET="",
+        ):
+            with self.assertRaises(ImproperlyConfigured):
+                get_file_serving_backend()
+
     def test_file_delete(self):
         """Tests delete file."""
         media_root = os.path.join(
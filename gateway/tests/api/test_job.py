@@ -31,12 +31,63 @@ class TestJobApi(APITestCase):
         jobs_response = self.client.get(reverse("v1:jobs-list"), format="json")
         self.assertEqual(jobs_response.status_code, status.HTTP_200_OK)
         self.assertEqual(jobs_response.data.get("count"), 2)
-        self.assertEqual(
-            jobs_response.data.get("results")[0].get("status"), "SUCCEEDED"
+        # jobs created at the same time are ordered by id
+        job = jobs_response.data.get("results")[1]
+        self.assertEqual(job.get("id"), "1a7947f9-6ae8-4e3d-ac1e-e7d608deec82")
+        self.assertEqual(job.get("status"), "SUCCEEDED")
+        self.assertNotIn("result", job)
+        self.assertEqual(job.get("program").get("title"), "Program")
+
+    def test_job_list_fields(self):
+        """Tests job list with sparse fieldset."""
+        self._authorize()
+
+        jobs_response = self.client.get(
+            reverse("v1:jobs-list"), {"fields": "id,status,result"}, format="json"
         )
-        self.assertEqual(
-            jobs_response.data.get("results")[0].get("result"), '{"somekey":1}'
+        self.assertEqual(jobs_response.status_code, status.HTTP_200_OK)
+        job = jobs_response.data.get("results")[0]
+        self.assertEqual(sorted(job), ["id", "result", "status"])
+        self.assertEqual(job.get("result"), '{"somekey":1}')
+
+        jobs_response = self.client.get(
+            reverse("v1:jobs-list"), {"fields": "id,logs"}, format="json"
+        )
+        self.assertEqual(jobs_response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_job_list_cursor(self):
+        """Tests job list with cursor pagination."""
+        self._authorize()
+        user = models.User.objects.get(username="test_user")
+        first = Job.objects.create(author=user, status=Job.QUEUED)
+        second = Job.objects.create(author=user, status=Job.QUEUED)
+        # jobs with equal created time are ordered by id
+        Job.objects.filter(id__in=[first.id, second.id]).update(created=first.created)
+        expected = [
+            str(job_id)
+            for job_id in Job.objects.filter(author=user)
+            .order_by("-created", "-id")
+            .values_list("id", flat=True)
+        ]
+
+        listed = []
+        jobs_response = self.client.get(
+            reverse("v1:jobs-list"), {"cursor": "", "limit": 1}, format="json"
         )
+        listed.extend(job["id"] for job in jobs_response.data["results"])
+        # jobs created while listing do not shift pages
+        Job.objects.create(author=user, status=Job.QUEUED)
+        while jobs_response.data["next"]:
+            self.assertNotIn("count", jobs_response.data)
+            jobs_response = self.client.get(jobs_response.data["next"], format="json")
+            self.assertEqual(jobs_response.status_code, status.HTTP_200_OK)
+            listed.extend(job["id"] for job in jobs_response.data["results"])
+        self.assertEqual(listed, expected)
+
+        jobs_response = self.client.get(
+            reverse("v1:jobs-list"), {"cursor": "invalid"}, format="json"
+        )
+        self.assertEqual(jobs_response.status_code, status.HTTP_404_NOT_FOUND)
 
     def test_job_detail(self):
         """Tests job detail authorized."""
@@ -90,3 +141,137 @@ class TestJobApi(APITestCase):
         ).first()
         self.assertEqual(job.status, Job.STOPPED)
         self.assertEqual(job_stop_response.data.get("message"), "Job has been stopped.")
+
+    def test_job_logs(self):
+        """Tests job logs full and range reads."""
+        self._authorize()
+        job = Job.objects.get(id="1a7947f9-6ae8-4e3d-ac1e-e7d608deec82")
+        url = reverse("v1:jobs-logs", args=[str(job.id)])
+
+        logs_response = self.client.get(url, format="json")
+        self.assertEqual(logs_response.status_code, status.HTTP_200_OK)
+        self.assertEqual(logs_response.data.get("logs"), "No logs yet.")
+
+        job.append_logs("first line\n")
+        job.append_logs("second line\n")
+
+        logs_response = self.client.get(url, format="json")
+        self.assertEqual(logs_response.data.get("logs"), "first line\nsecond line\n")
+
+        logs_response = self.client.get(url, {"offset": 6, "limit": 10}, format="json")
+        self.assertEqual(logs_response.status_code, status.HTTP_200_OK)
+        self.assertEqual(logs_response.data.get("logs"), "line\nsecon")
+        self.assertEqual(logs_response.data.get("offset"), 6)
+        self.assertEqual(logs_response.data.get("next_offset"), 16)
+
+        logs_response = self.client.get(url, {"offset": 16}, format="json")
+        self.assertEqual(logs_response.data.get("logs"), "d line\n")
+        self.assertEqual(logs_response.data.get("next_offset"), 23)
+
+        logs_response = self.client.get(url, {"offset": "abc"}, format="json")
+        self.assertEqual(logs_response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_job_stream_logs(self):
+        """Tests job logs are streamed as server-sent events."""
+        self._authorize()
+        job = Job.objects.get(id="1a7947f9-6ae8-4e3d-ac1e-e7d608deec82")
+        job.append_logs("first line\nsecond line\n")
+        url = reverse("v1:jobs-stream-logs", args=[str(job.id)])
+
+        logs_response = self.client.get(url, HTTP_ACCEPT="text/event-stream")
+        self.assertEqual(logs_response.status_code, status.HTTP_200_OK)
+        self.assertEqual(logs_response["Content-Type"], "text/event-stream")
+        self.assertEqual(
+            b"".join(logs_response.streaming_content).decode(),
+            "event: logs\nid: 23\ndata: first line\ndata: second line\ndata: \n\n"
+            "event: end\ndata: SUCCEEDED\n\n",
+        )
+
+        logs_response = self.client.get(
+            url, {"offset": 11}, HTTP_ACCEPT="text/event-stream"
+        )
+        self.assertEqual(
+            b"".join(logs_response.streaming_content).decode(),
+            "event: logs\nid: 23\ndata: second line\ndata: \n\n"
+            "event: end\ndata: SUCCEEDED\n\n",
+        )
+
+        logs_response = self.client.get(url, HTTP_LAST_EVENT_ID="23")
+        self.assertEqual(
+            b"".join(logs_response.streaming_content).decode(),
+            "event: end\ndata: SUCCEEDED\n\n",
+        )
+
+        logs_response = self.client.get(url, {"offset": -1})
+        self.assertEqual(logs_response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_job_wait(self):
+        """Tests waiting for job terminal state."""
+        self._authorize()
+
+        wait_response = self.client.get(
+            reverse("v1:jobs-wait", args=["1a7947f9-6ae8-4e3d-ac1e-e7d608deec82"]),
+            format="json",
+        )
+        self.assertEqual(wait_response.status_code, status.HTTP_200_OK)
+        self.assertEqual(wait_response.data.get("status"), Job.SUCCEEDED)
+        self.assertTrue(wait_response.data.get("terminal"))
+
+        Job.objects.filter(id="1a7947f9-6ae8-4e3d-ac1e-e7d608deec82").update(
+            status=Job.RUNNING
+        )
+        wait_response = self.client.get(
+            reverse("v1:jobs-wait", args=["1a7947f9-6ae8-4e3d-ac1e-e7d608deec82"]),
+            {"timeout": 0},
+            format="json",
+        )
+        self.assertEqual(wait_response.status_code, status.HTTP_200_OK)
+        self.assertEqual(wait_response.data.get("status"), Job.RUNNING)
+        self.assertFalse(wait_response.data.get("terminal"))
+
+        wait_response = self.client.get(
+            reverse("v1:jobs-wait", args=["1a7947f9-6ae8-4e3d-ac1e-e7d608deec82"]),
+            {"timeout": 3600},
+            format="json",
+        )
+        self.assertEqual(wait_response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_jobs_statuses(self):
+        """Tests statuses of multiple jobs are returned at once."""
+        self._authorize()
+
+        statuses_response = self.client.post(
+            reverse("v1:jobs-statuses"),
+            format="json",
+            data={
+                "ids": [
+                    "1a7947f9-6ae8-4e3d-ac1e-e7d608deec82",
+                    "1a7947f9-6ae8-4e3d-ac1e-e7d608deec83",
+                    # job of other user is not returned
+                    "1a7947f9-6ae8-4e3d-ac1e-e7d608deec84",
+                ],
+                "result": True,
+            },
+        )
+        self.assertEqual(statuses_response.status_code, status.HTTP_200_OK)
+        jobs = {job["id"]: job for job in statuses_response.data.get("jobs")}
+        self.assertEqual(
+            jobs,
+            {
+                "1a7947f9-6ae8-4e3d-ac1e-e7d608deec82": {
+                    "id": "1a7947f9-6ae8-4e3d-ac1e-e7d608deec82",
+                    "status": Job.SUCCEEDED,
+                    "result": '{"somekey":1}',
+                },
+                "1a7947f9-6ae8-4e3d-ac1e-e7d608deec83": {
+                    "id": "1a7947f9-6ae8-4e3d-ac1e-e7d608deec83",
+                    "status": Job.QUEUED,
+                    "result": '{"somekey":1}',
+                },
+            },
+        )
+
+        statuses_response = self.client.post(
+            reverse("v1:jobs-statuses"), format="json", data={"ids": ["not-uuid"]}
+        )
+        self.assertEqual(statuses_response.status_code, status.HTTP_400_BAD_REQUEST)
@@ -0,0 +1,96 @@
+"""Benchmark of job list queries and serialization.
+
+Counts queries and measures time of listing a page of jobs with
+default, full and sparse fieldsets:
+
+    python manage.py test tests.api.test_job_list_benchmark
+"""
+
+import logging
+import time
+
+from django.contrib.auth import models
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from rest_framework.test import APITestCase
+
+from api.models import Job, Program, Provider
+
+logger = logging.getLogger("gateway")
+
+PAGE_SIZE = 100
+RESULT_SIZE = 100_000
+
+
+class TestJobListBenchmark(APITestCase):
+    """Benchmark of job list queries and serialization."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = models.User.objects.create(username="benchmark_user")
+        provider = Provider.objects.create(name="benchmark-provider")
+        programs = Program.objects.bulk_create(
+            [
+                Program(title=f"program-{i}", author=cls.user, provider=provider)
+                for i in range(PAGE_SIZE)
+            ]
+        )
+        Job.objects.bulk_create(
+            [
+                Job(
+                    author=cls.user,
+                    program=program,
+                    status=Job.SUCCEEDED,
+                    result="x" * RESULT_SIZE,
+                )
+                for program in programs
+            ]
+        )
+
+    def _list_page(self, limit: int, fields=None):
+        """Returns number of queries, seconds and response of listed page."""
+        params = {"limit": limit}
+        if fields is not None:
+            params["fields"] = fields
+        with CaptureQueriesContext(connection) as queries:
+            start = time.perf_counter()
+            response = self.client.get(reverse("v1:jobs-list"), params, format="json")
+            elapsed = time.perf_counter() - start
+        self.assertEqual(response.status_code, 200)
+        return len(queries), elapsed, response
+
+    def test_job_list_queries_do_not_grow_with_page(self):
+        """Tests number of queries of job list does not depend on page size."""
+        self.client.force_authenticate(user=self.user)
+
+        for fields in [None, "id,status,program,created,result", "id,status"]:
+            small_page_queries, _, _ = self._list_page(1, fields)
+            queries, elapsed, response = self._list_page(PAGE_SIZE, fields)
+            self.assertEqual(queries, small_page_queries)
+            self.assertEqual(len(response.data["results"]), PAGE_SIZE)
+            logger.info(
+                "Job list page of [%s] jobs with fields [%s]: "
+                "[%s] queries, [%.2f] ms, [%s] bytes",
+                PAGE_SIZE,
+                fields or "default",
+                queries,
+                elapsed * 1000,
+                len(response.content),
+            )
+
+    def test_job_list_result_is_not_loaded_by_default(self):
+        """Tests result column is not read for default job list."""
+        self.client.force_authenticate(user=self.user)
+
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(
+                reverse("v1:jobs-list"), {"limit": PAGE_SIZE}, format="json"
+            )
+        self.assertNotIn("result", response.data["results"][0])
+        job_queries = [
+            query["sql"] for query in queries if 'FROM "api_job"' in query["sql"]
+        ]
+        self.assertTrue(job_queries)
+        for sql in job_queries:
+            self.assertNotIn('"api_job"."result"', sql)
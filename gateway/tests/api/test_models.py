@@ -1,7 +1,11 @@
 """Tests for models."""
 
+from unittest.mock import patch
+
 from rest_framework.test import APITestCase
 
+from django.contrib.auth.models import User
+
 from api.models import Job
 
 
@@ -25,3 +29,50 @@ class TestModels(APITestCase):
 
         job.status = Job.SUCCEEDED
         self.assertTrue(job.in_terminal_state())
+
+    def test_job_logs_chunks(self):
+        """Tests job logs are stored in chunks and old chunks are removed."""
+        user = User.objects.create_user(username="logs_user")
+        job = Job.objects.create(author=user)
+        self.assertEqual(job.logs, "No logs yet.")
+
+        job.append_logs("first\n")
+        job.append_logs("")
+        job.append_logs("second\n")
+        self.assertEqual(job.logs, "first\nsecond\n")
+        self.assertEqual(job.log_chunks.count(), 2)
+        self.assertEqual(job.read_logs(offset=3, limit=5), ("st\nse", 3))
+
+        with self.settings(JOB_LOGS_MAX_SIZE=10):
+            job.append_logs("third\n")
+        self.assertEqual(job.logs, "second\nthird\n")
+        # removed logs are skipped in range reads
+        self.assertEqual(job.read_logs(offset=0), ("second\nthird\n", 6))
+
+    def test_job_logs_read_after_truncation(self):
+        """Tests paging logs from removed offset starts at retained logs."""
+        user = User.objects.create_user(username="logs_user")
+        job = Job.objects.create(author=user)
+        with self.settings(JOB_LOGS_MAX_SIZE=10):
+            for line in ["first\n", "second\n", "third\n"]:
+                job.append_logs(line)
+
+        self.assertEqual(job.read_logs(offset=0, limit=4), ("seco", 6))
+        self.assertEqual(job.read_logs(offset=10, limit=4), ("nd\nt", 10))
+
+    def test_job_logs_concurrent_append(self):
+        """Tests append retries when concurrent append took its sequence."""
+        user = User.objects.create_user(username="logs_user")
+        job = Job.objects.create(author=user)
+        job.append_logs("first\n")
+        stale_position = job._next_log_position()  # pylint: disable=protected-access
+        # append of other process happens after position was read
+        job.append_logs("second\n")
+
+        with patch.object(
+            Job,
+            "_next_log_position",
+            side_effect=[stale_position, (2, 13)],
+        ):
+            job.append_logs("third\n")
+        self.assertEqual(job.logs, "first\nsecond\nthird\n")
@@ -140,3 +140,54 @@ class ProxiesTest(APITestCase):
         permissions = proxy.get_group_permissions()
         permissions_list = list(permissions)
         self.assertListEqual(permissions_list, ["api.view_program"])
+
+    @patch.object(QuantumUserProxy, "_get_network")
+    def test_groups_sync_applies_difference(self, get_network_mock: MagicMock):
+        """Tests only changed group memberships are written."""
+        get_network_mock.return_value = self.network_configuration
+        proxy = QuantumUserProxy.objects.get(username="test_user_3")
+        manual_group = Group.objects.create(name="manual")
+        proxy.groups.add(manual_group)
+        proxy.update_groups("")
+
+        get_network_mock.return_value = self.network_configuration_without_project
+        ibm_q = Group.objects.get(name="ibm-q")
+        proxy.update_groups("")
+
+        self.assertListEqual(
+            sorted(proxy.groups.values_list("name", flat=True)),
+            ["ibm-q", "ibm-q/open"],
+        )
+        # membership of unchanged group is kept
+        self.assertTrue(
+            proxy.groups.through.objects.filter(
+                user_id=proxy.pk, group_id=ibm_q.id
+            ).exists()
+        )
+        self.assertTrue(Group.objects.filter(name="ibm-q/open/main").exists())
+        self.assertListEqual(
+            list(ibm_q.permissions.values_list("codename", flat=True)),
+            [VIEW_PROGRAM_PERMISSION],
+        )
+
+    @patch.object(QuantumUserProxy, "_get_network")
+    def test_groups_sync_skipped_when_unchanged(self, get_network_mock: MagicMock):
+        """Tests groups are not synchronized if instances did not change."""
+        get_network_mock.return_value = self.network_configuration
+        proxy = QuantumUserProxy.objects.get(username="test_user_3")
+        proxy.update_groups("")
+
+        with patch.object(QuantumUserProxy, "_sync_groups") as sync_groups:
+            with self.assertNumQueries(1):
+                proxy.update_groups("")
+            sync_groups.assert_not_called()
+
+            with self.settings(SETTINGS_GROUPS_SYNC_INTERVAL=0):
+                proxy.update_groups("")
+            sync_groups.assert_called_once_with(
+                ["ibm-q", "ibm-q/open", "ibm-q/open/main"]
+            )
+
+            get_network_mock.return_value = self.network_configuration_without_project
+            proxy.update_groups("")
+            self.assertEqual(sync_groups.call_count, 2)
@@ -0,0 +1,80 @@
+"""Tests for job status notifications."""
+
+import threading
+from unittest.mock import patch
+
+from rest_framework.test import APITestCase
+
+from api.models import Job
+from api.notifications import (
+    JOB_LOGS_CHANNEL,
+    JOB_STATUS_CHANNEL,
+    JobNotificationListener,
+    release_database_connection,
+    wait_for_job_terminal_state,
+)
+
+
+class TestNotifications(APITestCase):
+    """Tests for job status notifications."""
+
+    fixtures = ["tests/fixtures/fixtures.json"]
+
+    def test_listener_wakes_up_waiters(self):
+        """Tests waiters of notified job are woken up."""
+        listener = JobNotificationListener()
+        timer = threading.Timer(
+            0.1, listener._wake_up, args=[JOB_STATUS_CHANNEL, "job-1"]
+        )
+        timer.start()
+        self.assertTrue(listener.wait("job-1", timeout=5))
+        self.assertFalse(listener.wait("job-2", timeout=0.1))
+        timer.join()
+
+    def test_listener_wakes_up_waiters_of_channel(self):
+        """Tests waiters are woken up only by notifications of their channels."""
+        listener = JobNotificationListener()
+        timer = threading.Timer(
+            0.1, listener._wake_up, args=[JOB_LOGS_CHANNEL, "job-1"]
+        )
+        timer.start()
+        self.assertFalse(listener.wait("job-1", timeout=0.3))
+        timer.join()
+
+        timer = threading.Timer(
+            0.1, listener._wake_up, args=[JOB_LOGS_CHANNEL, "job-1"]
+        )
+        timer.start()
+        self.assertTrue(
+            listener.wait(
+                "job-1", timeout=5, channels=(JOB_STATUS_CHANNEL, JOB_LOGS_CHANNEL)
+            )
+        )
+        timer.join()
+
+    def test_wait_for_job_terminal_state(self):
+        """Tests waiting rechecks job status until it is terminal."""
+        job = Job.objects.get(id="1a7947f9-6ae8-4e3d-ac1e-e7d608deec82")
+        Job.objects.filter(id=job.id).update(status=Job.RUNNING)
+
+        with self.settings(JOB_WAIT_POLL_INTERVAL=0.1):
+            self.assertEqual(wait_for_job_terminal_state(job, timeout=0.2), Job.RUNNING)
+            Job.objects.filter(id=job.id).update(status=Job.FAILED)
+            self.assertEqual(wait_for_job_terminal_state(job, timeout=5), Job.FAILED)
+
+    @patch("api.notifications.connection")
+    def test_release_database_connection(self, connection):
+        """Tests connection is released only by gevent workers outside of transaction."""
+        connection.in_atomic_block = False
+        with patch("api.notifications._cooperative_worker", return_value=False):
+            release_database_connection()
+        connection.close.assert_not_called()
+
+        with patch("api.notifications._cooperative_worker", return_value=True):
+            connection.in_atomic_block = True
+            release_database_connection()
+            connection.close.assert_not_called()
+
+            connection.in_atomic_block = False
+            release_database_connection()
+            connection.close.assert_called_once()
@@ -0,0 +1,124 @@
+"""Query plan regression tests for job hot paths.
+
+Tests are run only against postgres, as query plans of other databases
+do not reflect production ones:
+
+    TEST_WITH_POSTGRES=1 python manage.py test tests.api.test_query_plans
+"""
+
+import json
+import uuid
+from unittest import skipUnless
+from unittest.mock import MagicMock, patch
+
+from django.contrib.auth import models
+from django.core.management import call_command
+from django.db import connection, transaction
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from ray.dashboard.modules.job.common import JobStatus
+from rest_framework.test import APITestCase
+
+from api.models import ComputeResource, Job
+from api.ray import JobHandler
+from api.schedule import get_jobs_to_schedule_fair_share
+
+NUMBER_OF_USERS = 200
+JOBS_PER_USER = 100
+
+
+def find_sequential_scans(plan, table: str):
+    """Returns sequential scan nodes of table in query plan."""
+    scans = []
+    if plan.get("Node Type") == "Seq Scan" and plan.get("Relation Name") == table:
+        scans.append(plan)
+    for subplan in plan.get("Plans", []):
+        scans.extend(find_sequential_scans(subplan, table))
+    return scans
+
+
+@skipUnless(connection.vendor == "postgresql", "query plans are checked on postgres")
+class TestJobQueryPlans(APITestCase):
+    """Checks job queries of scheduler and api use indexes."""
+
+    @classmethod
+    def setUpTestData(cls):
+        users = models.User.objects.bulk_create(
+            [models.User(username=f"plan_user_{i}") for i in range(NUMBER_OF_USERS)]
+        )
+        compute_resources = ComputeResource.objects.bulk_create(
+            [
+                ComputeResource(title=f"cluster-{i}", host=f"cluster-{i}", owner=user)
+                for i, user in enumerate(users)
+            ]
+        )
+        jobs = []
+        for user, compute_resource in zip(users, compute_resources):
+            for i in range(JOBS_PER_USER):
+                # most of jobs are finished, as in production
+                job_status = Job.SUCCEEDED
+                if i == JOBS_PER_USER - 1:
+                    job_status = Job.RUNNING
+                elif i == JOBS_PER_USER - 2:
+                    job_status = Job.QUEUED
+                jobs.append(
+                    Job(
+                        id=uuid.uuid4(),
+                        author=user,
+                        status=job_status,
+                        compute_resource=compute_resource,
+                    )
+                )
+        Job.objects.bulk_create(jobs, batch_size=5000)
+        cls.user = users[0]
+        with connection.cursor() as cursor:
+            cursor.execute("ANALYZE api_job;")
+
+    def assert_no_sequential_scans(self, queries_context):
+        """Explains captured job queries and checks they do not scan job table."""
+        job_queries = [
+            query["sql"]
+            for query in queries_context.captured_queries
+            if query["sql"].startswith("SELECT") and '"api_job"' in query["sql"]
+        ]
+        self.assertTrue(job_queries)
+        for sql in job_queries:
+            with connection.cursor() as cursor:
+                cursor.execute(f"EXPLAIN (FORMAT JSON) {sql}")
+                plan = cursor.fetchone()[0]
+            if isinstance(plan, str):
+                plan = json.loads(plan)
+            scans = find_sequential_scans(plan[0]["Plan"], "api_job")
+            self.assertEqual(scans, [], f"Sequential scan of api_job in: {sql}")
+
+    def test_fair_share_query(self):
+        """Tests fair share scheduling query."""
+        with CaptureQueriesContext(connection) as queries:
+            with transaction.atomic():
+                get_jobs_to_schedule_fair_share(slots=10)
+        self.assert_no_sequential_scans(queries)
+
+    @patch("api.management.commands.update_jobs_statuses.get_job_handler")
+    def test_update_jobs_statuses_query(self, get_job_handler):
+        """Tests query of running jobs."""
+        ray_client = MagicMock()
+        ray_client.get_job_status.return_value = JobStatus.RUNNING
+        ray_client.get_job_logs.return_value = ""
+        get_job_handler.return_value = JobHandler(ray_client)
+        with CaptureQueriesContext(connection) as queries:
+            call_command("update_jobs_statuses")
+        self.assert_no_sequential_scans(queries)
+
+    def test_free_resources_query(self):
+        """Tests query of running jobs of compute resources."""
+        with CaptureQueriesContext(connection) as queries:
+            call_command("free_resources")
+        self.assert_no_sequential_scans(queries)
+
+    def test_jobs_list_query(self):
+        """Tests jobs list of user."""
+        self.client.force_authenticate(user=self.user)
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(reverse("v1:jobs-list"), format="json")
+        self.assertEqual(response.status_code, 200)
+        self.assert_no_sequential_scans(queries)
@@ -3,7 +3,7 @@
 import json
 import os
 import shutil
-from unittest.mock import MagicMock
+from unittest.mock import MagicMock, patch
 
 import requests_mock
 from django.conf import settings
@@ -15,9 +15,13 @@ from rest_framework.test import APITestCase
 
 from api.models import ComputeResource, Job
 from api.ray import (
+    cluster_is_ready,
     create_ray_cluster,
+    get_job_handler,
     kill_ray_cluster,
     JobHandler,
+    JobHandlerCache,
+    job_handler_cache,
 )
 from api.utils import encrypt_string
 
@@ -54,17 +58,24 @@ class TestRayUtils(APITestCase):
         head_node_url = "http://test_user-head-svc:8265/"
         job = Job.objects.first()
         with requests_mock.Mocker() as mocker:
-            mocker.get(head_node_url, status_code=200)
             compute_resource = create_ray_cluster(
                 job, "test_user", "dummy yaml file contents"
             )
+            # cluster readiness is not waited for
+            self.assertEqual(mocker.call_count, 0)
             self.assertIsInstance(compute_resource, ComputeResource)
             self.assertEqual(job.author.username, compute_resource.title)
             self.assertEqual(compute_resource.host, head_node_url)
+            self.assertEqual(compute_resource.status, ComputeResource.PROVISIONING)
             DynamicClient.resources.get.assert_called_once_with(
                 api_version="v1", kind="RayCluster"
             )
 
+            mocker.get(head_node_url, status_code=503)
+            self.assertFalse(cluster_is_ready(head_node_url))
+            mocker.get(head_node_url, status_code=200)
+            self.assertTrue(cluster_is_ready(head_node_url))
+
     def test_kill_cluster(self):
         """Tests cluster deletion."""
         namespace = settings.RAY_KUBERAY_NAMESPACE
@@ -135,3 +146,72 @@ class TestJobHandler(APITestCase):
         )
         job_id = self.handler.submit(job)
         self.assertEqual(job_id, "AwesomeJobId")
+
+        # packaged artifact is submitted instead of extracted directory
+        runtime_env = self.handler.client.submit_job.call_args.kwargs["runtime_env"]
+        working_dir = runtime_env["working_dir"]
+        self.assertTrue(working_dir.endswith(".zip"))
+        self.assertTrue(os.path.exists(working_dir))
+
+
+class TestJobHandlerCache(APITestCase):
+    """Tests job handler cache."""
+
+    def setUp(self) -> None:
+        job_handler_cache.clear()
+
+    def tearDown(self) -> None:
+        job_handler_cache.clear()
+
+    @patch("api.ray.JobSubmissionClient")
+    def test_get_job_handler_reuses_handler(self, submission_client):
+        """Tests job handler is created once per host."""
+        handler = get_job_handler("http://cached-head-svc:8265/")
+        same_handler = get_job_handler("http://cached-head-svc:8265/")
+        other_handler = get_job_handler("http://other-head-svc:8265/")
+
+        self.assertIs(handler, same_handler)
+        self.assertIsNot(handler, other_handler)
+        self.assertEqual(submission_client.call_count, 2)
+
+    @patch("api.ray.retry_function", return_value=None)
+    def test_get_job_handler_deadline(self, retry):
+        """Tests job handler setup uses its own short deadline."""
+        with patch("api.ray.settings.RAY_JOB_HANDLER_SETUP_DEADLINE", 5):
+            self.assertIsNone(get_job_handler("http://dead-head-svc:8265/"))
+        self.assertEqual(retry.call_args.kwargs["deadline"], 5)
+
+    @patch("api.ray.JobSubmissionClient")
+    def test_kill_cluster_invalidates_handler(self, submission_client):
+        """Tests killed cluster handler is removed from cache."""
+        config.load_incluster_config = MagicMock()
+        client.api_client.ApiClient = MagicMock()
+        DynamicClient.__init__ = lambda x, y: None
+        DynamicClient.resources = MagicMock()
+        DynamicClient.resources.get = MagicMock(return_value=mock_delete())
+        client.CoreV1Api = MagicMock()
+
+        get_job_handler("http://killed-head-svc:8265/")
+        kill_ray_cluster("killed")
+        get_job_handler("http://killed-head-svc:8265/")
+
+        self.assertEqual(submission_client.call_count, 2)
+
+    def test_idle_ttl_eviction(self):
+        """Tests handlers are evicted after idle ttl."""
+        cache = JobHandlerCache(ttl=10)
+        handler = JobHandler(MagicMock())
+        with patch("api.ray.time.monotonic", return_value=100):
+            cache.put("host", handler)
+        with patch("api.ray.time.monotonic", return_value=105):
+            self.assertIs(cache.get("host"), handler)
+        with patch("api.ray.time.monotonic", return_value=114):
+            self.assertIs(cache.get("host"), handler)
+        with patch("api.ray.time.monotonic", return_value=125):
+            self.assertIsNone(cache.get("host"))
+
+    def test_disabled_cache(self):
+        """Tests zero ttl disables caching."""
+        cache = JobHandlerCache(ttl=0)
+        cache.put("host", JobHandler(MagicMock()))
+        self.assertIsNone(cache.get("host"))
@@ -1,12 +1,21 @@
 """Tests scheduling."""
 
+from datetime import timedelta
 from unittest.mock import MagicMock, patch
 
 from django.contrib.auth import get_user_model
+from django.utils import timezone
 from rest_framework.test import APITestCase
 
-from api.models import Job
-from api.schedule import get_jobs_to_schedule_fair_share, execute_job
+from api.models import ComputeResource, Job
+from api.schedule import (
+    claim_jobs,
+    evict_idle_compute_resources,
+    get_jobs_to_schedule_fair_share,
+    execute_job,
+    release_stale_job_claims,
+    update_provisioning_jobs,
+)
 
 
 class TestScheduleApi(APITestCase):
@@ -29,6 +38,22 @@ class TestScheduleApi(APITestCase):
         self.assertTrue("1a7947f9-6ae8-4e3d-ac1e-e7d608deec90" in job_ids)
         self.assertTrue("1a7947f9-6ae8-4e3d-ac1e-e7d608deec82" in job_ids)
 
+        # with fewer slots than users, jobs queued earlier are taken first
+        jobs = get_jobs_to_schedule_fair_share(1)
+        self.assertEqual(
+            [str(job.id) for job in jobs], ["1a7947f9-6ae8-4e3d-ac1e-e7d608deec82"]
+        )
+
+        # users at running jobs limit are skipped
+        Job.objects.filter(id="1a7947f9-6ae8-4e3d-ac1e-e7d608deec91").update(
+            status=Job.RUNNING
+        )
+        Job.objects.create(author_id=4, status=Job.PENDING)
+        jobs = get_jobs_to_schedule_fair_share(5)
+        self.assertEqual(
+            [str(job.id) for job in jobs], ["1a7947f9-6ae8-4e3d-ac1e-e7d608deec82"]
+        )
+
     @patch("api.ray.get_job_handler")
     def test_already_created_ray_cluster_execute_job(self, mock_handler):
         """Tests should not create new resource and reuse what user already have."""
@@ -40,3 +65,139 @@ class TestScheduleApi(APITestCase):
             str(ret_job.compute_resource.id), "1a7947f9-6ae8-4e3d-ac1e-e7d608deec99"
         )
         self.assertEqual(ret_job.status, Job.PENDING)
+
+    @patch("api.schedule.create_ray_cluster")
+    def test_execute_job_provisioning_cluster(self, create_ray_cluster):
+        """Tests job waits for new cluster instead of blocking scheduler."""
+        user = get_user_model().objects.get(username="test4_user")
+        compute_resource = ComputeResource.objects.create(
+            title="test4-cluster",
+            host="http://test4-cluster-head-svc:8265/",
+            owner=user,
+            status=ComputeResource.PROVISIONING,
+        )
+        create_ray_cluster.return_value = compute_resource
+        job = Job.objects.create(author=user, status=Job.QUEUED)
+
+        job = execute_job(job)
+        self.assertEqual(job.status, Job.PROVISIONING)
+        self.assertEqual(job.compute_resource, compute_resource)
+        self.assertIsNone(job.ray_job_id)
+
+        # next job of user waits for the same cluster
+        create_ray_cluster.reset_mock()
+        other_job = execute_job(Job.objects.create(author=user, status=Job.QUEUED))
+        self.assertEqual(other_job.status, Job.PROVISIONING)
+        self.assertEqual(other_job.compute_resource, compute_resource)
+        create_ray_cluster.assert_not_called()
+
+    @patch("api.ray.get_job_handler")
+    @patch("api.schedule.cluster_is_ready")
+    def test_update_provisioning_jobs(self, cluster_is_ready, get_job_handler):
+        """Tests jobs are submitted once cluster is ready."""
+        get_job_handler.return_value.submit.return_value = "ray-job-id"
+        user = get_user_model().objects.get(username="test4_user")
+        compute_resource = ComputeResource.objects.create(
+            title="test4-cluster",
+            host="http://test4-cluster-head-svc:8265/",
+            owner=user,
+            status=ComputeResource.PROVISIONING,
+        )
+        job = Job.objects.create(
+            author=user, status=Job.PROVISIONING, compute_resource=compute_resource
+        )
+
+        cluster_is_ready.return_value = False
+        self.assertEqual(update_provisioning_jobs(), [])
+        cluster_is_ready.assert_called_once_with(compute_resource.host)
+
+        cluster_is_ready.return_value = True
+        jobs = update_provisioning_jobs()
+        self.assertEqual([updated_job.id for updated_job in jobs], [job.id])
+        self.assertEqual(jobs[0].status, Job.PENDING)
+        self.assertEqual(jobs[0].ray_job_id, "ray-job-id")
+        compute_resource.refresh_from_db()
+        self.assertEqual(compute_resource.status, ComputeResource.READY)
+
+    def test_release_stale_job_claims(self):
+        """Tests claimed jobs which were not executed in time are queued again."""
+        stale, recent = list(Job.objects.filter(status=Job.QUEUED)[:2])
+        claim_jobs([stale, recent])
+        self.assertEqual(stale.status, Job.PROVISIONING)
+        Job.objects.filter(id=stale.id).update(
+            updated=timezone.now() - timedelta(hours=1)
+        )
+
+        self.assertEqual(release_stale_job_claims(), 1)
+        self.assertEqual(Job.objects.get(id=stale.id).status, Job.QUEUED)
+        self.assertEqual(Job.objects.get(id=recent.id).status, Job.PROVISIONING)
+
+    @patch("api.schedule.kill_ray_cluster")
+    @patch("api.schedule.cluster_is_ready")
+    def test_update_provisioning_jobs_timeout(self, cluster_is_ready, kill_ray_cluster):
+        """Tests jobs fail if cluster is not ready in time."""
+        cluster_is_ready.return_value = False
+        user = get_user_model().objects.get(username="test4_user")
+        compute_resource = ComputeResource.objects.create(
+            title="test4-cluster",
+            host="http://test4-cluster-head-svc:8265/",
+            owner=user,
+            status=ComputeResource.PROVISIONING,
+        )
+        ComputeResource.objects.filter(id=compute_resource.id).update(
+            created=timezone.now() - timedelta(hours=1)
+        )
+        for _ in range(2):
+            Job.objects.create(
+                author=user, status=Job.PROVISIONING, compute_resource=compute_resource
+            )
+
+        jobs = update_provisioning_jobs()
+        self.assertEqual(len(jobs), 2)
+        for job in jobs:
+            self.assertEqual(job.status, Job.FAILED)
+            self.assertIsNone(job.compute_resource)
+        kill_ray_cluster.assert_called_once_with("test4-cluster")
+        self.assertFalse(
+            ComputeResource.objects.filter(id=compute_resource.id).exists()
+        )
+
+    @patch("api.schedule.kill_ray_cluster")
+    def test_evict_idle_compute_resources(self, kill_ray_cluster):
+        """Tests least recently used idle clusters are evicted for queued jobs."""
+        users = get_user_model().objects
+        now = timezone.now()
+        least_recently_used = ComputeResource.objects.create(
+            title="test2-cluster",
+            host="test2-cluster",
+            owner=users.get(username="test2_user"),
+            last_used=now - timedelta(minutes=10),
+        )
+        recently_used = ComputeResource.objects.create(
+            title="test5-cluster",
+            host="test5-cluster",
+            owner=users.create(username="test5_user"),
+            last_used=now - timedelta(minutes=5),
+        )
+        # user has queued jobs, so idle cluster is going to be reused
+        reused = ComputeResource.objects.create(
+            title="test4-cluster",
+            host="test4-cluster",
+            owner=users.get(username="test4_user"),
+            last_used=now - timedelta(hours=1),
+        )
+
+        # free slot is available for queued jobs of test_user
+        with self.settings(LIMITS_MAX_CLUSTERS=5):
+            self.assertEqual(evict_idle_compute_resources(), 0)
+
+        with self.settings(LIMITS_MAX_CLUSTERS=4):
+            self.assertEqual(evict_idle_compute_resources(), 1)
+        kill_ray_cluster.assert_called_once_with("test2-cluster")
+        for compute_resource, active in [
+            (least_recently_used, False),
+            (recently_used, True),
+            (reused, True),
+        ]:
+            compute_resource.refresh_from_db()
+            self.assertEqual(compute_resource.active, active)
@@ -1,6 +1,6 @@
 """Tests for utilities."""
 
-from unittest.mock import MagicMock
+from unittest.mock import MagicMock, patch
 
 from rest_framework.test import APITestCase
 
@@ -11,7 +11,9 @@ from api.utils import (
     encrypt_env_vars,
     decrypt_env_vars,
     check_logs,
+    parse_range_header,
     remove_duplicates_from_list,
+    retry_function,
 )
 
 
@@ -101,3 +103,55 @@ class TestUtils(APITestCase):
         self.assertListEqual(
             test_list, remove_duplicates_from_list(list_with_duplicates)
         )
+
+    def test_parse_range_header(self):
+        """Tests parsing of byte ranges."""
+        self.assertEqual(parse_range_header("bytes=0-9", 100), (0, 9))
+        self.assertEqual(parse_range_header("bytes=90-", 100), (90, 99))
+        self.assertEqual(parse_range_header("bytes=90-200", 100), (90, 99))
+        self.assertEqual(parse_range_header("bytes=-10", 100), (90, 99))
+        self.assertEqual(parse_range_header("bytes=-200", 100), (0, 99))
+        self.assertIsNone(parse_range_header(None, 100))
+        self.assertIsNone(parse_range_header("bytes=9-0", 100))
+        self.assertIsNone(parse_range_header("bytes=0-9,20-29", 100))
+        self.assertIsNone(parse_range_header("items=0-9", 100))
+        with self.assertRaises(ValueError):
+            parse_range_header("bytes=100-", 100)
+        with self.assertRaises(ValueError):
+            parse_range_header("bytes=-10", 0)
+
+    @patch("api.utils.time.sleep")
+    def test_retry_function_no_sleep_after_success(self, sleep):
+        """Tests successful call returns without waiting."""
+        callback = MagicMock(return_value=42)
+        self.assertEqual(retry_function(callback=callback), 42)
+        callback.assert_called_once()
+        sleep.assert_not_called()
+
+    @patch("api.utils.random.uniform", side_effect=lambda low, high: high)
+    @patch("api.utils.time.sleep")
+    def test_retry_function_backoff(self, sleep, _uniform):
+        """Tests exponential backoff between failed tries."""
+        callback = MagicMock(side_effect=[RuntimeError(), RuntimeError(), 42])
+        result = retry_function(callback=callback, num_retries=5, interval=1, backoff=2)
+        self.assertEqual(result, 42)
+        self.assertEqual([c.args[0] for c in sleep.call_args_list], [1, 2])
+
+        sleep.reset_mock()
+        callback = MagicMock(side_effect=RuntimeError())
+        result = retry_function(
+            callback=callback, num_retries=5, interval=1, backoff=2, max_interval=3
+        )
+        self.assertIsNone(result)
+        self.assertEqual(callback.call_count, 5)
+        self.assertEqual([c.args[0] for c in sleep.call_args_list], [1, 2, 3, 3])
+
+    @patch("api.utils.time.sleep")
+    def test_retry_function_deadline(self, sleep):
+        """Tests retries stop when deadline is reached."""
+        callback = MagicMock(side_effect=RuntimeError())
+        with patch("api.utils.time.monotonic", side_effect=[0, 0.5, 2]):
+            result = retry_function(callback=callback, num_retries=10, deadline=1)
+        self.assertIsNone(result)
+        self.assertEqual(callback.call_count, 2)
+        self.assertTrue(sleep.call_args.args[0] <= 0.5)
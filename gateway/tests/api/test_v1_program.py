@@ -38,6 +38,30 @@ class TestProgramApi(APITestCase):
             "Program",
         )
 
+    def test_programs_list_cursor(self):
+        """Tests programs list with cursor pagination."""
+        user = models.User.objects.get(username="test_user")
+        self.client.force_authenticate(user=user)
+        Program.objects.create(title="Second program", author=user)
+
+        programs_response = self.client.get(
+            reverse("v1:programs-list"), {"cursor": "", "limit": 1}, format="json"
+        )
+        self.assertEqual(programs_response.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            [program["title"] for program in programs_response.data["results"]],
+            ["Second program"],
+        )
+
+        programs_response = self.client.get(
+            programs_response.data["next"], format="json"
+        )
+        self.assertEqual(
+            [program["title"] for program in programs_response.data["results"]],
+            ["Program"],
+        )
+        self.assertIsNone(programs_response.data["next"])
+
     def test_provider_programs_list(self):
         """Tests programs list authorized."""
 
@@ -0,0 +1,233 @@
+"""Tests warm pool of clusters."""
+
+from unittest.mock import MagicMock, patch
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.template import engines
+from prometheus_client import REGISTRY
+from rest_framework.test import APITestCase
+
+from api.models import ComputeResource, Job, Program
+from api.schedule import execute_job
+from api.warm_pool import assign_warm_cluster, refill_warm_pool
+
+CLUSTER_TEMPLATE = """
+metadata:
+  name: {{ cluster_name }}
+  labels:
+    user: {{ user }}
+image: {{ node_image }}
+"""
+
+STORAGE_CLUSTER_TEMPLATE = (
+    CLUSTER_TEMPLATE
+    + """
+volumeMounts:
+  - mountPath: /data
+    name: user-storage
+    subPath: {{ user_id }}
+"""
+)
+
+
+class FakeRayClusterApi:
+    """Fake kubernetes api of RayCluster resources."""
+
+    def __init__(self):
+        self.clusters = []
+
+    def create(self, body, namespace):  # pylint: disable=unused-argument
+        """Records created cluster."""
+        self.clusters.append(body)
+        response = MagicMock()
+        response.metadata.name = body["metadata"]["name"]
+        return response
+
+
+class FakeDynamicClient:  # pylint: disable=too-few-public-methods
+    """Fake kubernetes dynamic client."""
+
+    def __init__(self):
+        self.ray_clusters = FakeRayClusterApi()
+        self.resources = MagicMock()
+        self.resources.get.return_value = self.ray_clusters
+
+
+@patch("api.warm_pool.cluster_is_ready", MagicMock(return_value=False))
+@patch(
+    "api.ray.get_template",
+    MagicMock(return_value=engines["django"].from_string(CLUSTER_TEMPLATE)),
+)
+class TestWarmPool(APITestCase):
+    """Tests warm pool of clusters."""
+
+    fixtures = ["tests/fixtures/schedule_fixtures.json"]
+
+    def setUp(self):
+        self.dynamic_client = FakeDynamicClient()
+        patcher = patch("api.ray.get_dynamic_client", return_value=self.dynamic_client)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def create_pool_cluster(self, python_version="default", status="READY"):
+        """Creates warm pool compute resource."""
+        return ComputeResource.objects.create(
+            title=f"c-warm-pool-{ComputeResource.objects.count()}",
+            host="http://warm-pool-head-svc:8265/",
+            pool=python_version,
+            status=status,
+        )
+
+    def test_refill_warm_pool(self):
+        """Tests pool is filled up to configured sizes."""
+        sizes = {"default": 2, "py39": 0, "py310": 1}
+        with self.settings(
+            RAY_CLUSTER_WARM_POOL_SIZES=sizes,
+            LIMITS_MAX_CLUSTERS=10,
+        ):
+            self.assertEqual(refill_warm_pool(), 3)
+            # provisioning clusters are counted towards pool size
+            self.assertEqual(refill_warm_pool(), 0)
+
+        clusters = self.dynamic_client.ray_clusters.clusters
+        self.assertEqual(
+            sorted(cluster["image"] for cluster in clusters),
+            sorted(
+                [
+                    settings.RAY_NODE_IMAGES_MAP["default"],
+                    settings.RAY_NODE_IMAGES_MAP["default"],
+                    settings.RAY_NODE_IMAGES_MAP["py310"],
+                ]
+            ),
+        )
+        pool = ComputeResource.objects.filter(pool__isnull=False)
+        self.assertEqual(
+            sorted(pool.values_list("pool", flat=True)), ["default", "default", "py310"]
+        )
+        for compute_resource in pool:
+            self.assertEqual(compute_resource.status, ComputeResource.PROVISIONING)
+            self.assertIsNone(compute_resource.owner)
+
+    def test_refill_warm_pool_respects_limits(self):
+        """Tests pool does not take more clusters than allowed."""
+        active = ComputeResource.objects.filter(active=True).count()
+        with self.settings(
+            RAY_CLUSTER_WARM_POOL_SIZES={"default": 3},
+            LIMITS_MAX_CLUSTERS=active + 1,
+        ):
+            self.assertEqual(refill_warm_pool(), 1)
+
+    @patch("api.warm_pool.kill_ray_cluster")
+    def test_refill_warm_pool_shrinks(self, kill_ray_cluster):
+        """Tests clusters above pool size are removed."""
+        self.create_pool_cluster()
+        newest = self.create_pool_cluster()
+        with self.settings(RAY_CLUSTER_WARM_POOL_SIZES={"default": 1}):
+            self.assertEqual(refill_warm_pool(), 0)
+        kill_ray_cluster.assert_called_once_with(newest.title)
+        self.assertEqual(ComputeResource.objects.filter(pool="default").count(), 1)
+
+    @patch("api.warm_pool.kill_ray_cluster")
+    def test_warm_pool_disabled_for_user_storage(self, kill_ray_cluster):
+        """Tests users assigned clusters in turn do not share storage."""
+        pool_cluster = self.create_pool_cluster()
+        users = [
+            get_user_model().objects.get(username=username)
+            for username in ["test3_user", "test4_user"]
+        ]
+        with patch(
+            "api.ray.get_template",
+            MagicMock(
+                return_value=engines["django"].from_string(STORAGE_CLUSTER_TEMPLATE)
+            ),
+        ), self.settings(
+            RAY_CLUSTER_WARM_POOL_SIZES={"default": 2}, LIMITS_MAX_CLUSTERS=10
+        ):
+            # pool clusters would mount storage of pool for all users
+            self.assertEqual(refill_warm_pool(), 0)
+            kill_ray_cluster.assert_called_once_with(pool_cluster.title)
+
+            # clusters left in pool are not assigned either
+            leftover = self.create_pool_cluster()
+            for user in users:
+                ComputeResource.objects.filter(owner=user).delete()
+                program = Program.objects.create(title="storage", author=user)
+                job = Job.objects.create(
+                    author=user, program=program, status=Job.QUEUED
+                )
+                self.assertIsNone(assign_warm_cluster(job))
+                execute_job(job)
+
+        leftover.refresh_from_db()
+        self.assertIsNone(leftover.owner)
+        clusters = self.dynamic_client.ray_clusters.clusters
+        self.assertEqual(
+            [cluster["volumeMounts"][0]["subPath"] for cluster in clusters],
+            [user.username for user in users],
+        )
+
+    @patch("api.ray.get_job_handler")
+    def test_execute_job_with_warm_cluster(self, get_job_handler):
+        """Tests job runs on warm pool cluster instead of new one."""
+        get_job_handler.return_value.submit.return_value = "ray-job-id"
+        self.create_pool_cluster(status=ComputeResource.PROVISIONING)
+        ready = self.create_pool_cluster()
+        user = get_user_model().objects.get(username="test4_user")
+        hits = REGISTRY.get_sample_value(
+            "gateway_warm_pool_hits_total", {"python_version": "default"}
+        )
+
+        job = execute_job(Job.objects.create(author=user, status=Job.QUEUED))
+
+        self.assertEqual(job.status, Job.PENDING)
+        self.assertEqual(job.compute_resource.id, ready.id)
+        ready.refresh_from_db()
+        self.assertEqual(ready.owner, user)
+        self.assertIsNone(ready.pool)
+        self.assertEqual(self.dynamic_client.ray_clusters.clusters, [])
+        self.assertEqual(
+            REGISTRY.get_sample_value(
+                "gateway_warm_pool_hits_total", {"python_version": "default"}
+            ),
+            (hits or 0) + 1,
+        )
+
+    def test_custom_image_job_skips_warm_pool(self):
+        """Tests jobs with custom image do not use warm pool."""
+        self.create_pool_cluster()
+        user = get_user_model().objects.get(username="test4_user")
+        program = Program.objects.create(
+            title="custom", author=user, image="custom-image"
+        )
+        job = Job.objects.create(author=user, program=program)
+        self.assertIsNone(assign_warm_cluster(job))
+
+    @patch(
+        "api.management.commands.schedule_queued_jobs.Command._schedule_job",
+    )
+    def test_schedule_queued_jobs_counts_warm_pool(self, schedule_job):
+        """Tests warm pool clusters count towards max clusters."""
+        self.create_pool_cluster()
+        active = ComputeResource.objects.filter(active=True).count()
+        with self.settings(
+            RAY_CLUSTER_WARM_POOL_SIZES={"default": 1},
+            LIMITS_MAX_CLUSTERS=active,
+        ):
+            # jobs with custom image need new clusters above limit
+            Program.objects.update(image="custom-image")
+            call_command("schedule_queued_jobs")
+            schedule_job.assert_not_called()
+
+            # only one of queued jobs gets warm pool cluster
+            Program.objects.update(image=None)
+            call_command("schedule_queued_jobs")
+            schedule_job.assert_called_once()
+
+    def test_free_resources_keeps_warm_pool(self):
+        """Tests warm pool clusters without jobs are not freed."""
+        compute_resource = self.create_pool_cluster()
+        call_command("free_resources")
+        compute_resource.refresh_from_db()
+        self.assertTrue(compute_resource.active)